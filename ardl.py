@@ -1,12 +1,34 @@
+from ardl_lazy import STARTUP_MARKS, mark_startup
 import streamlit as st
 import pandas as pd
 import numpy as np
 import pickle
 import os
 import json
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+import tempfile
+import uuid
+import ardl_charts as charts
+from ardl_downsample import MAX_POINTS
+from ardl_cache import LRUCache, forecast_key, frame_hash, value_hash
+from ardl_batch import to_long_frame
+from ardl_exports import MIME_TYPES, bundle_files, bundle_tables, cached_export
+from ardl_datastore import DatasetStore
+from ardl_aggregates import cagr, historical_aggregates, history_cagr
+from ardl_backtest import DEFAULT_MIN_TRAIN, backtest_metrics, cached_backtest
+from ardl_fit import model_spec, refit_models
+from ardl_ingest import UPLOAD_TYPES, content_hash, load_dataset, load_dataset_file
+from ardl_artifacts import artifact_from_results, load_artifact
+from ardl_scenarios import (
+    BASE_VARS, VAR_LABELS, build_exog_paths, default_scenarios, future_period_index,
+    marginal_response, scenario_type, sensitivity_grid
+)
+from ardl_intervals import analytic_bands, mean_forecast
+from ardl_panel import (
+    ROLLUP, entity_column, entity_history, entity_model, fit_panel, panel_exog_paths, panel_forecast_frame,
+    rollup_bands, rollup_history
+)
+from ardl_profiling import Profiler
+from ardl_simulation import simulate_bands
 
 # ═══════════════════════════════════════════════════════════════════════════
 # PAGE CONFIGURATION
@@ -774,6 +796,42 @@ section[data-testid="stSidebar"] .uploadedFile:hover {
     border-radius: var(--radius-md);
 }
 
+/* View selector: a horizontal radio styled like the tab bar */
+.st-key-active_view [role="radiogroup"] {
+    gap: var(--space-2);
+    background: linear-gradient(90deg, #EFF6FF 0%, #E0E7FF 50%, #EFF6FF 100%);
+    border-bottom: 2px solid var(--primary-200);
+    padding: var(--space-2);
+    margin-bottom: var(--space-6);
+    border-radius: var(--radius-md);
+}
+
+.st-key-active_view [role="radiogroup"] label {
+    background: transparent;
+    padding: var(--space-4) var(--space-6);
+    margin: 0;
+    font-weight: 600;
+    color: var(--text-tertiary);
+    transition: var(--transition-fast);
+    font-size: 0.9375rem;
+    border-radius: var(--radius-md);
+}
+
+.st-key-active_view [role="radiogroup"] label > div:first-child {
+    display: none;
+}
+
+.st-key-active_view [role="radiogroup"] label:hover {
+    color: var(--primary-700);
+    background: rgba(255, 255, 255, 0.7);
+}
+
+.st-key-active_view [role="radiogroup"] label:has(input:checked) {
+    color: var(--primary-700);
+    background: linear-gradient(135deg, #FFFFFF 0%, #F0F9FF 100%);
+    box-shadow: var(--shadow-sm);
+}
+
 /* ═══════════════════════════════════════════════════════════════════════════
    CATEGORY LIST ITEMS
    ═══════════════════════════════════════════════════════════════════════════ */
@@ -1407,63 +1465,133 @@ def load_models(model_path):
         data = pickle.load(f)
     return data
 
+@st.cache_data(show_spinner=False)
+def model_summary(model_path, target):
+    """Full statsmodels summary text of one pre-estimated model"""
+    return str(load_models(model_path)["results"][target].summary())
+
+@st.cache_resource
+def load_engine(artifact_path, model_path, exog_names):
+    """Load the compiled forecast engine and fit statistics from the .npz artifact.
+
+    Falls back to compiling the pickled results when no artifact exists.
+    Raises ValueError when the artifact's regressors differ from ``exog_names``.
+    """
+    if os.path.exists(artifact_path):
+        engine, header, _ = load_artifact(artifact_path)
+        if engine.exog_names != list(exog_names):
+            raise ValueError(f"{artifact_path} was built for regressors {engine.exog_names}, "
+                             f"but the metadata lists {list(exog_names)}")
+    else:
+        engine, header, _ = artifact_from_results(load_models(model_path)["results"], list(exog_names))
+    return engine, header
+
+@st.cache_resource(max_entries=32)
+def refit_engine(dataset_hash, _df, _meta, targets, exog_names):
+    """Re-estimate every model on an uploaded dataset (cached by its content hash)"""
+    return refit_models(_df, _meta, list(targets), list(exog_names))
+
+@st.cache_resource(max_entries=8)
+def panel_models(dataset_hash, _panel, _meta, targets, exog_names):
+    """Batched estimates for every entity of a panel dataset (cached by its content hash)"""
+    return fit_panel(_panel, _meta, list(targets), list(exog_names))
+
+@st.cache_resource(max_entries=256)
+def entity_engine(dataset_hash, entity, _panel_engine, _panel_header):
+    """One entity's engine and header, sliced from the panel estimates"""
+    return entity_model(_panel_engine, _panel_header, entity)
+
+@st.cache_data
+def simulate_forecast_bands(model_hash, exog_future, _engine, n_paths=10000, seed=42):
+    """Bootstrap fan-chart bands for every category and total revenue"""
+    return simulate_bands(_engine, exog_future, n_paths=n_paths, seed=seed)
+
+@st.cache_data(show_spinner=False)
+def backtest_errors(dataset_hash, model_hash, _df, _specs, exog_names, horizon, window):
+    """Rolling-origin forecast errors (also cached on disk across restarts)"""
+    return cached_backtest(_df, _specs, list(exog_names), horizon, window)
+
+@st.cache_resource(max_entries=32)
+def history_aggregates(dataset_hash, _df_hist, targets):
+    """Shared level/growth/share frame of the history (cached by dataset content hash)"""
+    return historical_aggregates(_df_hist, targets)
+
+@st.cache_resource
+def get_forecast_cache():
+    """Process-wide forecast cache shared by every session"""
+    return LRUCache(max_entries=512, max_bytes=64 * 1024 ** 2)
+
+@st.cache_resource
+def get_export_cache():
+    """Process-wide cache of generated export files, keyed by content hash"""
+    return LRUCache(max_entries=64, max_bytes=128 * 1024 ** 2)
+
+@st.cache_resource
+def get_chart_cache():
+    """Process-wide cache of built Plotly figures"""
+    return charts.ChartCache()
+
+@st.cache_resource
+def get_profiler():
+    """Process-wide stage timings of every rerun (see the sidebar debug panel)"""
+    return Profiler()
+
+@st.cache_resource
+def get_dataset_store():
+    """Process-wide store for uploaded datasets with per-session and global budgets"""
+    return DatasetStore(
+        global_budget=512 * 1024 ** 2,
+        session_budget=128 * 1024 ** 2,
+        spill_dir=os.path.join(tempfile.gettempdir(), "ardl_dataset_spill"),
+        spill_budget=1024 ** 3,
+        session_ttl=6 * 3600
+    )
+
 @st.cache_data
 def load_meta(meta_path):
     """Load metadata configuration"""
     with open(meta_path, "r") as f:
         return json.load(f)
 
-@st.cache_data
+@st.cache_resource
 def load_source_data(data_path):
-    """Load historical data from CSV"""
-    df = pd.read_csv(data_path, index_col=0)
-    try:
-        df.index = pd.PeriodIndex(df.index, freq="Y")
-    except Exception:
-        pass
-    return df
+    """Load historical data through the canonical ingestion path"""
+    return load_dataset_file(data_path)
 
-@st.cache_data
-def load_uploaded_excel(uploaded_file):
-    """Load data from uploaded Excel file"""
-    try:
-        df = pd.read_excel(uploaded_file, index_col=0)
-        try:
-            df.index = pd.PeriodIndex(df.index, freq="Y")
-        except Exception:
-            pass
-        
-        if len(df.select_dtypes(include=[np.number]).columns) == 0:
-            return None, "File must contain numeric data columns"
-            
-        return df, None
-    except Exception as e:
-        return None, str(e)
+profiler = get_profiler()
+profiler.begin_run()
+# Show the timing panel with ?debug=1 or ARDL_DEBUG=1
+debug_mode = st.query_params.get("debug", "") in ("1", "true") or bool(os.environ.get("ARDL_DEBUG"))
 
 # Load default configuration
 MODEL_FILE = "ardl_tax_models.pkl"
+ARTIFACT_FILE = "ardl_tax_models.npz"
 META_FILE = "ardl_tax_models_meta.json"
 DATA_FILE = "ardl_prepared_data.csv"
 
-if not os.path.exists(MODEL_FILE) or not os.path.exists(DATA_FILE) or not os.path.exists(META_FILE):
+has_models = os.path.exists(ARTIFACT_FILE) or os.path.exists(MODEL_FILE)
+if not has_models or not os.path.exists(DATA_FILE) or not os.path.exists(META_FILE):
     st.error("⚠️ **Missing Required Files** • Please run 'ardl_pipeline.py' first to generate data files.")
     st.stop()
 
 # Load artifacts
-with st.spinner("⚙️ Initializing dashboard..."):
-    artifacts = load_models(MODEL_FILE)
+with st.spinner("⚙️ Initializing dashboard..."), profiler.stage("ingestion"):
     df_default = load_source_data(DATA_FILE)
     meta = load_meta(META_FILE)
 
-models_dict = artifacts["models"]
-results_dict = artifacts["results"]
-targets = list(results_dict.keys())
-
 x_vars_ordered = meta.get("x_vars_used", [])
 if not x_vars_ordered:
     st.error("⚠️ **Configuration Error** • Metadata missing. Please re-run pipeline.")
     st.stop()
 
+with profiler.stage("model_load"):
+    try:
+        engine, model_header = load_engine(ARTIFACT_FILE, MODEL_FILE, tuple(x_vars_ordered))
+    except ValueError as e:
+        st.error(f"⚠️ **Configuration Error** • {e}. Please re-run the pipeline.")
+        st.stop()
+targets = engine.targets
+
 # ═══════════════════════════════════════════════════════════════════════════
 # SIDEBAR CONFIGURATION
 # ═══════════════════════════════════════════════════════════════════════════
@@ -1483,6 +1611,8 @@ st.sidebar.markdown("""
 """, unsafe_allow_html=True)
 
 # Initialize session state
+if 'session_id' not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
 if 'uploaded_datasets' not in st.session_state:
     st.session_state.uploaded_datasets = {}
 if 'selected_dataset' not in st.session_state:
@@ -1496,35 +1626,69 @@ if 'selected_dataset' not in st.session_state:
 def on_dataset_change():
     st.session_state.selected_dataset = st.session_state.dataset_selector
 
+# Uploaded frames live in the shared store; drop names whose data was evicted
+dataset_store = get_dataset_store()
+session_id = st.session_state.session_id
+for name in list(st.session_state.uploaded_datasets):
+    if name not in dataset_store.names(session_id):
+        del st.session_state.uploaded_datasets[name]
+        st.sidebar.warning(f"'{name}' was evicted to free memory • please upload it again")
+
 # Get available datasets
 available_datasets = ["Default Data"] + list(st.session_state.uploaded_datasets.keys())
 
 if st.session_state.selected_dataset not in available_datasets:
     st.session_state.selected_dataset = "Default Data"
 
-# Get active dataset
-if st.session_state.selected_dataset == "Default Data":
-    df_hist = df_default.copy()
+# Get active dataset (shared read-only frames; copy-on-write protects the stored data)
+df_hist = None
+if st.session_state.selected_dataset != "Default Data":
+    df_hist = dataset_store.get(session_id, st.session_state.selected_dataset)
+    data_source_label = st.session_state.selected_dataset
+if df_hist is None:
+    df_hist = df_default
     data_source_label = "Default Dataset"
-else:
-    if st.session_state.selected_dataset in st.session_state.uploaded_datasets:
-        df_hist = st.session_state.uploaded_datasets[st.session_state.selected_dataset].copy()
-        data_source_label = st.session_state.selected_dataset
-    else:
-        df_hist = df_default.copy()
-        data_source_label = "Default Dataset"
-        st.session_state.selected_dataset = "Default Data"
+    st.session_state.selected_dataset = "Default Data"
 
-# Filter to 2024
-if isinstance(df_hist.index, pd.PeriodIndex):
-    df_hist = df_hist[df_hist.index.year <= 2024]
-elif hasattr(df_hist.index, "year"):
-    df_hist = df_hist[df_hist.index.year <= 2024]
+# Filter to 2024 (only slice when rows actually fall outside the range)
+if hasattr(df_hist.index, "year"):
+    in_range = df_hist.index.year <= 2024
 else:
     try:
-        df_hist = df_hist[df_hist.index <= 2024]
+        in_range = df_hist.index <= 2024
     except:
-        pass
+        in_range = None
+if in_range is not None and not in_range.all():
+    df_hist = df_hist[in_range]
+
+# Panel datasets: every entity is estimated in one batched pass; the views show one
+# entity or the national roll-up of all of them
+panel_engine = None
+selected_entity = None
+entity_col = entity_column(df_hist)
+if entity_col is not None:
+    panel_df = df_hist
+    panel_hash = frame_hash(panel_df)
+    try:
+        with profiler.stage("panel_fit"):
+            panel_engine, panel_header = panel_models(panel_hash, panel_df, meta, tuple(targets),
+                                                      tuple(engine.exog_names))
+        entities = panel_header["entities"]
+    except (KeyError, ValueError) as e:
+        st.sidebar.warning(f"⚠️ Could not estimate entity models ({e}) • showing the roll-up only")
+        entities = []
+    selected_entity = st.sidebar.selectbox(
+        "🗺️ Entity",
+        [ROLLUP] + entities,
+        key=f"entity_{st.session_state.selected_dataset}",
+        help="Forecast one entity, or sum every entity's forecast into national totals"
+    )
+    if selected_entity == ROLLUP:
+        df_hist = rollup_history(panel_df, targets, entity_col)
+    else:
+        df_hist = entity_history(panel_df, selected_entity, entity_col)
+    data_source_label = f"{data_source_label} • {selected_entity}"
+rollup_mode = panel_engine is not None and selected_entity == ROLLUP
 
 # ═══════════════════════════════════════════════════════════════════════════
 # SIDEBAR SECTIONS - PROPER DISPLAY ORDER
@@ -1545,55 +1709,21 @@ years_to_forecast = st.sidebar.slider(
 # 2. Economic Assumptions
 st.sidebar.markdown("### 📊 Economic Assumptions")
 
-base_vars = ["gdp_real", "imports_real", "consumption_real", "govexp", "gdp_growth", "inflation", "unemployment", "dummy_2014"]
-available_vars = [c for c in base_vars if c in df_hist.columns]
+available_vars = [c for c in BASE_VARS if c in df_hist.columns]
 
-defaults = {
-    "gdp_real": 0.03,
-    "gdp_growth": 0.03,
-    "imports_real": 0.05,
-    "govexp": 0.05,
-    "inflation": 0.12,
-    "unemployment": 0.065
-}
-
-var_labels = {
-    "gdp_real": "Real GDP Growth Rate",
-    "gdp_growth": "GDP Growth Rate",
-    "imports_real": "Import Growth Rate",
-    "govexp": "Government Expenditure",
-    "inflation": "Inflation Rate",
-    "unemployment": "Unemployment Rate",
-    "consumption_real": "Consumption Growth"
-}
-
-scenarios = {}
+scenarios = default_scenarios(df_hist.columns)
 for v in available_vars:
-    if "dummy" in v:
-        scenarios[v] = {"type": "fixed", "value": 1}
+    if scenario_type(v) == "fixed":
         continue
 
-    label = var_labels.get(v, v.replace("_", " ").title())
-    def_val = defaults.get(v, 0.0)
-
-    if "growth" in v or "inflation" in v or "unemployment" in v:
-        new_val = st.sidebar.number_input(
-            label, 
-            value=float(def_val), 
-            step=0.005, 
-            format="%.3f", 
-            key=f"{v}_{st.session_state.selected_dataset}"
-        )
-        scenarios[v] = {"type": "level", "value": new_val}
-    else:
-        growth = st.sidebar.number_input(
-            label, 
-            value=float(def_val), 
-            step=0.005, 
-            format="%.3f", 
-            key=f"{v}_{st.session_state.selected_dataset}"
-        )
-        scenarios[v] = {"type": "growth", "value": growth}
+    label = VAR_LABELS.get(v, v.replace("_", " ").title())
+    scenarios[v]["value"] = st.sidebar.number_input(
+        label, 
+        value=float(scenarios[v]["value"]), 
+        step=0.005, 
+        format="%.3f", 
+        key=f"{v}_{st.session_state.selected_dataset}"
+    )
 
 st.sidebar.markdown("---")
 
@@ -1603,8 +1733,8 @@ st.sidebar.markdown("### 📁 Data Management")
 # File uploader
 uploaded_file = st.sidebar.file_uploader(
     "Upload Custom Dataset",
-    type=['xlsx', 'xls'],
-    help="Excel file with historical revenue data",
+    type=UPLOAD_TYPES,
+    help="Excel, CSV, Parquet or Arrow/Feather file with historical revenue data",
     key="file_uploader"
 )
 
@@ -1613,14 +1743,24 @@ if uploaded_file is not None:
     file_name = uploaded_file.name
     if file_name not in st.session_state.uploaded_datasets:
         with st.spinner(f"Processing {file_name}..."):
-            df_uploaded, error = load_uploaded_excel(uploaded_file)
+            # Identical bytes are parsed once, whatever the file is called
+            file_bytes = uploaded_file.getvalue()
+            file_hash = content_hash(file_bytes)
+            df_uploaded, error = dataset_store.find_content(file_hash), None
+            if df_uploaded is None:
+                df_uploaded, error = load_dataset(file_bytes, file_name)
             if error:
                 st.sidebar.error(f"Error: {error}")
             else:
-                st.session_state.uploaded_datasets[file_name] = df_uploaded
-                st.session_state.selected_dataset = file_name
-                st.sidebar.success(f"✓ Successfully loaded")
-                st.rerun()
+                try:
+                    dataset_hash = dataset_store.put(session_id, file_name, df_uploaded, content_hash=file_hash)
+                except ValueError as e:
+                    st.sidebar.error(f"Error: {e}")
+                else:
+                    st.session_state.uploaded_datasets[file_name] = {"hash": dataset_hash, "rows": len(df_uploaded)}
+                    st.session_state.selected_dataset = file_name
+                    st.sidebar.success(f"✓ Successfully loaded")
+                    st.rerun()
 
 # Dataset selector
 selected_dataset = st.sidebar.radio(
@@ -1636,15 +1776,17 @@ st.session_state.selected_dataset = selected_dataset
 # Clear uploads button
 if len(st.session_state.uploaded_datasets) > 0:
     if st.sidebar.button("Clear All Uploads"):
+        dataset_store.clear_session(session_id)
         st.session_state.uploaded_datasets = {}
         st.session_state.selected_dataset = "Default Data"
         st.rerun()
 
 # Dataset info
+entity_count = f"  \n🗺️ {len(panel_engine.entities)} entities" if panel_engine is not None else ""
 st.sidebar.info(f"""
 📊 **{data_source_label}**  
 📅 {df_hist.index.min()} – {df_hist.index.max()}  
-📈 {len(df_hist)} observations
+📈 {len(df_hist)} observations{entity_count}
 """)
 
 # 1. Forecast Configuration
@@ -1652,17 +1794,32 @@ st.sidebar.info(f"""
 # ═══════════════════════════════════════════════════════════════════════════
 # FORECAST GENERATION
 # ═══════════════════════════════════════════════════════════════════════════
-max_idx = df_hist.index.max()
-if hasattr(max_idx, 'year'):
-    last_year = max_idx.year
-else:
+# Uploaded datasets get their own estimates; the default data uses the shipped models
+dataset_hash = frame_hash(df_hist)
+models_refit = False
+if panel_engine is not None and not rollup_mode:
+    engine, model_header = entity_engine(panel_hash, selected_entity, panel_engine, panel_header)
+    models_refit = True
+elif st.session_state.selected_dataset != "Default Data":
+    # The roll-up's diagnostics come from a model of the rolled-up national series
     try:
-        last_year = int(max_idx)
-    except:
-        last_year = 2024
-
-future_years = [last_year + i for i in range(1, years_to_forecast + 1)]
-future_index = pd.PeriodIndex(future_years, freq="Y")
+        with profiler.stage("refit"):
+            engine, model_header = refit_engine(dataset_hash, df_hist, meta, tuple(targets), tuple(engine.exog_names))
+        models_refit = True
+    except (KeyError, ValueError) as e:
+        st.warning(f"⚠️ Could not re-estimate models on {data_source_label} ({e}) • using pre-estimated models")
+model_hash = value_hash(model_header["models"])
+if rollup_mode:
+    model_hash = value_hash([model_hash, ROLLUP, panel_hash])
+
+# Level-space history, totals, growth and shares, computed once per dataset and read by every view
+with profiler.stage("aggregates"):
+    hist_agg = history_aggregates(dataset_hash, df_hist, tuple(targets))
+hist_levels = hist_agg["level"]
+
+future_index = future_period_index(df_hist, years_to_forecast)
+future_years = list(future_index.year)
+last_year = future_years[0] - 1
 
 try:
     if hasattr(df_hist.index, "to_timestamp"):
@@ -1672,53 +1829,52 @@ try:
 except:
     plot_hist_x = df_hist.index
 
-df_future = pd.DataFrame(index=future_index)
-last_row = df_hist.iloc[-1].copy()
-temp_row = last_row.copy()
-future_rows = []
-
-for _ in range(years_to_forecast):
-    next_row = temp_row.copy()
-    
-    for v in available_vars:
-        spec = scenarios[v]
-        if spec["type"] == "growth":
-            next_row[v] = temp_row[v] + np.log(1 + spec["value"])
-        elif spec["type"] == "fixed":
-            next_row[v] = spec["value"]
-        else:
-            if v in ["inflation", "unemployment", "gdp_growth"]:
-                next_row[v] = spec["value"] * 100.0
-            else:
-                next_row[v] = spec["value"]
-    
-    future_rows.append(next_row)
-    temp_row = next_row
+def rollup_forecast(scenarios):
+    """National forecast: every entity's lognormal mean in one batched pass, summed"""
+    entity_exog = panel_exog_paths(panel_engine, scenarios, years_to_forecast)
+    return pd.DataFrame(panel_engine.mean_forecast(entity_exog).sum(axis=0), index=future_index,
+                        columns=panel_engine.targets)
+
+def compute_forecast():
+    with profiler.stage("scenario_build"):
+        exog_future = build_exog_paths(df_hist.iloc[-1], scenarios, engine.exog_names, years_to_forecast)[0]
+    # Log forecasts are normal, so the level forecast is the lognormal mean
+    if rollup_mode:
+        entity_exog = panel_exog_paths(panel_engine, scenarios, years_to_forecast)
+        bands = rollup_bands(panel_engine, entity_exog, index=future_index)
+    else:
+        bands = analytic_bands(engine, exog_future, index=future_index)
+    df_fore = pd.DataFrame({t: bands[t]["mean"] for t in engine.targets}, index=future_index)
+    return {
+        "exog_future": exog_future,
+        "df_fore": df_fore,
+        "bands": bands,
+        "total_tax_fore": df_fore.sum(axis=1),
+    }
 
-df_future = pd.DataFrame(future_rows, index=future_index)
+# Unchanged dataset/scenario/horizon combinations are served from the shared cache
+forecast_cache_key = forecast_key(
+    dataset_hash, scenarios, years_to_forecast, model_hash=model_hash
+)
+try:
+    with profiler.stage("forecast"):
+        forecast_bundle = get_forecast_cache().get_or_compute(forecast_cache_key, compute_forecast)
+except Exception as e:
+    st.error(f"Forecast error: {e}")
+    st.stop()
 
-forecast_results = {}
-for target_name in targets:
-    res = results_dict[target_name]
-    exog_future = df_future[x_vars_ordered]
-    
-    try:
-        preds = res.forecast(steps=years_to_forecast, exog=exog_future)
-        preds_level = np.exp(preds)
-        forecast_results[target_name] = preds_level
-    except Exception as e:
-        st.error(f"Forecast error for {target_name}: {e}")
+exog_future = forecast_bundle["exog_future"]
+df_fore = forecast_bundle["df_fore"]
+total_tax_fore = forecast_bundle["total_tax_fore"]
+forecast_bands = forecast_bundle["bands"]
 
 # Calculate Metrics
-total_tax_hist = np.exp(df_hist[targets]).sum(axis=1)
-df_fore = pd.DataFrame(forecast_results)
 plot_fore_x = df_fore.index.to_timestamp() if hasattr(df_fore.index, "to_timestamp") else df_fore.index
-total_tax_fore = df_fore.sum(axis=1)
 
-total_hist_latest = total_tax_hist.iloc[-1] / 1000
+total_hist_latest = hist_levels["total"].iloc[-1]
 total_fore_last = total_tax_fore.iloc[-1] / 1000
-growth_pct = ((total_fore_last * 1000) / (total_hist_latest * 1000) - 1) * 100
-avg_annual_growth = (((total_fore_last * 1000) / (total_hist_latest * 1000)) ** (1/years_to_forecast) - 1) * 100
+growth_pct = (total_fore_last / total_hist_latest - 1) * 100
+avg_annual_growth = cagr(total_hist_latest, total_fore_last, years_to_forecast)
 total_categories = len(targets)
 
 # ═══════════════════════════════════════════════════════════════════════════
@@ -1804,19 +1960,29 @@ with col4:
     """, unsafe_allow_html=True)
 
 st.markdown('</div>', unsafe_allow_html=True)
+mark_startup("first_kpi")
 
 # ═══════════════════════════════════════════════════════════════════════════
 # MAIN CONTENT TABS
 # ═══════════════════════════════════════════════════════════════════════════
-tab1, tab2, tab3, tab4, tab5 = st.tabs([
-    "📊 Executive Overview", 
-    "📈 Trend Analysis", 
-    "🎯 Category Performance", 
-    "⚙️ Model Diagnostics", 
-    "💾 Data & Exports"
-])
-
-with tab1:
+chart_cache = get_chart_cache()
+
+def history_window():
+    """Rows of the history to plot: all of it, or a chosen window once charts are downsampled.
+
+    Narrowing the window re-samples it to the full point budget, so detail
+    increases as the user zooms in.
+    """
+    n_rows = len(df_hist)
+    if n_rows <= MAX_POINTS:
+        return slice(None)
+    start, end = st.slider("History window (periods)", 0, n_rows - 1, (0, n_rows - 1), key="history_window")
+    st.caption(f"{df_hist.index[start]} – {df_hist.index[end]} • {end - start + 1:,} of {n_rows:,} periods, "
+               f"charts downsampled to {MAX_POINTS:,} points per series")
+    return slice(start, end + 1)
+
+def render_overview():
+    """Executive Overview: revenue timeline, growth and forecast confidence"""
     # Main Revenue Chart
     st.markdown(f"""
     <div class="content-section">
@@ -1829,73 +1995,23 @@ with tab1:
         </div>
     """, unsafe_allow_html=True)
     
-    fig_main = go.Figure()
+    window = history_window()
+    with profiler.stage("chart:revenue_timeline"):
+        fig_main = charts.revenue_timeline(chart_cache, plot_hist_x[window], hist_levels["total"].iloc[window],
+                                           plot_fore_x, total_tax_fore / 1000)
     
-    fig_main.add_trace(go.Scatter(
-        x=plot_hist_x,
-        y=total_tax_hist / 1000,
-        mode='lines',
-        name='Historical Revenue',
-        line=dict(color='#2563EB', width=3.5),
-        fill='tozeroy',
-        fillcolor='rgba(37, 99, 235, 0.06)',
-        hovertemplate='<b>FY %{x|%Y}</b><br><b>₨%{y:,.2f}B</b><extra></extra>'
-    ))
-    
-    fig_main.add_trace(go.Scatter(
-        x=plot_fore_x,
-        y=total_tax_fore / 1000,
-        mode='lines+markers',
-        name='Projected Revenue',
-        line=dict(color='#8B5CF6', width=3.5, dash='dash'),
-        marker=dict(size=9, color='#8B5CF6', line=dict(width=2, color='white')),
-        hovertemplate='<b>FY %{x|%Y}</b><br><b>₨%{y:,.2f}B</b><extra></extra>'
-    ))
-    
-    fig_main.update_layout(
-        height=460,
-        margin=dict(l=0, r=0, t=20, b=0),
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        font=dict(family='Inter', size=12, color='#4B5563'),
-        hovermode='x unified',
-        legend=dict(
-            orientation="h",
-            yanchor="bottom",
-            y=1.02,
-            xanchor="right",
-            x=1,
-            font=dict(size=13, weight=600),
-            bgcolor='rgba(255,255,255,0.95)',
-            bordercolor='#E5E9ED',
-            borderwidth=1
-        ),
-        xaxis=dict(
-            showgrid=True,
-            gridcolor='rgba(0,0,0,0.03)',
-            zeroline=False,
-            title=dict(text="Fiscal Year", font=dict(weight=600, size=13))
-        ),
-        yaxis=dict(
-            title=dict(text="Revenue (PKR Billion)", font=dict(weight=600, size=13)),
-            showgrid=True,
-            gridcolor='rgba(0,0,0,0.03)',
-            zeroline=False
-        )
-    )
-    
-    st.plotly_chart(fig_main, use_container_width=True, config={
-        'displayModeBar': True,
-        'displaylogo': False,
-        'modeBarButtonsToAdd': ['pan2d', 'select2d', 'lasso2d', 'resetScale2d', 'zoomIn2d', 'zoomOut2d'],
-        'toImageButtonOptions': {
-            'format': 'png',
-            'filename': 'revenue_projection_timeline',
-            'height': 800,
-            'width': 1400,
-            'scale': 2
-        }
-    })
+        st.plotly_chart(fig_main, use_container_width=True, config={
+            'displayModeBar': True,
+            'displaylogo': False,
+            'modeBarButtonsToAdd': ['pan2d', 'select2d', 'lasso2d', 'resetScale2d', 'zoomIn2d', 'zoomOut2d'],
+            'toImageButtonOptions': {
+                'format': 'png',
+                'filename': 'revenue_projection_timeline',
+                'height': 800,
+                'width': 1400,
+                'scale': 2
+            }
+        })
     st.markdown('</div>', unsafe_allow_html=True)
     
     # Secondary Charts Row
@@ -1912,106 +2028,66 @@ with tab1:
             </div>
         """, unsafe_allow_html=True)
         
-        growth_rates = (total_tax_hist / 1000).pct_change() * 100
-        colors = ['#F43F5E' if x < 0 else '#14B8A6' for x in growth_rates]
+        growth_rates = hist_agg["growth", "total"]
+        with profiler.stage("chart:growth_bars"):
+            fig_growth = charts.growth_bars(chart_cache, plot_hist_x[window], growth_rates.iloc[window])
         
-        fig_growth = go.Figure()
-        fig_growth.add_trace(go.Bar(
-            x=plot_hist_x,
-            y=growth_rates,
-            marker=dict(color=colors, line=dict(width=0)),
-            hovertemplate='<b>FY %{x|%Y}</b><br>Growth: <b>%{y:.1f}%</b><extra></extra>'
-        ))
-        
-        fig_growth.update_layout(
-            height=340,
-            margin=dict(l=0, r=0, t=10, b=0),
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            showlegend=False,
-            xaxis=dict(showgrid=False, title=dict(text="Year", font=dict(weight=600))),
-            yaxis=dict(
-                showgrid=True, 
-                gridcolor='rgba(0,0,0,0.03)', 
-                zeroline=True, 
-                zerolinecolor='#D1D8DE',
-                zerolinewidth=2,
-                title=dict(text="Growth Rate %", font=dict(weight=600))
-            )
-        )
-        
-        st.plotly_chart(fig_growth, use_container_width=True, config={
-            'displayModeBar': True,
-            'displaylogo': False,
-            'toImageButtonOptions': {
-                'format': 'png',
-                'filename': 'growth_dynamics',
-                'height': 600,
-                'width': 1000,
-                'scale': 2
-            }
-        })
+            st.plotly_chart(fig_growth, use_container_width=True, config={
+                'displayModeBar': True,
+                'displaylogo': False,
+                'toImageButtonOptions': {
+                    'format': 'png',
+                    'filename': 'growth_dynamics',
+                    'height': 600,
+                    'width': 1000,
+                    'scale': 2
+                }
+            })
         st.markdown('</div>', unsafe_allow_html=True)
     
     with col2:
-        st.markdown("""
+        # Simulation runs a single engine, so the roll-up keeps the analytic bands
+        use_monte_carlo = st.session_state.get("confidence_monte_carlo", False) and not rollup_mode
+        conf_subtitle = ("Monte Carlo fan chart • 10,000 bootstrapped residual paths" if use_monte_carlo
+                         else "Analytic prediction intervals • lognormal mean with 50% and 90% bands")
+        st.markdown(f"""
         <div class="content-section">
             <div class="section-header">
                 <div>
                     <div class="section-title">Forecast Confidence</div>
-                    <div class="section-subtitle">Statistical reliability metric</div>
+                    <div class="section-subtitle">{conf_subtitle}</div>
                 </div>
             </div>
         """, unsafe_allow_html=True)
         
-        years_range = list(range(1, years_to_forecast + 1))
-        confidence = [95 - (i * 3.5) for i in years_range]
-        
-        fig_conf = go.Figure()
-        fig_conf.add_trace(go.Scatter(
-            x=years_range,
-            y=confidence,
-            mode='lines+markers',
-            line=dict(color='#8B5CF6', width=4),
-            marker=dict(size=11, color='#8B5CF6', line=dict(width=2.5, color='white')),
-            fill='tozeroy',
-            fillcolor='rgba(139, 92, 246, 0.12)',
-            hovertemplate='Year %{x}<br>Confidence: <b>%{y:.0f}%</b><extra></extra>'
-        ))
+        if use_monte_carlo:
+            with profiler.stage("monte_carlo"):
+                total_bands = simulate_forecast_bands(model_hash, exog_future, engine)["total"] / 1000
+            center_line, center_name = total_bands[50], "Median"
+        else:
+            total_bands = forecast_bands["total"] / 1000
+            center_line, center_name = total_bands["mean"], "Mean"
         
-        fig_conf.update_layout(
-            height=340,
-            margin=dict(l=0, r=0, t=10, b=0),
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            showlegend=False,
-            xaxis=dict(
-                title=dict(text='Forecast Year', font=dict(weight=600)), 
-                showgrid=True, 
-                gridcolor='rgba(0,0,0,0.03)'
-            ),
-            yaxis=dict(
-                title=dict(text='Confidence Level %', font=dict(weight=600)), 
-                showgrid=True, 
-                gridcolor='rgba(0,0,0,0.03)', 
-                range=[0, 100]
-            )
-        )
+        with profiler.stage("chart:confidence_fan"):
+            fig_conf = charts.confidence_fan(chart_cache, plot_fore_x, total_bands, center_line, center_name)
         
-        st.plotly_chart(fig_conf, use_container_width=True, config={
-            'displayModeBar': True,
-            'displaylogo': False,
-            'toImageButtonOptions': {
-                'format': 'png',
-                'filename': 'forecast_confidence',
-                'height': 600,
-                'width': 1000,
-                'scale': 2
-            }
-        })
+            st.plotly_chart(fig_conf, use_container_width=True, config={
+                'displayModeBar': True,
+                'displaylogo': False,
+                'toImageButtonOptions': {
+                    'format': 'png',
+                    'filename': 'forecast_confidence',
+                    'height': 600,
+                    'width': 1000,
+                    'scale': 2
+                }
+            })
+        if not rollup_mode:
+            st.checkbox("Monte Carlo bands (10,000 paths)", key="confidence_monte_carlo")
         st.markdown('</div>', unsafe_allow_html=True)
 
-with tab2:
+def render_trends():
+    """Trend Analysis: category ranking and historical composition"""
     # Category Performance Ranking - MOVED HERE
     st.markdown("""
     <div class="content-section">
@@ -2026,9 +2102,9 @@ with tab2:
     
     category_data = []
     for t in targets:
-        hist_val = np.exp(df_hist[t]).iloc[-1] / 1000
+        hist_val = hist_levels[t].iloc[-1]
         fore_val = df_fore[t].iloc[-1] / 1000
-        growth = ((fore_val * 1000) / (hist_val * 1000) - 1) * 100
+        growth = (fore_val / hist_val - 1) * 100
         category_data.append({
             'name': t.replace('_', ' ').title(),
             'base': hist_val,
@@ -2053,75 +2129,41 @@ with tab2:
     st.markdown('</div></div>', unsafe_allow_html=True)
     
     # Historical Composition
-    st.markdown("""
+    total_cagr = history_cagr(hist_agg)["total"]
+    latest_shares = hist_agg["share"].iloc[-1]
+    top_share = latest_shares.idxmax()
+    st.markdown(f"""
     <div class="content-section">
         <div class="section-header">
             <div>
                 <div class="section-title">Historical Revenue Composition</div>
-                <div class="section-subtitle">Category contribution over time</div>
+                <div class="section-subtitle">Category contribution over time • {total_cagr:+.1f}% CAGR since {df_hist.index[0]}</div>
             </div>
+            <div class="section-badge">🏆 {top_share.replace('_', ' ').title()} {latest_shares[top_share]:.0f}% share</div>
         </div>
     """, unsafe_allow_html=True)
     
-    hist_df = np.exp(df_hist[targets]) / 1000
-    
-    fig_area = go.Figure()
-    colors = ['#2563EB', '#8B5CF6', '#14B8A6', '#F59E0B', '#F43F5E', '#06B6D4', '#6366F1', '#EC4899']
+    window = history_window()
+    hist_df = hist_levels[targets].iloc[window]
     
-    for idx, target in enumerate(targets):
-        fig_area.add_trace(go.Scatter(
-            x=plot_hist_x,
-            y=hist_df[target],
-            mode='lines',
-            name=target.replace('_', ' ').title(),
-            line=dict(width=0),
-            stackgroup='one',
-            fillcolor=colors[idx % len(colors)],
-            hovertemplate='<b>%{fullData.name}</b><br>₨%{y:,.2f}B<extra></extra>'
-        ))
-    
-    fig_area.update_layout(
-        height=480,
-        margin=dict(l=0, r=0, t=10, b=0),
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        hovermode='x unified',
-        legend=dict(
-            orientation="h", 
-            yanchor="bottom", 
-            y=1.02, 
-            xanchor="right", 
-            x=1,
-            bgcolor='rgba(255,255,255,0.95)',
-            bordercolor='#E5E9ED',
-            borderwidth=1
-        ),
-        xaxis=dict(
-            showgrid=True, 
-            gridcolor='rgba(0,0,0,0.03)', 
-            title=dict(text="Fiscal Year", font=dict(weight=600))
-        ),
-        yaxis=dict(
-            title=dict(text="Revenue (PKR Billion)", font=dict(weight=600)), 
-            showgrid=True, 
-            gridcolor='rgba(0,0,0,0.03)'
-        )
-    )
+    with profiler.stage("chart:composition_area"):
+        fig_area = charts.composition_area(chart_cache, plot_hist_x[window], hist_df)
     
-    st.plotly_chart(fig_area, use_container_width=True, config={
-        'displayModeBar': True,
-        'displaylogo': False,
-        'toImageButtonOptions': {
-            'format': 'png',
-            'filename': 'revenue_composition',
-            'height': 800,
-            'width': 1400,
-            'scale': 2
-        }
-    })
+        st.plotly_chart(fig_area, use_container_width=True, config={
+            'displayModeBar': True,
+            'displaylogo': False,
+            'toImageButtonOptions': {
+                'format': 'png',
+                'filename': 'revenue_composition',
+                'height': 800,
+                'width': 1400,
+                'scale': 2
+            }
+        })
     st.markdown('</div>', unsafe_allow_html=True)
 
-with tab3:
+def render_categories():
+    """Category Performance: one projection chart per revenue stream"""
     # Individual Category Projections
     st.markdown("""
     <div class="content-section">
@@ -2133,6 +2175,7 @@ with tab3:
         </div>
     """, unsafe_allow_html=True)
     
+    window = history_window()
     num_cols = 2
     for i in range(0, len(targets), num_cols):
         cols = st.columns(num_cols)
@@ -2140,105 +2183,173 @@ with tab3:
             if i + j < len(targets):
                 t = targets[i + j]
                 with cols[j]:
-                    hist_series = np.exp(df_hist[t]) / 1000
+                    hist_series = hist_levels[t]
                     fore_series = df_fore[t] / 1000
                     
-                    fig_cat = go.Figure()
-                    
-                    fig_cat.add_trace(go.Scatter(
-                        x=plot_hist_x,
-                        y=hist_series,
-                        mode='lines',
-                        name='Historical',
-                        line=dict(color='#2563EB', width=3),
-                        fill='tozeroy',
-                        fillcolor='rgba(37, 99, 235, 0.08)',
-                        hovertemplate='<b>%{x|%Y}</b><br>₨%{y:,.2f}B<extra></extra>'
-                    ))
-                    
-                    fig_cat.add_trace(go.Scatter(
-                        x=plot_fore_x,
-                        y=fore_series,
-                        mode='lines+markers',
-                        name='Forecast',
-                        line=dict(color='#8B5CF6', width=3, dash='dash'),
-                        marker=dict(size=7, color='#8B5CF6', line=dict(width=2, color='white')),
-                        hovertemplate='<b>%{x|%Y}</b><br>₨%{y:,.2f}B<extra></extra>'
-                    ))
+                    with profiler.stage(f"chart:category_projection:{t}"):
+                        fig_cat = charts.category_projection(chart_cache, t, plot_hist_x[window], hist_series.iloc[window],
+                                                             plot_fore_x, fore_series)
                     
-                    fig_cat.update_layout(
-                        title=dict(
-                            text=f"<b>{t.replace('_', ' ').title()}</b>",
-                            font=dict(size=15, color='#1F2937', family='Space Grotesk')
-                        ),
-                        height=300,
-                        margin=dict(l=0, r=0, t=50, b=0),
-                        plot_bgcolor='rgba(0,0,0,0)',
-                        paper_bgcolor='rgba(0,0,0,0)',
-                        showlegend=False,
-                        xaxis=dict(showgrid=True, gridcolor='rgba(0,0,0,0.03)'),
-                        yaxis=dict(showgrid=True, gridcolor='rgba(0,0,0,0.03)')
-                    )
-                    
-                    st.plotly_chart(fig_cat, use_container_width=True, config={
-                        'displayModeBar': True,
-                        'displaylogo': False,
-                        'toImageButtonOptions': {
-                            'format': 'png',
-                            'filename': f'category_{t}',
-                            'height': 600,
-                            'width': 1000,
-                            'scale': 2
-                        }
-                    })
+                        st.plotly_chart(fig_cat, use_container_width=True, config={
+                            'displayModeBar': True,
+                            'displaylogo': False,
+                            'toImageButtonOptions': {
+                                'format': 'png',
+                                'filename': f'category_{t}',
+                                'height': 600,
+                                'width': 1000,
+                                'scale': 2
+                            }
+                        })
                     
                     hist_last = hist_series.iloc[-1]
                     fore_last = fore_series.iloc[-1]
-                    cat_growth = ((fore_last * 1000) / (hist_last * 1000) - 1) * 100
+                    cat_growth = (fore_last / hist_last - 1) * 100
                     growth_icon = "📈" if cat_growth > 0 else "📉"
                     st.markdown(f"<div style='font-size: 0.875rem; color: #6B7280; text-align: center; font-weight: 500; padding: 0.5rem;'>{growth_icon} <strong>{cat_growth:+.1f}%</strong> growth • Base: ₨{hist_last:,.2f}B → Target: ₨{fore_last:,.2f}B</div>", unsafe_allow_html=True)
     
     st.markdown('</div>', unsafe_allow_html=True)
 
-with tab4:
-    st.markdown("""
+def render_diagnostics():
+    """Model Diagnostics: fit statistics, multipliers and backtest"""
+    model_source = f"Re-estimated on {data_source_label}" if models_refit else "Pre-estimated models"
+    st.markdown(f"""
     <div class="content-section">
         <div class="section-header">
             <div>
                 <div class="section-title">Model Performance Metrics</div>
-                <div class="section-subtitle">ARDL econometric model diagnostics and goodness-of-fit</div>
+                <div class="section-subtitle">ARDL econometric model diagnostics and goodness-of-fit • {model_source}</div>
             </div>
         </div>
     """, unsafe_allow_html=True)
+    if rollup_mode:
+        st.info(f"ℹ️ Statistics, multipliers and backtest below describe a model of the rolled-up national series; "
+                f"the forecasts sum the {len(panel_engine.entities)} entity models")
     
     selected_model = st.selectbox(
         "Select Revenue Category",
         targets,
-        format_func=lambda x: x.replace('_', ' ').title()
+        format_func=lambda x: x.replace('_', ' ').title(),
+        key="diagnostics_model"
     )
     
-    res_selected = results_dict[selected_model]
+    stats_selected = model_header["models"][selected_model]
     
     col1, col2, col3, col4 = st.columns(4)
     
     try:
         with col1:
-            st.metric("R-squared", f"{res_selected.rsquared:.4f}", help="Proportion of variance explained")
+            st.metric("R-squared", f"{stats_selected['rsquared']:.4f}", help="Proportion of variance explained")
         with col2:
-            st.metric("Adj. R-squared", f"{res_selected.rsquared_adj:.4f}", help="Adjusted R-squared")
+            st.metric("Adj. R-squared", f"{stats_selected['rsquared_adj']:.4f}", help="Adjusted R-squared")
         with col3:
-            st.metric("AIC", f"{res_selected.aic:.2f}", help="Akaike Information Criterion")
+            st.metric("AIC", f"{stats_selected['aic']:.2f}", help="Akaike Information Criterion")
         with col4:
-            st.metric("BIC", f"{res_selected.bic:.2f}", help="Bayesian Information Criterion")
+            st.metric("BIC", f"{stats_selected['bic']:.2f}", help="Bayesian Information Criterion")
     except:
         st.info("ℹ️ Some metrics are unavailable for this model configuration")
     
     with st.expander("📋 View Complete Model Summary"):
-        st.text(str(res_selected.summary()))
+        # The full statsmodels summary needs the pickled results, so only load them on request
+        if models_refit:
+            st.info(f"ℹ️ Models were re-estimated on {data_source_label}; the full statsmodels summary covers the pre-estimated models only")
+        elif not os.path.exists(MODEL_FILE):
+            st.info("ℹ️ Full summary requires the pickled model file")
+        elif st.checkbox("Load full statsmodels summary", key=f"summary_{selected_model}"):
+            if model_header.get("incremental_rows"):
+                st.info(f"ℹ️ Estimates above include {model_header['incremental_rows']} incrementally added "
+                        f"observation(s); the statsmodels summary describes the last full fit")
+            with profiler.stage("summary"):
+                st.text(model_summary(MODEL_FILE, selected_model))
+    
+    st.markdown("#### ⚡ Dynamic Multipliers")
+    st.markdown("*Log-point response to a unit change in each regressor (1 log point for logged series, 1 point for rates) • precomputed from the lag polynomials*")
+    mult_kind = st.radio("Shock", ["Permanent (cumulative)", "One-off (impulse)"], horizontal=True, key="multiplier_kind")
+    t_pos = engine.targets.index(selected_model)
+    mult = engine.cumulative_multipliers() if mult_kind.startswith("Permanent") else engine.impulse_responses()
+    mult_table = pd.DataFrame(
+        mult[:, t_pos, :].T,
+        index=[VAR_LABELS.get(v, v.replace("_", " ").title()) for v in engine.exog_names],
+        columns=[f"Year {h}" for h in range(1, mult.shape[0] + 1)]
+    )
+    mult_table["Long run"] = engine.long_run_multipliers()[t_pos]
+    mult_table = mult_table[(mult_table.drop(columns="Long run") != 0).any(axis=1)]
+    with profiler.stage("table:multipliers"):
+        st.dataframe(mult_table.style.format("{:+.4f}", na_rep="n/a"), use_container_width=True)
+    
+    whatif_vars = [v for v in scenarios if scenario_type(v) != "fixed" and v in engine.exog_names]
+    if whatif_vars:
+        wi_col1, wi_col2 = st.columns(2)
+        with wi_col1:
+            whatif_var = st.selectbox(
+                "What-if assumption", whatif_vars,
+                format_func=lambda v: VAR_LABELS.get(v, v.replace("_", " ").title()),
+                key="whatif_var"
+            )
+        with wi_col2:
+            whatif_delta = st.number_input("Change vs. sidebar value", value=0.01, step=0.005, format="%.3f", key="whatif_delta")
+        # Linear in logs: the multiplier lookup scales the cached forecast, no reforecast needed
+        if rollup_mode:
+            shifted = dict(scenarios)
+            shifted[whatif_var] = dict(scenarios[whatif_var], value=scenarios[whatif_var]["value"] + whatif_delta)
+            whatif_fore = rollup_forecast(shifted)
+        else:
+            delta_log = marginal_response(engine, df_hist.iloc[-1], scenarios, whatif_var, whatif_delta, years_to_forecast)
+            whatif_fore = df_fore * np.exp(delta_log)
+        whatif_df = pd.DataFrame({
+            "Fiscal Year": future_years,
+            f"{selected_model.replace('_', ' ').title()} (₨B)": whatif_fore[selected_model].to_numpy() / 1000,
+            "Change (%)": (whatif_fore[selected_model] / df_fore[selected_model] - 1).to_numpy() * 100,
+            "Total Revenue Change (₨B)": (whatif_fore.sum(axis=1) - df_fore.sum(axis=1)).to_numpy() / 1000,
+        })
+        with profiler.stage("table:whatif"):
+            st.dataframe(
+                whatif_df.style.format({
+                    whatif_df.columns[1]: "{:,.2f}", "Change (%)": "{:+.2f}", "Total Revenue Change (₨B)": "{:+,.2f}"
+                }),
+                use_container_width=True, hide_index=True
+            )
+    
+    st.markdown("#### 🎯 Out-of-Sample Backtest")
+    st.markdown("*Models re-estimated at every origin year and forecast with realised regressors • levels in PKR billion*")
+    bt_col1, bt_col2 = st.columns(2)
+    with bt_col1:
+        bt_scheme = st.radio("Re-estimation window", ["Expanding", "Rolling"], horizontal=True, key="backtest_scheme")
+    with bt_col2:
+        bt_horizon = st.slider("Backtest horizon (years)", 1, 5, 3, key="backtest_horizon")
+    bt_window = DEFAULT_MIN_TRAIN if bt_scheme == "Rolling" else None
+    bt_specs = {t: model_spec(t, model_header["models"]) for t in targets}
+    try:
+        with profiler.stage("backtest"):
+            bt_errors = backtest_errors(dataset_hash, model_hash, df_hist, bt_specs,
+                                        tuple(engine.exog_names), bt_horizon, bt_window)
+    except ValueError as e:
+        bt_errors = None
+        st.info(f"ℹ️ Backtest unavailable for {data_source_label}: {e}")
+    
+    if bt_errors is not None:
+        bt_metrics = backtest_metrics(bt_errors)
+        bt_metrics = bt_metrics[bt_metrics["target"] == selected_model].drop(columns="target")
+        bt_metrics[["MAE", "RMSE"]] /= 1000
+        with profiler.stage("table:backtest"):
+            st.dataframe(
+                bt_metrics.rename(columns={
+                    "horizon": "Horizon (years)", "MAE": "MAE (₨B)", "RMSE": "RMSE (₨B)",
+                    "MAPE": "MAPE (%)", "origins": "Origins"
+                }).style.format({"MAE (₨B)": "{:,.2f}", "RMSE (₨B)": "{:,.2f}", "MAPE (%)": "{:.2f}"}),
+                use_container_width=True, hide_index=True
+            )
+        
+        one_step = bt_errors[(bt_errors["target"] == selected_model) & (bt_errors["horizon"] == 1)]
+        with profiler.stage("chart:backtest_fit"):
+            fig_bt = charts.backtest_fit(chart_cache, one_step["period"], one_step["actual"] / 1000,
+                                         one_step["forecast"] / 1000)
+            st.plotly_chart(fig_bt, use_container_width=True, config={'displayModeBar': False})
     
     st.markdown('</div>', unsafe_allow_html=True)
 
-with tab5:
+def render_exports():
+    """Data & Exports: data tables and downloads, built only when requested"""
     st.markdown("""
     <div class="content-section">
         <div class="section-header">
@@ -2249,26 +2360,36 @@ with tab5:
         </div>
     """, unsafe_allow_html=True)
     
+    export_cache = get_export_cache()
+    
+    def download(label, kind, file_name, content):
+        # Download buttons get a callable: the file is built when clicked, then cached by content hash
+        def build():
+            with profiler.stage(f"export:{kind}"):
+                return cached_export(export_cache, kind, content() if callable(content) else content)
+        
+        st.download_button(
+            label=label,
+            data=build,
+            file_name=file_name,
+            mime=MIME_TYPES[kind],
+            use_container_width=True
+        )
+    
     col1, col2 = st.columns(2)
     
     with col1:
         st.markdown(f"#### 📂 Historical Data")
         st.markdown(f"*Source: {data_source_label} • Log-transformed values*")
         
-        try:
-            styled_hist = df_hist.style.format({col: "{:.4f}" for col in df_hist.select_dtypes(include=[np.number]).columns})
-            st.dataframe(styled_hist, use_container_width=True, height=400)
-        except:
-            st.dataframe(df_hist, use_container_width=True, height=400)
+        with profiler.stage("table:history"):
+            try:
+                styled_hist = df_hist.style.format({col: "{:.4f}" for col in df_hist.select_dtypes(include=[np.number]).columns})
+                st.dataframe(styled_hist, use_container_width=True, height=400)
+            except:
+                st.dataframe(df_hist, use_container_width=True, height=400)
         
-        csv_hist = df_hist.to_csv()
-        st.download_button(
-            label="📥 Download Historical Data (CSV)",
-            data=csv_hist,
-            file_name=f"historical_revenue_{last_year}.csv",
-            mime="text/csv",
-            use_container_width=True
-        )
+        download("📥 Download Historical Data (CSV)", "csv", f"historical_revenue_{last_year}.csv", df_hist)
     
     with col2:
         st.markdown("#### 🔮 Forecast Data")
@@ -2276,20 +2397,14 @@ with tab5:
         
         df_fore_billions = df_fore / 1000
         
-        try:
-            styled_fore = df_fore_billions.style.format({col: "{:.2f}" for col in df_fore_billions.select_dtypes(include=[np.number]).columns})
-            st.dataframe(styled_fore, use_container_width=True, height=400)
-        except:
-            st.dataframe(df_fore_billions, use_container_width=True, height=400)
+        with profiler.stage("table:forecast"):
+            try:
+                styled_fore = df_fore_billions.style.format({col: "{:.2f}" for col in df_fore_billions.select_dtypes(include=[np.number]).columns})
+                st.dataframe(styled_fore, use_container_width=True, height=400)
+            except:
+                st.dataframe(df_fore_billions, use_container_width=True, height=400)
         
-        csv_fore = df_fore_billions.to_csv()
-        st.download_button(
-            label="📥 Download Forecast Data (CSV)",
-            data=csv_fore,
-            file_name=f"forecast_revenue_{future_years[-1]}.csv",
-            mime="text/csv",
-            use_container_width=True
-        )
+        download("📥 Download Forecast Data (CSV)", "csv", f"forecast_revenue_{future_years[-1]}.csv", df_fore_billions)
     
     st.markdown("---")
     st.markdown("#### ⚙️ Active Scenario Parameters")
@@ -2301,17 +2416,78 @@ with tab5:
     
     st.dataframe(scenario_df, use_container_width=True, hide_index=True)
     
-    csv_scenario = scenario_df.to_csv(index=False)
-    st.download_button(
-        label="📥 Download Scenario Configuration (CSV)",
-        data=csv_scenario,
-        file_name=f"scenario_config_{future_years[-1]}.csv",
-        mime="text/csv",
-        use_container_width=True
-    )
+    download("📥 Download Scenario Configuration (CSV)", "csv", f"scenario_config_{future_years[-1]}.csv",
+             scenario_df.set_index("Parameter"))
+    
+    st.markdown("---")
+    st.markdown("#### 📦 Bulk Export")
+    st.markdown("*History, forecasts, prediction intervals, ±1pp assumption sweep and model metadata*")
+    
+    def scenario_forecasts():
+        sweep_vars = [v for v in scenarios if scenario_type(v) != "fixed" and v in engine.exog_names]
+        names, grid = sensitivity_grid(scenarios, sweep_vars)
+        if rollup_mode:
+            preds = np.stack([
+                rollup_forecast({v: dict(spec, value=grid[v][row]) if v in grid else spec
+                                 for v, spec in scenarios.items()}).to_numpy().T
+                for row in range(len(names))
+            ])
+            return to_long_frame(preds / 1000, engine.targets, future_index, names)
+        exog = build_exog_paths(df_hist.iloc[-1], scenarios, engine.exog_names, years_to_forecast, grid=grid)
+        # Lognormal means, consistent with the forecast shown in the dashboard
+        preds = mean_forecast(engine, exog).transpose(0, 2, 1)
+        return to_long_frame(preds / 1000, engine.targets, future_index, names)
+    
+    def tables():
+        return bundle_tables(df_hist, df_fore, forecast_bands, scenarios, model_header, scenario_forecasts())
+    
+    def bundle():
+        return bundle_files(tables(), {
+            "data_source": data_source_label,
+            "dataset_hash": dataset_hash,
+            "model_hash": model_hash,
+            "models_refit": models_refit,
+            "horizon": years_to_forecast,
+            "units": "history in logs; forecasts and intervals in PKR billion",
+        })
+    
+    bulk_col1, bulk_col2, bulk_col3 = st.columns(3)
+    with bulk_col1:
+        download("📊 Excel Workbook (all sheets)", "xlsx", f"revenue_forecast_{future_years[-1]}.xlsx", tables)
+    with bulk_col2:
+        download("🗜️ Zip Bundle (CSV + metadata)", "zip", f"revenue_forecast_{future_years[-1]}.zip", bundle)
+    with bulk_col3:
+        download("🧱 Scenario Forecasts (Parquet)", "parquet", f"scenario_forecasts_{future_years[-1]}.parquet",
+                 scenario_forecasts)
+    
+    if panel_engine is not None:
+        def entity_forecasts():
+            entity_exog = panel_exog_paths(panel_engine, scenarios, years_to_forecast)
+            return panel_forecast_frame(panel_engine, panel_engine.mean_forecast(entity_exog) / 1000, future_index)
+        
+        download(f"🗺️ Entity Forecasts, {len(panel_engine.entities)} entities + roll-up (CSV)", "csv",
+                 f"entity_forecasts_{future_years[-1]}.csv", entity_forecasts)
     
     st.markdown('</div>', unsafe_allow_html=True)
 
+# Only the selected view runs; st.tabs would execute every tab body on each rerun
+VIEWS = {
+    "📊 Executive Overview": render_overview,
+    "📈 Trend Analysis": render_trends,
+    "🎯 Category Performance": render_categories,
+    "⚙️ Model Diagnostics": render_diagnostics,
+    "💾 Data & Exports": render_exports,
+}
+# Widgets of a view that is not rendered lose their state; re-assigning keeps the user's settings
+VIEW_STATE_KEYS = ("history_window", "confidence_monte_carlo", "diagnostics_model", "multiplier_kind", "whatif_var", "whatif_delta",
+                   "backtest_scheme", "backtest_horizon")
+for key in VIEW_STATE_KEYS:
+    if key in st.session_state:
+        st.session_state[key] = st.session_state[key]
+active_view = st.radio("View", list(VIEWS), horizontal=True, key="active_view", label_visibility="collapsed")
+with profiler.stage(f"view:{active_view.split(' ', 1)[1]}"):
+    VIEWS[active_view]()
+
 # ═══════════════════════════════════════════════════════════════════════════
 # EXECUTIVE INSIGHTS PANEL
 # ═══════════════════════════════════════════════════════════════════════════
@@ -2330,4 +2506,34 @@ st.markdown(f"""
         embedded in the ARDL econometric model.
     </div>
 </div>
-""", unsafe_allow_html=True)
\ No newline at end of file
+""", unsafe_allow_html=True)
+# ═══════════════════════════════════════════════════════════════════════════
+# PERFORMANCE DEBUG PANEL
+# ═══════════════════════════════════════════════════════════════════════════
+stage_times = profiler.end_run()
+if debug_mode:
+    with st.sidebar.expander("⏱️ Performance", expanded=True):
+        st.caption(f"This rerun: {stage_times['rerun'] * 1000:,.0f} ms • stages overlap where nested")
+        run_table = pd.Series(stage_times, name="ms").mul(1000).sort_values(ascending=False).to_frame()
+        st.dataframe(run_table.style.format("{:,.1f}"), use_container_width=True)
+        
+        st.caption("Rolling window per stage (ms)")
+        rolling = pd.DataFrame.from_dict(profiler.summary(), orient="index")
+        rolling = rolling[[c for c in ("count", "p50_ms", "p95_ms", "p99_ms", "max_ms") if c in rolling]]
+        st.dataframe(rolling.style.format("{:,.1f}", subset=[c for c in rolling if c != "count"]),
+                     use_container_width=True)
+        
+        if STARTUP_MARKS:
+            st.caption("Cold start (s since process start): " +
+                       ", ".join(f"{k} {v:.2f}" for k, v in STARTUP_MARKS.items()))
+        
+        dbg_col1, dbg_col2 = st.columns(2)
+        with dbg_col1:
+            st.download_button("JSON", data=lambda: profiler.to_json(STARTUP_MARKS), file_name="ardl_timings.json",
+                               mime="application/json", use_container_width=True)
+        with dbg_col2:
+            st.download_button("Prometheus", data=lambda: profiler.to_prometheus(STARTUP_MARKS),
+                               file_name="ardl_timings.prom", mime="text/plain", use_container_width=True)
+        if st.button("Reset timings", use_container_width=True):
+            profiler.reset()
+            st.rerun()
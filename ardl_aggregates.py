@@ -0,0 +1,48 @@
+"""Derived historical series shared by every dashboard view.
+
+The history is stored in logs (PKR million). Level-space revenue, the
+total, year-over-year growth and category shares are computed once per
+dataset into a single frame with two column levels, ``(measure, series)``:
+
+    level   revenue in PKR billion, per category and "total"
+    growth  year-over-year change in percent
+    share   category share of total revenue in percent
+
+Growth compares each period with the same period a year earlier, so
+monthly and quarterly histories get true year-over-year rates.
+"""
+import numpy as np
+import pandas as pd
+
+PERIODS_PER_YEAR = {"Y": 1, "A": 1, "Q": 4, "M": 12, "W": 52, "D": 365}
+
+
+def periods_per_year(index):
+    """Observations per year implied by the index frequency (1 when unknown)"""
+    freq = getattr(index, "freqstr", None)
+    if freq is None and isinstance(index, pd.DatetimeIndex) and len(index) > 2:
+        freq = pd.infer_freq(index)
+    if not freq:
+        return 1
+    return PERIODS_PER_YEAR.get(freq.lstrip("0123456789")[:1].upper(), 1)
+
+
+def historical_aggregates(df_hist, targets):
+    """Level, growth and share frame of the history (see module docstring)"""
+    levels = np.exp(df_hist[list(targets)]) / 1000
+    levels["total"] = levels.sum(axis=1)
+    growth = levels.pct_change(periods=periods_per_year(df_hist.index)) * 100
+    shares = levels[list(targets)].div(levels["total"], axis=0) * 100
+    return pd.concat({"level": levels, "growth": growth, "share": shares}, axis=1)
+
+
+def cagr(start, end, years):
+    """Compound annual growth rate in percent"""
+    return ((end / start) ** (1 / years) - 1) * 100
+
+
+def history_cagr(aggregates):
+    """CAGR of every series over the whole history, in percent"""
+    levels = aggregates["level"]
+    years = (len(levels) - 1) / periods_per_year(levels.index)
+    return cagr(levels.iloc[0], levels.iloc[-1], years) if years > 0 else levels.iloc[0] * np.nan
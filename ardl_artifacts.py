@@ -0,0 +1,146 @@
+"""Compact, pickle-free model artifact for the dashboard.
+
+The artifact is a single uncompressed ``.npz`` holding the compiled engine
+arrays, the training matrix, each model's sufficient statistics (X'X, X'y,
+y'y, n; used for incremental updates) and a JSON header (targets,
+regressors, params, fit statistics). It loads with ``allow_pickle=False``
+and without importing statsmodels; the statsmodels pickle is only needed
+for full ``summary()`` output.
+
+Regenerate it from the pickle with::
+
+    python ardl_artifacts.py --models ardl_tax_models.pkl --meta ardl_tax_models_meta.json
+"""
+import argparse
+import json
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from ardl_engine import ForecastEngine, compile_results, results_training_frame
+from ardl_fit import design_matrix, model_spec, reported_nobs, sufficient_statistics
+
+ARTIFACT_VERSION = 1
+ENGINE_ARRAYS = ("const", "ar", "beta", "y_hist", "x_hist")
+
+
+def model_header(res, selected_order=None):
+    """JSON-safe fit statistics of one statsmodels ARDL result"""
+    if selected_order is None:
+        selected_order = str(getattr(res.model, "_order", None))
+    nobs = int(res.nobs)
+    n_params = len(res.params)
+    rsquared = float(res.rsquared)
+    return {
+        "selected_order": selected_order,
+        "params": {k: float(v) for k, v in res.params.items()},
+        "nobs": nobs,
+        "sigma2": float(res.sigma2),
+        "llf": float(res.llf),
+        "aic": float(res.aic),
+        "bic": float(res.bic),
+        "rsquared": rsquared,
+        "rsquared_adj": 1.0 - (1.0 - rsquared) * (nobs - 1) / (nobs - n_params),
+    }
+
+
+def training_statistics(training, models):
+    """Sufficient statistics of every model's design on the training frame.
+
+    Their ``nobs`` is the number of rows actually fitted, which is below the
+    reported ``nobs`` when a regressor lag is longer than the own lags.
+    """
+    suff = {}
+    for t, model in models.items():
+        ar_lags, exog_order = model_spec(t, models)
+        X, y, _ = design_matrix(training, t, ar_lags, exog_order)
+        nobs = reported_nobs(len(y), ar_lags, exog_order)
+        if nobs != model["nobs"]:
+            raise ValueError(f"Training sample of {t} does not match its fit "
+                             f"({nobs} vs {model['nobs']} observations)")
+        suff[t] = sufficient_statistics(X, y)
+    return suff
+
+
+def artifact_from_results(results_dict, exog_names, meta=None):
+    """Engine, header and training frame extracted from statsmodels results"""
+    meta = meta or {}
+    engine = compile_results(results_dict, exog_names)
+    training = results_training_frame(results_dict)
+    header = {
+        "version": ARTIFACT_VERSION,
+        "targets": engine.targets,
+        "exog_names": engine.exog_names,
+        "models": {
+            t: model_header(res, meta.get(t, {}).get("selected_order"))
+            for t, res in results_dict.items()
+        },
+    }
+    header["sufficient"] = training_statistics(training, header["models"])
+    return engine, header, training
+
+
+def save_artifact(path, engine, header, training):
+    """Write the engine arrays, training matrix and header to ``path``"""
+    header = dict(header)
+    sufficient = header.pop("sufficient", None) or {}
+    header["sufficient"] = {t: {"yty": s["yty"], "nobs": s["nobs"]} for t, s in sufficient.items()}
+    header["training_columns"] = [str(c) for c in training.columns]
+    header["training_index"] = [str(i) for i in training.index]
+    header["training_freq"] = getattr(training.index, "freqstr", None)
+    arrays = {name: getattr(engine, name) for name in ENGINE_ARRAYS}
+    if engine.resid is not None:
+        arrays["resid"] = engine.resid
+    if engine.sigma2 is not None:
+        arrays["sigma2"] = engine.sigma2
+    arrays["training"] = training.to_numpy(dtype=np.float64)
+    for t, s in sufficient.items():
+        arrays[f"xtx_{t}"] = s["xtx"]
+        arrays[f"xty_{t}"] = s["xty"]
+    with open(path, "wb") as f:
+        np.savez(f, header=np.array(json.dumps(header)), **arrays)
+
+
+def load_artifact(path):
+    """Load (engine, header, training) from an artifact written by save_artifact"""
+    with np.load(path, allow_pickle=False) as npz:
+        header = json.loads(str(npz["header"]))
+        if header.get("version") != ARTIFACT_VERSION:
+            raise ValueError(f"Unsupported artifact version {header.get('version')} in {path}")
+        arrays = {name: npz[name] for name in ENGINE_ARRAYS}
+        resid = npz["resid"] if "resid" in npz.files else None
+        sigma2 = npz["sigma2"] if "sigma2" in npz.files else None
+        training = npz["training"]
+        header["sufficient"] = {
+            t: dict(s, xtx=npz[f"xtx_{t}"], xty=npz[f"xty_{t}"])
+            for t, s in header.get("sufficient", {}).items()
+        }
+    engine = ForecastEngine(header["targets"], header["exog_names"], resid=resid, sigma2=sigma2, **arrays)
+    # Multiplier tables are built once here so what-if lookups never recompute them
+    engine.impulse_responses()
+    index = header["training_index"]
+    if header.get("training_freq"):
+        index = pd.PeriodIndex(index, freq=header["training_freq"])
+    training = pd.DataFrame(training, index=index, columns=header["training_columns"])
+    return engine, header, training
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert pickled ARDL results into a fast .npz artifact")
+    parser.add_argument("--models", default="ardl_tax_models.pkl")
+    parser.add_argument("--meta", default="ardl_tax_models_meta.json")
+    parser.add_argument("--out", default="ardl_tax_models.npz")
+    args = parser.parse_args()
+
+    with open(args.models, "rb") as f:
+        results_dict = pickle.load(f)["results"]
+    with open(args.meta, "r") as f:
+        meta = json.load(f)
+    engine, header, training = artifact_from_results(results_dict, meta["x_vars_used"], meta)
+    save_artifact(args.out, engine, header, training)
+    print(f"Wrote {args.out} ({len(engine.targets)} models)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""Rolling-origin backtests of the ARDL models.
+
+For every forecast origin each model is re-estimated on the data up to
+that year (an expanding window, or a rolling window of fixed length) and
+forecast h steps ahead with the realised regressor values, so the errors
+measure the models' own dynamics rather than the scenario assumptions.
+
+Each target's design matrix is built once for the whole sample. Window
+Gram matrices X'X / X'y are differences of cumulative sums over its rows,
+and all origins are solved together as one batched system. Origins are
+forecast in parallel chunks with joblib, and finished backtests are cached
+on disk in ``.ardl_cache/``::
+
+    python ardl_backtest.py --horizon 3 --window 20
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from ardl_engine import compile_params
+from ardl_fit import batched_solver, design_matrix, max_lag, model_spec
+from ardl_ingest import load_dataset_file
+
+CACHE_DIR = ".ardl_cache"
+DEFAULT_MIN_TRAIN = 20
+
+
+def window_statistics(X, y, starts, stops):
+    """X'X and X'y of design rows ``starts[o]:stops[o]`` for every origin o"""
+    k = X.shape[1]
+    cum_xtx = np.concatenate([np.zeros((1, k, k)), np.cumsum(X[:, :, None] * X[:, None, :], axis=0)])
+    cum_xty = np.concatenate([np.zeros((1, k)), np.cumsum(X * y[:, None], axis=0)])
+    return cum_xtx[stops] - cum_xtx[starts], cum_xty[stops] - cum_xty[starts]
+
+
+def solve_windows(X, y, starts, stops, refine=2):
+    """Least-squares coefficients (O, k) of every window in one batched solve.
+
+    The normal equations go through ``batched_solver``, so a regressor that
+    is constant within a window gets a zero coefficient instead of failing;
+    iterative refinement on the windows' residuals restores least-squares
+    accuracy.
+    """
+    xtx, xty = window_statistics(X, y, starts, stops)
+    solve = batched_solver(xtx)
+    beta = solve(xty)
+    rows = np.arange(len(y))
+    mask = (rows >= starts[:, None]) & (rows < stops[:, None])
+    for _ in range(refine):
+        resid = (y - beta @ X.T) * mask
+        beta = beta + solve(resid @ X)
+    return beta
+
+
+def backtest_origins(df, specs, min_train=DEFAULT_MIN_TRAIN):
+    """Row positions of ``df`` usable as forecast origins.
+
+    Every target needs ``min_train`` design rows (and more rows than
+    coefficients) up to the origin, and at least one later year to score.
+    """
+    first = 0
+    for t, (ar_lags, exog_order) in specs.items():
+        n_params = 1 + len(ar_lags) + sum(len(lags) for lags in exog_order.values())
+        first = max(first, max_lag(ar_lags, exog_order) + max(min_train, n_params + 1) - 1)
+    return np.arange(first, len(df) - 1)
+
+
+def _forecast_chunk(df, params, origins, exog_names, horizon):
+    """Level forecasts (len(origins), horizon, T) from each origin's estimates"""
+    exog = df[exog_names].to_numpy(dtype=np.float64)
+    n_targets = len(params)
+    out = np.full((len(origins), horizon, n_targets), np.nan)
+    for i, origin in enumerate(origins):
+        steps = min(horizon, len(df) - 1 - origin)
+        engine = compile_params({t: p[i] for t, p in params.items()}, df.iloc[:origin + 1], exog_names)
+        out[i, :steps] = engine.forecast_levels(exog[origin + 1:origin + 1 + steps])
+    return out
+
+
+def run_backtest(df, specs, exog_names, horizon=3, window=None, min_train=DEFAULT_MIN_TRAIN, n_jobs=1):
+    """h-step-ahead forecast errors over every origin.
+
+    ``specs`` maps each target to (ar_lags, exog_order); ``window`` is the
+    rolling window length in design rows, or None for an expanding window.
+    Returns a long frame with one row per target, origin and horizon.
+    """
+    origins = backtest_origins(df, specs, min_train)
+    if len(origins) == 0:
+        raise ValueError(f"Not enough observations for a backtest (need more than {min_train} per model)")
+    params = {}
+    for t, (ar_lags, exog_order) in specs.items():
+        X, y, names = design_matrix(df, t, ar_lags, exog_order)
+        hold_back = max_lag(ar_lags, exog_order)
+        stops = origins - hold_back + 1
+        starts = np.zeros_like(stops) if window is None else np.maximum(stops - window, 0)
+        beta = solve_windows(X, y, starts, stops)
+        params[t] = [dict(zip(names, row)) for row in beta.tolist()]
+
+    n_chunks = 1 if n_jobs == 1 else min(len(origins), os.cpu_count() if n_jobs in (None, -1) else n_jobs)
+    chunks = np.array_split(np.arange(len(origins)), n_chunks)
+    if n_chunks == 1:
+        forecasts = _forecast_chunk(df, params, origins, exog_names, horizon)
+    else:
+        from joblib import Parallel, delayed
+
+        parts = Parallel(n_jobs=n_jobs)(
+            delayed(_forecast_chunk)(
+                df, {t: [p[i] for i in idx] for t, p in params.items()}, origins[idx], exog_names, horizon
+            )
+            for idx in chunks
+        )
+        forecasts = np.concatenate(parts)
+
+    targets = list(specs)
+    actual = np.exp(df[targets].to_numpy(dtype=np.float64))
+    steps = np.arange(1, horizon + 1)
+    target_pos = origins[:, None] + steps[None, :]
+    valid = target_pos < len(df)
+    target_pos = np.where(valid, target_pos, 0)
+    frames = []
+    for j, t in enumerate(targets):
+        frames.append(pd.DataFrame({
+            "target": t,
+            "origin": np.repeat(np.asarray(df.index[origins].astype(str)), horizon),
+            "horizon": np.tile(steps, len(origins)),
+            "period": np.asarray(df.index[target_pos.ravel()].astype(str)),
+            "forecast": forecasts[:, :, j].ravel(),
+            "actual": actual[target_pos, j].ravel(),
+        })[valid.ravel()])
+    errors = pd.concat(frames, ignore_index=True)
+    errors["error"] = errors["forecast"] - errors["actual"]
+    return errors
+
+
+def backtest_metrics(errors):
+    """MAE, RMSE and MAPE (%) of level forecasts by target and horizon"""
+    abs_err = errors["error"].abs()
+    frame = errors.assign(
+        abs_error=abs_err,
+        sq_error=errors["error"] ** 2,
+        pct_error=100.0 * abs_err / errors["actual"].abs(),
+    )
+    grouped = frame.groupby(["target", "horizon"], sort=False)
+    metrics = pd.DataFrame({
+        "MAE": grouped["abs_error"].mean(),
+        "RMSE": np.sqrt(grouped["sq_error"].mean()),
+        "MAPE": grouped["pct_error"].mean(),
+        "origins": grouped.size(),
+    })
+    return metrics.reset_index()
+
+
+def cached_backtest(df, specs, exog_names, horizon=3, window=None, min_train=DEFAULT_MIN_TRAIN,
+                    n_jobs=1, cache_dir=CACHE_DIR):
+    """``run_backtest`` memoized on disk by its inputs (data, specs, settings)"""
+    from joblib import Memory
+
+    memory = Memory(cache_dir, verbose=0)
+    return memory.cache(run_backtest, ignore=["n_jobs"])(
+        df, specs, list(exog_names), horizon, window, min_train, n_jobs
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rolling-origin backtest of the ARDL models")
+    parser.add_argument("--data", default="ardl_prepared_data.csv")
+    parser.add_argument("--meta", default="ardl_tax_models_meta.json")
+    parser.add_argument("--horizon", type=int, default=3)
+    parser.add_argument("--window", type=int, default=None, help="rolling window length (default: expanding)")
+    parser.add_argument("--min-train", type=int, default=DEFAULT_MIN_TRAIN)
+    parser.add_argument("--jobs", type=int, default=1)
+    parser.add_argument("--out", default=None, help="write the per-origin errors to this CSV")
+    args = parser.parse_args()
+
+    with open(args.meta, "r") as f:
+        meta = json.load(f)
+    df = load_dataset_file(args.data)
+    targets = [t for t in ("income_tax", "gst", "fed") if t in meta]
+    specs = {t: model_spec(t, meta) for t in targets}
+    errors = cached_backtest(df, specs, meta["x_vars_used"], args.horizon, args.window, args.min_train, args.jobs)
+    print(backtest_metrics(errors).to_string(index=False, float_format=lambda v: f"{v:,.3f}"))
+    if args.out:
+        errors.to_csv(args.out, index=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""Headless batch forecast runner.
+
+Forecasts many scenarios without Streamlit: loads the model artifact and a
+dataset, evaluates every scenario in a scenarios file and writes the
+lognormal mean forecasts, as shown in the dashboard, to CSV or Parquet. Scenarios that share the same spec
+types are evaluated as vectorized grids, split into chunks that are spread
+across worker processes.
+
+    python ardl_batch.py --scenarios scenarios.json --out forecasts.parquet --horizon 10
+
+A scenarios file is either a JSON list of objects or a CSV with one row per
+scenario. Each scenario may set an optional ``name`` and any assumption
+variable, as a plain value (spec type as in the sidebar), a per-year list,
+or a full ``{"type": ..., "value": ...}`` spec; unset variables keep the
+dashboard defaults.
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from ardl_artifacts import load_artifact
+from ardl_exports import write_csv, write_parquet
+from ardl_ingest import load_dataset_file
+from ardl_scenarios import default_scenarios, evaluate_grid, future_period_index
+
+_worker_state = {}
+
+
+def read_scenarios(path):
+    """List of raw scenario dicts from a JSON or CSV file"""
+    if path.lower().endswith(".json"):
+        with open(path, "r") as f:
+            items = json.load(f)
+        if isinstance(items, dict):
+            items = [items]
+        return items
+    frame = pd.read_csv(path)
+    return [{k: v for k, v in row.items() if not pd.isna(v)} for row in frame.to_dict(orient="records")]
+
+
+def _stack_values(values, horizon):
+    """(S,) array of constants, or (S, H) when any scenario gives a per-year path"""
+    arrays = [np.asarray(v, dtype=np.float64) for v in values]
+    if all(a.ndim == 0 for a in arrays):
+        return np.array(arrays)
+    return np.stack([np.broadcast_to(a, (horizon,)) for a in arrays])
+
+
+def group_scenarios(items, columns, horizon):
+    """Group scenarios by spec types so each group evaluates as one grid.
+
+    Returns ``[(base_scenarios, grid, positions)]`` where ``grid`` maps each
+    variable to an (S,) or (S, H) value array and ``positions`` are the
+    indices of the group's scenarios in the input list.
+    """
+    groups = {}
+    for pos, item in enumerate(items):
+        values = {k: v for k, v in item.items() if k != "name"}
+        specs = default_scenarios(columns, values)
+        signature = tuple(sorted((v, spec["type"]) for v, spec in specs.items()))
+        group = groups.setdefault(signature, {"base": specs, "values": {v: [] for v in specs}, "positions": []})
+        for v, spec in specs.items():
+            group["values"][v].append(spec["value"])
+        group["positions"].append(pos)
+    return [
+        (g["base"], {v: _stack_values(vals, horizon) for v, vals in g["values"].items()}, g["positions"])
+        for g in groups.values()
+    ]
+
+
+def load_inputs(artifact_path, data_path):
+    engine, _, _ = load_artifact(artifact_path)
+    return engine, load_dataset_file(data_path)
+
+
+def _init_worker(artifact_path, data_path):
+    _worker_state["inputs"] = load_inputs(artifact_path, data_path)
+
+
+def _evaluate_chunk(base, grid, horizon):
+    engine, df_hist = _worker_state["inputs"]
+    return evaluate_grid(engine, df_hist.iloc[-1], base, horizon, grid=grid)
+
+
+def _chunks(base, grid, positions, chunk_size):
+    for start in range(0, len(positions), chunk_size):
+        stop = start + chunk_size
+        yield base, {v: vals[start:stop] for v, vals in grid.items()}, positions[start:stop]
+
+
+def run_batch(artifact_path, data_path, items, horizon, workers=None, chunk_size=2000):
+    """Forecast every scenario; returns a (scenario, target, year) level array"""
+    engine, df_hist = load_inputs(artifact_path, data_path)
+    out = np.empty((len(items), len(engine.targets), horizon), dtype=np.float64)
+    chunks = [
+        chunk for base, grid, positions in group_scenarios(items, df_hist.columns, horizon)
+        for chunk in _chunks(base, grid, positions, chunk_size)
+    ]
+    if workers == 1 or len(chunks) == 1:
+        _worker_state["inputs"] = (engine, df_hist)
+        results = [_evaluate_chunk(base, grid, horizon) for base, grid, _ in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(artifact_path, data_path)) as pool:
+            futures = [pool.submit(_evaluate_chunk, base, grid, horizon) for base, grid, _ in chunks]
+            results = [f.result() for f in futures]
+    for (_, _, positions), preds in zip(chunks, results):
+        out[positions] = preds
+    return out, engine.targets, future_period_index(df_hist, horizon)
+
+
+def to_long_frame(forecasts, targets, future_index, names):
+    """Tidy frame with one row per scenario and year, one column per target plus total"""
+    n_scen, n_targets, horizon = forecasts.shape
+    values = forecasts.transpose(0, 2, 1).reshape(n_scen * horizon, n_targets)
+    frame = pd.DataFrame(values, columns=targets)
+    frame.insert(0, "year", np.tile(np.asarray(future_index.year), n_scen))
+    frame.insert(0, "scenario", np.repeat(np.asarray(names, dtype=object), horizon))
+    frame["total"] = values.sum(axis=1)
+    return frame
+
+
+def write_output(frame, path):
+    """Write the forecasts in row chunks, so the file is never built as one string"""
+    if path.lower().endswith((".parquet", ".pq")):
+        write_parquet(frame, path, index=False)
+    else:
+        with open(path, "wb") as f:
+            write_csv(frame, f, index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run ARDL revenue forecasts for a file of scenarios")
+    parser.add_argument("--scenarios", required=True, help="JSON or CSV file of scenarios")
+    parser.add_argument("--out", required=True, help="output .csv or .parquet file")
+    parser.add_argument("--artifact", default="ardl_tax_models.npz")
+    parser.add_argument("--data", default="ardl_prepared_data.csv")
+    parser.add_argument("--horizon", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=2000)
+    args = parser.parse_args()
+
+    items = read_scenarios(args.scenarios)
+    names = [str(item.get("name", i)) for i, item in enumerate(items)]
+    start = time.perf_counter()
+    forecasts, targets, future_index = run_batch(
+        args.artifact, args.data, items, args.horizon, workers=args.workers, chunk_size=args.chunk_size
+    )
+    write_output(to_long_frame(forecasts, targets, future_index, names), args.out)
+    print(f"{len(items)} scenarios x {args.horizon} years -> {args.out} "
+          f"in {time.perf_counter() - start:.2f}s using {args.workers or os.cpu_count()} workers")
+
+
+if __name__ == "__main__":
+    main()
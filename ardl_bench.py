@@ -0,0 +1,337 @@
+"""Benchmark suite for the forecasting and rendering pipeline.
+
+Runs outside Streamlit and times:
+
+- artifact load
+- exogenous path construction
+- forecasts and intervals
+- refits
+- scenario-grid sweeps of 1, 100 and 10k scenarios
+- historical aggregates
+- chart figure JSON
+- panel fit and forecast
+
+The data is synthetic. It is scaled from the 33-row prepared CSV up to
+100k rows, plus a panel of 500 entities with 200 years each. Each
+benchmark reports the median and minimum of several timed repeats. Results
+are written as JSON together with the machine they ran on, so a run can be
+checked against a stored baseline::
+
+    python ardl_bench.py run --out bench.json
+    python ardl_bench.py run --save-baseline                # record bench_baseline.json
+    python ardl_bench.py compare bench.json                 # exit 1 on regression
+
+A benchmark regresses when its median is more than ``threshold`` (relative)
+slower than the baseline and the slowdown exceeds ``MIN_DELTA`` seconds,
+so microsecond-scale noise does not fail a run. By default the threshold is
+``DEFAULT_THRESHOLD``, raised for the benchmarks listed in ``THRESHOLDS``;
+``--threshold`` sets one threshold for every benchmark. A baseline benchmark
+missing from the current run also fails the comparison; benchmarks new in
+the current run are listed but do not.
+"""
+import argparse
+import json
+import os
+import platform
+import socket
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+import ardl_charts as charts
+from ardl_aggregates import historical_aggregates
+from ardl_artifacts import load_artifact
+from ardl_fit import refit_models
+from ardl_ingest import load_dataset_file
+from ardl_intervals import analytic_bands
+from ardl_panel import fit_panel, panel_exog_paths
+from ardl_scenarios import build_exog_paths, default_scenarios, evaluate_grid
+
+ARTIFACT_FILE = "ardl_tax_models.npz"
+META_FILE = "ardl_tax_models_meta.json"
+DATA_FILE = "ardl_prepared_data.csv"
+BASELINE_FILE = "bench_baseline.json"
+
+HORIZON = 10
+ROW_SIZES = (33, 1_000, 100_000)
+GRID_SIZES = (1, 100, 10_000)
+N_ENTITIES = 500
+PANEL_ROWS = 200
+DEFAULT_THRESHOLD = 0.25
+MIN_DELTA = 0.0005
+# Slower, allocation-heavy benchmarks get more room before they count as regressions
+THRESHOLDS = {"figure_json": 0.5, "panel_fit": 0.4}
+THRESHOLD_HELP = (f"relative slowdown that counts as a regression, for every benchmark "
+                  f"(default: {DEFAULT_THRESHOLD}, or {', '.join(f'{k} {v}' for k, v in THRESHOLDS.items())})")
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# SYNTHETIC DATA
+# ═══════════════════════════════════════════════════════════════════════════
+def synthetic_history(df, n_rows, seed=0):
+    """Numeric columns of ``df`` extended to ``n_rows`` by bootstrapping first differences.
+
+    Every numeric column continues as a random walk whose steps are drawn
+    from the column's own history, in blocks of whole rows so the
+    cross-correlation between series is kept. Up to 200 rows keep an annual
+    index. Longer histories get a daily index, like a high-frequency
+    collection feed, with the annual drift and volatility scaled down to a
+    day so log revenue stays in range.
+    """
+    df = df.select_dtypes("number")
+    if n_rows <= len(df):
+        return df.iloc[-n_rows:]
+    rng = np.random.default_rng(seed)
+    values = df.to_numpy(dtype=np.float64)
+    steps = np.diff(values, axis=0)
+    drift = steps.mean(axis=0)
+    per_year = 1 if n_rows <= 200 else 365
+    dummy = np.isin(values, (0.0, 1.0)).all(axis=0)
+    rows = rng.integers(0, len(steps), n_rows - len(df))
+    draws = drift / per_year + (steps[rows] - drift) / np.sqrt(per_year)
+    extra = values[-1] + np.cumsum(draws, axis=0)
+    extra[:, dummy] = values[-1, dummy]
+    frame = pd.DataFrame(np.vstack([values, extra]), columns=df.columns)
+    if n_rows <= 200:
+        first = df.index[0].year if hasattr(df.index[0], "year") else int(df.index[0])
+        frame.index = pd.period_range(str(first), periods=n_rows, freq="Y")
+    else:
+        frame.index = pd.date_range("1900-01-01", periods=n_rows, freq="D")
+    return frame
+
+
+def synthetic_panel(df, targets, n_entities, seed=0):
+    """``n_entities`` copies of ``df``, each with its own revenue scale and noise"""
+    rng = np.random.default_rng(seed)
+    frames = []
+    for e in range(n_entities):
+        frame = df.copy()
+        frame[targets] += np.log(rng.uniform(0.001, 0.05)) + rng.normal(0, 0.05, (len(frame), len(targets)))
+        frame.insert(0, "entity", f"E{e:04d}")
+        frames.append(frame)
+    return pd.concat(frames)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# TIMING
+# ═══════════════════════════════════════════════════════════════════════════
+def time_call(func, repeat=5, min_time=0.05):
+    """Median and minimum seconds per call of ``func``.
+
+    Calls are grouped so each timed repeat lasts at least ``min_time``; one
+    warm-up call runs first.
+    """
+    start = time.perf_counter()
+    func()
+    first = time.perf_counter() - start
+    number = max(1, int(min_time / max(first, 1e-9)))
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number)
+    return {"median_s": float(np.median(samples)), "min_s": float(min(samples)), "repeat": repeat, "number": number}
+
+
+def benchmarks(data_path=DATA_FILE, artifact_path=ARTIFACT_FILE, meta_path=META_FILE):
+    """``[(name, params, func)]`` of every benchmark; inputs are built up front"""
+    with open(meta_path, "r") as f:
+        meta = json.load(f)
+    engine, _, _ = load_artifact(artifact_path)
+    targets, exog_names = engine.targets, engine.exog_names
+    df = load_dataset_file(data_path)
+    last_row = df.iloc[-1]
+    scenarios = default_scenarios(df.columns)
+    exog = build_exog_paths(last_row, scenarios, exog_names, HORIZON)[0]
+
+    cases = [
+        ("artifact_load", {}, lambda: load_artifact(artifact_path)),
+        ("exog_paths", {"scenarios": 1}, lambda: build_exog_paths(last_row, scenarios, exog_names, HORIZON)),
+        ("forecast", {"targets": len(targets)}, lambda: engine.forecast(exog)),
+        ("intervals", {"targets": len(targets)}, lambda: analytic_bands(engine, exog)),
+        ("refit", {"rows": len(df)}, lambda: refit_models(df, meta, targets, exog_names)),
+    ]
+    for t_pos, t in enumerate(targets):
+        single = engine_for_target(engine, t_pos)
+        cases.append(("forecast_target", {"target": t}, lambda e=single: e.forecast(exog)))
+
+    rng = np.random.default_rng(0)
+    for n in GRID_SIZES:
+        grid = {"gdp_real": rng.uniform(0.0, 0.08, n), "inflation": rng.uniform(0.05, 0.25, n)}
+        cases.append(("exog_grid", {"scenarios": n},
+                      lambda g=grid: build_exog_paths(last_row, scenarios, exog_names, HORIZON, grid=g)))
+        cases.append(("grid_sweep", {"scenarios": n},
+                      lambda g=grid: evaluate_grid(engine, last_row, scenarios, HORIZON, grid=g)))
+
+    fore_levels = pd.Series(np.exp(engine.forecast(exog)).sum(axis=1) / 1000)
+    for n in ROW_SIZES:
+        hist = synthetic_history(df, n)
+        cases.append(("aggregates", {"rows": n}, lambda h=hist: historical_aggregates(h, targets)))
+        agg = historical_aggregates(hist, targets)
+        hist_x = hist.index.to_timestamp() if hasattr(hist.index, "to_timestamp") else hist.index
+        fore_x = pd.date_range(hist_x[-1], periods=HORIZON + 1, freq="YS")[1:]
+        cases.append(("figure_json", {"rows": n, "chart": "revenue_timeline"},
+                      lambda x=hist_x, y=agg["level", "total"], fx=fore_x:
+                      charts.revenue_timeline(charts.ChartCache(), x, y, fx, fore_levels.set_axis(fx)).to_json()))
+        cases.append(("figure_json", {"rows": n, "chart": "composition_area"},
+                      lambda x=hist_x, levels=agg["level"][targets]:
+                      charts.composition_area(charts.ChartCache(), x, levels).to_json()))
+
+    panel = synthetic_panel(synthetic_history(df, PANEL_ROWS), targets, N_ENTITIES)
+    panel_params = {"entities": N_ENTITIES, "rows": PANEL_ROWS}
+    cases.append(("panel_fit", panel_params,
+                  lambda: fit_panel(panel, meta, targets, exog_names)))
+    panel_engine, _ = fit_panel(panel, meta, targets, exog_names)
+    cases.append(("panel_forecast", panel_params,
+                  lambda: panel_engine.mean_forecast(panel_exog_paths(panel_engine, scenarios, HORIZON))))
+    return cases
+
+
+def engine_for_target(engine, t_pos):
+    """Engine reduced to one target, for the per-target forecast cost"""
+    sl = slice(t_pos, t_pos + 1)
+    return type(engine)(engine.targets[sl], engine.exog_names, engine.const[sl], engine.ar[sl], engine.beta[sl],
+                        engine.y_hist[:, sl], engine.x_hist)
+
+
+def bench_key(name, params):
+    """Stable identifier of one benchmark case, e.g. ``grid_sweep[scenarios=100]``"""
+    if not params:
+        return name
+    return f"{name}[{','.join(f'{k}={v}' for k, v in params.items())}]"
+
+
+def run_benchmarks(pattern=None, repeat=5, verbose=True, **paths):
+    """Time every benchmark whose key contains ``pattern``; returns the result record"""
+    results = {}
+    for name, params, func in benchmarks(**paths):
+        key = bench_key(name, params)
+        if pattern and pattern not in key:
+            continue
+        results[key] = dict(time_call(func, repeat=repeat), name=name, params=params)
+        if verbose:
+            print(f"{key:<60} {results[key]['median_s'] * 1000:>10.3f} ms")
+    return {
+        "host": socket.gethostname(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "timestamp": time.time(),
+        "filter": pattern,
+        "results": results,
+    }
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# BASELINE COMPARISON
+# ═══════════════════════════════════════════════════════════════════════════
+def compare(current, baseline, threshold=DEFAULT_THRESHOLD, thresholds=None, min_delta=MIN_DELTA):
+    """One row per benchmark of either run, with ratio and status.
+
+    Status is ``ok``, ``regression``, ``missing`` (in the baseline only) or
+    ``new`` (in the current run only). Baseline benchmarks excluded by the
+    current run's ``--filter`` are left out.
+    """
+    thresholds = THRESHOLDS if thresholds is None else thresholds
+    pattern = current.get("filter")
+    expected = {key: base for key, base in baseline["results"].items() if not pattern or pattern in key}
+    rows = []
+    for key, result in current["results"].items():
+        base = expected.get(key)
+        limit = thresholds.get(result["name"], threshold)
+        if base is None:
+            rows.append({"benchmark": key, "baseline_ms": np.nan, "current_ms": result["median_s"] * 1000,
+                         "ratio": np.nan, "threshold": limit, "status": "new"})
+            continue
+        ratio = result["median_s"] / base["median_s"]
+        delta = result["median_s"] - base["median_s"]
+        rows.append({
+            "benchmark": key,
+            "baseline_ms": base["median_s"] * 1000,
+            "current_ms": result["median_s"] * 1000,
+            "ratio": ratio,
+            "threshold": limit,
+            "status": "regression" if ratio > 1 + limit and delta > min_delta else "ok",
+        })
+    for key, base in expected.items():
+        if key not in current["results"]:
+            rows.append({"benchmark": key, "baseline_ms": base["median_s"] * 1000, "current_ms": np.nan,
+                         "ratio": np.nan, "threshold": thresholds.get(base["name"], threshold), "status": "missing"})
+    return pd.DataFrame(rows, columns=["benchmark", "baseline_ms", "current_ms", "ratio", "threshold", "status"])
+
+
+def load_results(path):
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def save_results(record, path):
+    with open(path, "w") as f:
+        json.dump(record, f, indent=2)
+
+
+def report(table, baseline):
+    """Print the comparison; returns the number of failures (regressions and missing benchmarks)"""
+    with pd.option_context("display.width", 160, "display.max_rows", None, "display.float_format", "{:,.3f}".format):
+        print(table.to_string(index=False))
+    if baseline.get("host") != socket.gethostname():
+        print(f"note: baseline was recorded on {baseline.get('host')}, timings may not be comparable")
+    counts = table["status"].value_counts()
+    for status in ("missing", "new"):
+        keys = table.loc[table["status"] == status, "benchmark"]
+        if len(keys):
+            print(f"{status}: {', '.join(keys)}")
+    compared = int(counts.get("ok", 0) + counts.get("regression", 0))
+    print(f"{compared} benchmarks compared, {counts.get('regression', 0)} regression(s), "
+          f"{counts.get('missing', 0)} missing, {counts.get('new', 0)} new")
+    return int(counts.get("regression", 0) + counts.get("missing", 0))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the ARDL forecasting and rendering pipeline")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="run the benchmarks and save the results")
+    run.add_argument("--out", default="bench_results.json")
+    run.add_argument("--filter", help="only run benchmarks whose key contains this text")
+    run.add_argument("--repeat", type=int, default=5)
+    run.add_argument("--save-baseline", action="store_true", help=f"also write the results to {BASELINE_FILE}")
+    run.add_argument("--baseline", help="compare against this baseline after running")
+    run.add_argument("--threshold", type=float, help=THRESHOLD_HELP)
+
+    cmp_ = sub.add_parser("compare", help="compare saved results against a baseline")
+    cmp_.add_argument("results")
+    cmp_.add_argument("--baseline", default=BASELINE_FILE)
+    cmp_.add_argument("--threshold", type=float, help=THRESHOLD_HELP)
+    args = parser.parse_args()
+
+    if args.command == "run":
+        record = run_benchmarks(args.filter, repeat=args.repeat)
+        save_results(record, args.out)
+        print(f"{len(record['results'])} benchmarks -> {args.out}")
+        if args.save_baseline:
+            save_results(record, BASELINE_FILE)
+            print(f"baseline -> {BASELINE_FILE}")
+        if not args.baseline:
+            return
+        current, baseline_path = record, args.baseline
+    else:
+        current, baseline_path = load_results(args.results), args.baseline
+
+    if not os.path.exists(baseline_path):
+        sys.exit(f"No baseline at {baseline_path} (record one with: python ardl_bench.py run --save-baseline)")
+    baseline = load_results(baseline_path)
+    if args.threshold is None:
+        rows = compare(current, baseline)
+    else:
+        rows = compare(current, baseline, args.threshold, thresholds={})
+    if report(rows, baseline):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
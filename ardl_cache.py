@@ -0,0 +1,129 @@
+"""Content-addressed LRU cache for forecast results.
+
+Keys are content hashes of the active dataset, the scenario dict and the
+horizon, so identical configurations from any session share one entry.
+Entries are evicted least-recently-used first when either the entry count
+or the approximate memory footprint exceeds its cap.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+def frame_hash(df):
+    """Stable content hash of a DataFrame (values, index and column names)"""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    h.update(json.dumps([str(c) for c in df.columns]).encode())
+    return h.hexdigest()
+
+
+def value_hash(value):
+    """Stable content hash of a JSON-like value such as the scenarios dict"""
+    payload = json.dumps(value, sort_keys=True, default=_json_default)
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+
+def _json_default(obj):
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    return str(obj)
+
+
+def forecast_key(dataset_hash, scenarios, horizon, model_hash=""):
+    """Cache key for one forecast configuration"""
+    return value_hash([dataset_hash, model_hash, scenarios, int(horizon)])
+
+
+def approx_nbytes(value):
+    """Approximate memory footprint of cached arrays, frames and containers"""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(index=True, deep=True)
+        return int(usage.sum()) if isinstance(usage, pd.Series) else int(usage)
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(approx_nbytes(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(approx_nbytes(v) for v in value)
+    return 64
+
+
+class LRUCache:
+    """Thread-safe LRU cache bounded by entry count and approximate bytes.
+
+    ``sizeof`` measures a value's footprint; the default ``approx_nbytes``
+    only knows arrays, frames, bytes and containers of them.
+    """
+
+    def __init__(self, max_entries=256, max_bytes=64 * 1024 ** 2, sizeof=approx_nbytes):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    @property
+    def nbytes(self):
+        return self._bytes
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key][0]
+
+    def put(self, key, value):
+        size = self.sizeof(value)
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            if size > self.max_bytes:
+                return value
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+        return value
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for ``key``, computing and storing it on a miss"""
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = self.put(key, compute())
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
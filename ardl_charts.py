@@ -0,0 +1,338 @@
+"""Cached Plotly figures for the dashboard.
+
+Finished figures are cached by a content hash of the data they plot and
+their layout. A chart whose inputs did not change is returned as the same
+figure object, so its traces are neither rebuilt nor re-validated. Charts
+that overlay a forecast on a history also cache the history part on its
+own: when only the forecast changes, that figure is copied and only the
+forecast traces are built. The styling shared by all charts (transparent
+background, grid, margins, legend) lives in one pre-built template layered
+over the active Plotly default, so per-chart layouts only carry what
+differs. Both caches are bounded by the size of the figures' JSON.
+
+Cached figures are shared across sessions and must not be mutated.
+"""
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from ardl_cache import LRUCache, value_hash
+from ardl_downsample import MAX_POINTS, downsample, downsample_frame, is_large
+from ardl_lazy import lazy_import
+
+go = lazy_import("plotly.graph_objects")
+pio = lazy_import("plotly.io")
+
+GRID = dict(showgrid=True, gridcolor='rgba(0,0,0,0.03)')
+SHARED_LAYOUT = dict(
+    margin=dict(l=0, r=0, t=10, b=0),
+    plot_bgcolor='rgba(0,0,0,0)',
+    paper_bgcolor='rgba(0,0,0,0)',
+    hovermode='x unified',
+    legend=dict(
+        orientation="h",
+        yanchor="bottom",
+        y=1.02,
+        xanchor="right",
+        x=1,
+        bgcolor='rgba(255,255,255,0.95)',
+        bordercolor='#E5E9ED',
+        borderwidth=1
+    ),
+    xaxis=GRID,
+    yaxis=GRID,
+)
+CATEGORY_COLORS = ['#2563EB', '#8B5CF6', '#14B8A6', '#F59E0B', '#F43F5E', '#06B6D4', '#6366F1', '#EC4899']
+
+_template = {}
+
+
+def chart_template():
+    """Shared layout template, built once over the current Plotly default"""
+    if "ardl" not in _template:
+        base = pio.templates[pio.templates.default] if pio.templates.default else go.layout.Template()
+        template = go.layout.Template(base)
+        template.layout.update(SHARED_LAYOUT)
+        _template["ardl"] = template
+    return _template["ardl"]
+
+
+def data_hash(*parts):
+    """Content hash of the arrays, pandas objects and plain values a trace plots"""
+    h = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        if isinstance(part, (pd.Series, pd.Index, pd.DataFrame)):
+            h.update(pd.util.hash_pandas_object(part, index=not isinstance(part, pd.Index)).to_numpy().tobytes())
+        elif isinstance(part, np.ndarray):
+            h.update(np.ascontiguousarray(part).tobytes())
+        else:
+            h.update(value_hash(part).encode())
+        h.update(b"|")
+    return h.hexdigest()
+
+
+def figure_nbytes(fig):
+    """Footprint of a figure, approximated by the length of its JSON"""
+    return len(fig.to_json())
+
+
+class ChartCache:
+    """LRU caches of assembled figures and of their history parts, keyed by data hash"""
+
+    def __init__(self, max_figures=256, max_bytes=64 * 1024 ** 2):
+        self.figures = LRUCache(max_entries=max_figures, max_bytes=max_bytes, sizeof=figure_nbytes)
+        self.bases = LRUCache(max_entries=max_figures, max_bytes=max_bytes, sizeof=figure_nbytes)
+
+    def figure(self, name, data, build, layout, forecast=None):
+        """Figure ``name`` for ``data``; ``build()`` returns its traces and runs only on a miss.
+
+        ``forecast`` is an optional ``(data, build)`` pair for traces drawn
+        over the others. They are added to a copy of the cached figure of
+        ``data``, so a new forecast leaves the history traces untouched.
+        """
+        key = (name, data_hash(*data), value_hash(layout))
+
+        def assemble():
+            fig = go.Figure(data=build(), layout=dict(template=chart_template()))
+            fig.update_layout(layout)
+            return fig
+
+        if forecast is None:
+            return self.figures.get_or_compute(key, assemble)
+        forecast_data, build_forecast = forecast
+
+        def overlay():
+            fig = go.Figure(self.bases.get_or_compute(key, assemble))
+            fig.add_traces(build_forecast())
+            return fig
+
+        return self.figures.get_or_compute(key + (data_hash(*forecast_data),), overlay)
+
+    def stats(self):
+        return {"figures": self.figures.stats(), "bases": self.bases.stats()}
+
+
+def history_line(x, y, max_points=MAX_POINTS, **style):
+    """Line trace of a historical series, downsampled and WebGL when long"""
+    trace = go.Scattergl if is_large(len(y)) else go.Scatter
+    x, y = downsample(x, y, max_points)
+    return trace(x=x, y=y, **style)
+
+
+def range_axis(n_points, max_points=MAX_POINTS):
+    """x-axis settings adding a range slider when a history is downsampled"""
+    return dict(rangeslider=dict(visible=True, thickness=0.06)) if n_points > max_points else {}
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# DASHBOARD CHARTS
+# ═══════════════════════════════════════════════════════════════════════════
+def revenue_timeline(cache, hist_x, hist_y, fore_x, fore_y, max_points=MAX_POINTS):
+    """Total revenue: historical area and projected dashed line (PKR billion)"""
+    def build():
+        return [history_line(
+            hist_x,
+            hist_y,
+            max_points,
+            mode='lines',
+            name='Historical Revenue',
+            line=dict(color='#2563EB', width=3.5),
+            fill='tozeroy',
+            fillcolor='rgba(37, 99, 235, 0.06)',
+            hovertemplate='<b>FY %{x|%Y}</b><br><b>₨%{y:,.2f}B</b><extra></extra>'
+        )]
+
+    def build_forecast():
+        return [go.Scatter(
+            x=fore_x,
+            y=fore_y,
+            mode='lines+markers',
+            name='Projected Revenue',
+            line=dict(color='#8B5CF6', width=3.5, dash='dash'),
+            marker=dict(size=9, color='#8B5CF6', line=dict(width=2, color='white')),
+            hovertemplate='<b>FY %{x|%Y}</b><br><b>₨%{y:,.2f}B</b><extra></extra>'
+        )]
+
+    return cache.figure("timeline", (hist_x, hist_y, max_points), build, dict(
+        height=460,
+        margin=dict(t=20),
+        font=dict(family='Inter', size=12, color='#4B5563'),
+        legend=dict(font=dict(size=13, weight=600)),
+        xaxis=dict(zeroline=False, title=dict(text="Fiscal Year", font=dict(weight=600, size=13)),
+                   **range_axis(len(hist_y), max_points)),
+        yaxis=dict(zeroline=False, title=dict(text="Revenue (PKR Billion)", font=dict(weight=600, size=13))),
+    ), forecast=((fore_x, fore_y), build_forecast))
+
+
+def growth_bars(cache, hist_x, growth_rates, max_points=MAX_POINTS):
+    """Period-over-period growth of total revenue, negative periods in red"""
+    def build():
+        # min/max buckets keep every spike of a long growth series
+        x, y = downsample(hist_x, growth_rates, max_points, method="minmax")
+        return [go.Bar(
+            x=x,
+            y=y,
+            marker=dict(color=['#F43F5E' if v < 0 else '#14B8A6' for v in y], line=dict(width=0)),
+            hovertemplate='<b>FY %{x|%Y}</b><br>Growth: <b>%{y:.1f}%</b><extra></extra>'
+        )]
+
+    return cache.figure("growth", (hist_x, growth_rates, max_points), build, dict(
+        height=340,
+        showlegend=False,
+        hovermode='closest',
+        xaxis=dict(showgrid=False, title=dict(text="Year", font=dict(weight=600))),
+        yaxis=dict(
+            zeroline=True,
+            zerolinecolor='#D1D8DE',
+            zerolinewidth=2,
+            title=dict(text="Growth Rate %", font=dict(weight=600))
+        ),
+    ))
+
+
+def confidence_fan(cache, fore_x, bands, center, center_name):
+    """Fan chart of total revenue: 90% and 50% bands around a central line"""
+    def edge(col):
+        return go.Scatter(
+            x=fore_x,
+            y=bands[col],
+            mode='lines',
+            line=dict(width=0),
+            showlegend=False,
+            hoverinfo='skip'
+        )
+
+    def band(col, name, fillcolor, label):
+        return go.Scatter(
+            x=fore_x,
+            y=bands[col],
+            mode='lines',
+            name=name,
+            line=dict(width=0),
+            fill='tonexty',
+            fillcolor=fillcolor,
+            hovertemplate=label + ': <b>₨%{y:,.2f}B</b><extra></extra>'
+        )
+
+    def build():
+        return [
+            edge(95),
+            band(5, '90% band', 'rgba(139, 92, 246, 0.12)', '5th pct'),
+            edge(75),
+            band(25, '50% band', 'rgba(139, 92, 246, 0.28)', '25th pct'),
+            go.Scatter(
+                x=fore_x,
+                y=center,
+                mode='lines+markers',
+                name=center_name,
+                line=dict(color='#8B5CF6', width=4),
+                marker=dict(size=11, color='#8B5CF6', line=dict(width=2.5, color='white')),
+                hovertemplate='<b>FY %{x|%Y}</b><br>' + center_name + ': <b>₨%{y:,.2f}B</b><extra></extra>'
+            ),
+        ]
+
+    data = (fore_x, bands[95], bands[5], bands[75], bands[25], center, center_name)
+    return cache.figure("fan", data, build, dict(
+        height=340,
+        showlegend=False,
+        xaxis=dict(title=dict(text='Fiscal Year', font=dict(weight=600))),
+        yaxis=dict(title=dict(text='Total Revenue (PKR Billion)', font=dict(weight=600))),
+    ))
+
+
+def composition_area(cache, hist_x, hist_levels, max_points=MAX_POINTS):
+    """Stacked area of each category's historical revenue (PKR billion).
+
+    Stacking has no WebGL variant, so long histories are only downsampled,
+    with the same rows kept for every category.
+    """
+    def build():
+        plot_x, plot_levels = downsample_frame(hist_x, hist_levels, max_points)
+        return [
+            go.Scatter(
+                x=plot_x,
+                y=plot_levels[target],
+                mode='lines',
+                name=target.replace('_', ' ').title(),
+                line=dict(width=0),
+                stackgroup='one',
+                fillcolor=CATEGORY_COLORS[idx % len(CATEGORY_COLORS)],
+                hovertemplate='<b>%{fullData.name}</b><br>₨%{y:,.2f}B<extra></extra>'
+            )
+            for idx, target in enumerate(hist_levels.columns)
+        ]
+
+    return cache.figure("composition", (hist_x, hist_levels, list(hist_levels.columns), max_points), build, dict(
+        height=480,
+        xaxis=dict(title=dict(text="Fiscal Year", font=dict(weight=600)), **range_axis(len(hist_levels), max_points)),
+        yaxis=dict(title=dict(text="Revenue (PKR Billion)", font=dict(weight=600))),
+    ))
+
+
+def category_projection(cache, target, hist_x, hist_series, fore_x, fore_series, max_points=MAX_POINTS):
+    """One category's historical area and forecast line"""
+    def build():
+        return [history_line(
+            hist_x,
+            hist_series,
+            max_points,
+            mode='lines',
+            name='Historical',
+            line=dict(color='#2563EB', width=3),
+            fill='tozeroy',
+            fillcolor='rgba(37, 99, 235, 0.08)',
+            hovertemplate='<b>%{x|%Y}</b><br>₨%{y:,.2f}B<extra></extra>'
+        )]
+
+    def build_forecast():
+        return [go.Scatter(
+            x=fore_x,
+            y=fore_series,
+            mode='lines+markers',
+            name='Forecast',
+            line=dict(color='#8B5CF6', width=3, dash='dash'),
+            marker=dict(size=7, color='#8B5CF6', line=dict(width=2, color='white')),
+            hovertemplate='<b>%{x|%Y}</b><br>₨%{y:,.2f}B<extra></extra>'
+        )]
+
+    return cache.figure(f"category_{target}", (hist_x, hist_series, max_points), build, dict(
+        title=dict(
+            text=f"<b>{target.replace('_', ' ').title()}</b>",
+            font=dict(size=15, color='#1F2937', family='Space Grotesk')
+        ),
+        height=300,
+        margin=dict(t=50),
+        showlegend=False,
+        hovermode='closest',
+    ), forecast=((fore_x, fore_series), build_forecast))
+
+
+def backtest_fit(cache, periods, actual, forecast):
+    """Realised revenue against the 1-year-ahead backtest forecasts"""
+    def build():
+        return [
+            go.Scatter(
+                x=periods,
+                y=actual,
+                mode='lines+markers',
+                name='Actual',
+                line=dict(color='#6366F1', width=3),
+                hovertemplate='<b>FY %{x}</b><br>Actual: <b>₨%{y:,.2f}B</b><extra></extra>'
+            ),
+            go.Scatter(
+                x=periods,
+                y=forecast,
+                mode='lines+markers',
+                name='1-year-ahead forecast',
+                line=dict(color='#EC4899', width=3, dash='dash'),
+                hovertemplate='<b>FY %{x}</b><br>Forecast: <b>₨%{y:,.2f}B</b><extra></extra>'
+            ),
+        ]
+
+    return cache.figure("backtest", (periods, actual, forecast), build, dict(
+        height=320,
+        legend=dict(bgcolor='rgba(0,0,0,0)', borderwidth=0),
+        xaxis=dict(title=dict(text='Fiscal Year', font=dict(weight=600))),
+        yaxis=dict(title=dict(text='Revenue (PKR Billion)', font=dict(weight=600))),
+    ))
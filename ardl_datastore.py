@@ -0,0 +1,243 @@
+"""Bounded store for uploaded datasets.
+
+Frames are held once per content hash and handed out without copying. The
+same upload opened by several sessions, or under several names, is stored
+and counted once. The dashboard treats frames as read-only: pandas
+copy-on-write guarantees a later modification never leaks back into the
+stored frame.
+
+Each session and the process as a whole have a byte budget. When a budget
+is exceeded, the least-recently-used frames are spilled to an on-disk
+Parquet cache if one is configured, or dropped otherwise. The spill cache
+has its own byte cap, and the oldest spilled frames are deleted beyond it.
+Sessions idle for longer than ``session_ttl`` are expired with their
+datasets, so abandoned sessions do not hold memory or disk indefinitely.
+"""
+import glob
+import importlib.util
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import pandas as pd
+
+from ardl_cache import approx_nbytes, frame_hash
+
+HAS_PARQUET = importlib.util.find_spec("pyarrow") is not None
+
+
+class DatasetStore:
+    """LRU dataset store with per-session and global byte budgets.
+
+    Entries map (session, name) to a shared frame record keyed by the
+    frame's content hash; a frame record is released when its last entry
+    goes.
+    """
+
+    def __init__(self, global_budget=512 * 1024 ** 2, session_budget=128 * 1024 ** 2, spill_dir=None,
+                 spill_budget=1024 ** 3, session_ttl=6 * 3600):
+        self.global_budget = global_budget
+        self.session_budget = session_budget
+        self.spill_dir = spill_dir if HAS_PARQUET else None
+        self.spill_budget = spill_budget
+        self.session_ttl = session_ttl
+        self._entries = OrderedDict()
+        self._frames = {}
+        self._names = {}
+        self._seen = {}
+        self._bytes = 0
+        self._spill_bytes = 0
+        self._lock = threading.Lock()
+        if self.spill_dir:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            self._remove_stale_spills()
+
+    def put(self, session_id, name, df, content_hash=None):
+        """Store ``df`` for a session; raises ValueError if it exceeds the session budget
+
+        ``content_hash`` identifies the source file so identical uploads can
+        be found again with ``find_content`` instead of being re-parsed.
+        """
+        size = approx_nbytes(df)
+        if size > self.session_budget:
+            raise ValueError(
+                f"Dataset is {size / 1024 ** 2:.1f} MB, above the "
+                f"{self.session_budget / 1024 ** 2:.0f} MB per-session limit"
+            )
+        digest = frame_hash(df)
+        key = (session_id, name)
+        with self._lock:
+            self._expire_sessions()
+            self._seen[session_id] = time.time()
+            self._discard(key)
+            record = self._frames.get(digest)
+            if record is None:
+                record = self._frames[digest] = {"frame": df, "bytes": size, "spill_path": None, "refs": 0}
+                self._bytes += size
+            elif record["frame"] is None:
+                record["frame"] = df
+                self._bytes += record["bytes"]
+            record["refs"] += 1
+            self._entries[key] = {"digest": digest, "content_hash": content_hash}
+            names = self._names.setdefault(session_id, [])
+            if name not in names:
+                names.append(name)
+            self._enforce_budgets(session_id, keep=key)
+        return digest
+
+    def get(self, session_id, name):
+        """Stored frame (reloaded from the spill cache if needed), or None if evicted"""
+        key = (session_id, name)
+        with self._lock:
+            self._expire_sessions()
+            if key not in self._entries:
+                return None
+            self._seen[session_id] = time.time()
+            return self._resident_frame(key)
+
+    def find_content(self, content_hash):
+        """Frame previously stored from the same file bytes by any session, or None"""
+        if content_hash is None:
+            return None
+        with self._lock:
+            for key, entry in self._entries.items():
+                if entry["content_hash"] == content_hash:
+                    return self._resident_frame(key)
+        return None
+
+    def dataset_hash(self, session_id, name):
+        with self._lock:
+            entry = self._entries.get((session_id, name))
+            return None if entry is None else entry["digest"]
+
+    def names(self, session_id):
+        """Dataset names still available to a session, in upload order"""
+        with self._lock:
+            self._expire_sessions()
+            if session_id in self._names:
+                self._seen[session_id] = time.time()
+            return list(self._names.get(session_id, []))
+
+    def clear_session(self, session_id):
+        with self._lock:
+            self._drop_session(session_id)
+
+    def session_bytes(self, session_id):
+        digests = {e["digest"] for (sid, _), e in self._entries.items() if sid == session_id}
+        return sum(self._frames[d]["bytes"] for d in digests if self._frames[d]["frame"] is not None)
+
+    def stats(self):
+        resident = sum(1 for r in self._frames.values() if r["frame"] is not None)
+        return {
+            "datasets": len(self._entries),
+            "frames": len(self._frames),
+            "resident": resident,
+            "spilled": len(self._frames) - resident,
+            "bytes": self._bytes,
+            "spill_bytes": self._spill_bytes,
+            "sessions": len(self._names),
+        }
+
+    def _resident_frame(self, key):
+        """Frame of an entry, reloaded from its spill file if needed (lock held)"""
+        self._entries.move_to_end(key)
+        record = self._frames[self._entries[key]["digest"]]
+        if record["frame"] is None:
+            record["frame"] = pd.read_parquet(record["spill_path"])
+            self._bytes += record["bytes"]
+            self._enforce_budgets(key[0], keep=key)
+        return record["frame"]
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        record = self._frames[entry["digest"]]
+        record["refs"] -= 1
+        if record["refs"] > 0:
+            return
+        del self._frames[entry["digest"]]
+        if record["frame"] is not None:
+            self._bytes -= record["bytes"]
+        self._remove_spill(record)
+
+    def _remove_spill(self, record):
+        path = record["spill_path"]
+        if path:
+            if os.path.exists(path):
+                self._spill_bytes -= os.path.getsize(path)
+                os.remove(path)
+            record["spill_path"] = None
+
+    def _drop_digest(self, digest):
+        """Remove every entry sharing a frame (and the frame with the last one)"""
+        for key in [k for k, e in self._entries.items() if e["digest"] == digest]:
+            session_id, name = key
+            self._discard(key)
+            names = self._names.get(session_id, [])
+            if name in names:
+                names.remove(name)
+            if not names:
+                self._names.pop(session_id, None)
+
+    def _drop_session(self, session_id):
+        for name in self._names.pop(session_id, []):
+            self._discard((session_id, name))
+        self._seen.pop(session_id, None)
+
+    def _expire_sessions(self):
+        cutoff = time.time() - self.session_ttl
+        for session_id in [sid for sid, seen in self._seen.items() if seen < cutoff]:
+            self._drop_session(session_id)
+
+    def _remove_stale_spills(self):
+        """Delete spill files left behind by earlier processes"""
+        cutoff = time.time() - self.session_ttl
+        for path in glob.glob(os.path.join(self.spill_dir, "*.parquet")):
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    def _evict(self, digest):
+        """Spill a resident frame to disk, or drop it when spilling is unavailable"""
+        record = self._frames[digest]
+        if self.spill_dir:
+            if record["spill_path"] is None:
+                path = os.path.join(self.spill_dir, f"{uuid.uuid4().hex}.parquet")
+                try:
+                    record["frame"].to_parquet(path)
+                    record["spill_path"] = path
+                    self._spill_bytes += os.path.getsize(path)
+                except Exception:
+                    record["spill_path"] = None
+            if record["spill_path"]:
+                record["frame"] = None
+                self._bytes -= record["bytes"]
+                return
+        self._drop_digest(digest)
+
+    def _enforce_budgets(self, session_id, keep):
+        keep_digest = self._entries[keep]["digest"]
+        for key in list(self._entries):
+            if self.session_bytes(session_id) <= self.session_budget:
+                break
+            digest = self._entries[key]["digest"] if key in self._entries else None
+            if key[0] == session_id and digest not in (None, keep_digest) and self._frames[digest]["frame"] is not None:
+                self._evict(digest)
+        for key in list(self._entries):
+            if self._bytes <= self.global_budget:
+                break
+            digest = self._entries[key]["digest"] if key in self._entries else None
+            if digest not in (None, keep_digest) and self._frames[digest]["frame"] is not None:
+                self._evict(digest)
+        # oldest spilled frames go first once the spill cache is over its cap
+        for key in list(self._entries):
+            if self._spill_bytes <= self.spill_budget:
+                break
+            digest = self._entries[key]["digest"] if key in self._entries else None
+            if digest not in (None, keep_digest) and self._frames[digest]["frame"] is None:
+                self._drop_digest(digest)
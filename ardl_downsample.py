@@ -0,0 +1,100 @@
+"""Downsampling of long histories for the dashboard charts.
+
+Charts send at most ``MAX_POINTS`` points per trace: longer series are
+reduced with Largest-Triangle-Three-Buckets (LTTB), which keeps the visual
+shape of a line, or with per-bucket min/max, which keeps every spike of a
+bar series. Stacked series are reduced with one shared set of rows, chosen
+from their total, so the stack stays aligned. Series above
+``WEBGL_THRESHOLD`` raw points are drawn with WebGL traces.
+
+Zooming re-samples the selected window to the full point budget, so the
+resolution grows as the window narrows.
+"""
+import numpy as np
+import pandas as pd
+
+MAX_POINTS = 1500
+WEBGL_THRESHOLD = 5000
+
+
+def _numeric_x(x):
+    """x positions as float64 (timestamps and periods by their int64 ordinal)"""
+    if isinstance(x, (pd.DatetimeIndex, pd.PeriodIndex)):
+        return x.asi8.astype(np.float64)
+    values = np.asarray(x)
+    if np.issubdtype(values.dtype, np.number):
+        return values.astype(np.float64)
+    if np.issubdtype(values.dtype, np.datetime64):
+        return values.astype("datetime64[ns]").astype(np.int64).astype(np.float64)
+    return np.arange(len(values), dtype=np.float64)
+
+
+def lttb_indices(x, y, n_out):
+    """Row positions kept by Largest-Triangle-Three-Buckets"""
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = _numeric_x(x)
+    y = np.nan_to_num(np.asarray(y, dtype=np.float64))
+    # first and last points are kept; the rest is split into n_out - 2 buckets
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nxt_hi = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[hi:nxt_hi].mean()
+        avg_y = y[hi:nxt_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+def minmax_indices(y, n_out):
+    """Row positions of the minimum and maximum of each of n_out / 2 buckets"""
+    n = len(y)
+    if n_out >= n or n_out < 2:
+        return np.arange(n)
+    y = np.nan_to_num(np.asarray(y, dtype=np.float64))
+    edges = np.linspace(0, n, n_out // 2 + 1).astype(np.int64)
+    keep = []
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        if hi > lo:
+            keep += [lo + int(np.argmin(y[lo:hi])), lo + int(np.argmax(y[lo:hi]))]
+    return np.unique(keep)
+
+
+def downsample(x, y, max_points=MAX_POINTS, method="lttb"):
+    """(x, y) reduced to at most ``max_points`` points; short series are returned as-is"""
+    if len(y) <= max_points:
+        return x, y
+    if method == "lttb":
+        keep = lttb_indices(x, y, max_points)
+    elif method == "minmax":
+        keep = minmax_indices(y, max_points)
+    else:
+        raise ValueError(f"Unknown downsampling method '{method}' (expected 'lttb' or 'minmax')")
+    return _take(x, keep), _take(y, keep)
+
+
+def downsample_frame(x, frame, max_points=MAX_POINTS):
+    """(x, frame) reduced to shared rows chosen by LTTB on the row totals"""
+    if len(frame) <= max_points:
+        return x, frame
+    keep = lttb_indices(x, frame.sum(axis=1).to_numpy(), max_points)
+    return _take(x, keep), frame.iloc[keep]
+
+
+def _take(values, keep):
+    if isinstance(values, (pd.Series, pd.DataFrame)):
+        return values.iloc[keep]
+    if isinstance(values, pd.Index):
+        return values[keep]
+    return np.asarray(values)[keep]
+
+
+def is_large(n_points):
+    """Whether a series of ``n_points`` raw points should use a WebGL trace"""
+    return n_points > WEBGL_THRESHOLD
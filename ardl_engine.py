@@ -0,0 +1,227 @@
+"""Vectorized ARDL forecast engine.
+
+Fitted ARDL parameters are compiled once into dense coefficient arrays so
+the lag recursion for every target (and every scenario) runs as a single
+batched NumPy pass instead of one statsmodels ``forecast`` call per model.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+_LAG_PARAM = re.compile(r"^(?P<name>.+)\.L(?P<lag>\d+)$")
+
+# Horizon of the dynamic multiplier tables (years)
+MULTIPLIER_HORIZON = 10
+
+
+def parse_param_name(param):
+    """Split an ARDL parameter label such as ``inflation.L1`` into (name, lag)"""
+    if param == "const":
+        return "const", None
+    match = _LAG_PARAM.match(param)
+    if match is None:
+        raise ValueError(f"Unsupported ARDL term '{param}' (only const and lag terms are compiled)")
+    return match.group("name"), int(match.group("lag"))
+
+
+class ForecastEngine:
+    """Compiled ARDL models for a set of targets sharing one exogenous design.
+
+    Coefficient layout:
+        const  (T,)          intercept per target
+        ar     (T, p)        own-lag coefficients, column i is lag i + 1
+        beta   (T, K, q + 1) exogenous coefficients, last axis is the lag
+        y_hist (p, T)        last p observed target values, oldest first
+        x_hist (q, K)        last q observed exogenous rows, oldest first
+    """
+
+    def __init__(self, targets, exog_names, const, ar, beta, y_hist, x_hist, resid=None, sigma2=None):
+        self.targets = list(targets)
+        self.exog_names = list(exog_names)
+        self.const = np.ascontiguousarray(const, dtype=np.float64)
+        self.ar = np.ascontiguousarray(ar, dtype=np.float64)
+        self.beta = np.ascontiguousarray(beta, dtype=np.float64)
+        self.y_hist = np.ascontiguousarray(y_hist, dtype=np.float64)
+        self.x_hist = np.ascontiguousarray(x_hist, dtype=np.float64)
+        self.resid = None if resid is None else np.ascontiguousarray(resid, dtype=np.float64)
+        self.sigma2 = None if sigma2 is None else np.asarray(sigma2, dtype=np.float64)
+        self._impulse = np.empty((0, len(self.targets), len(self.exog_names)))
+
+    @property
+    def ar_order(self):
+        return self.ar.shape[1]
+
+    @property
+    def exog_order(self):
+        return self.beta.shape[2] - 1
+
+    def exog_contribution(self, exog):
+        """Deterministic part of each forecast: const + sum_j beta_j * x_{t-j}.
+
+        ``exog`` is (..., H, K) in ``exog_names`` order; returns (..., H, T).
+        """
+        exog = np.asarray(exog, dtype=np.float64)
+        horizon = exog.shape[-2]
+        q = self.exog_order
+        if q:
+            hist = np.broadcast_to(self.x_hist, exog.shape[:-2] + self.x_hist.shape)
+            exog = np.concatenate([hist, exog], axis=-2)
+        out = np.broadcast_to(self.const, exog.shape[:-2] + (horizon, len(self.targets))).copy()
+        for lag in range(q + 1):
+            window = exog[..., q - lag:q - lag + horizon, :]
+            out += window @ self.beta[:, :, lag].T
+        return out
+
+    def forecast(self, exog, shocks=None):
+        """Log-level forecasts of shape (..., H, T) for exogenous paths (..., H, K).
+
+        Leading axes are treated as independent scenarios or simulation paths.
+        ``shocks`` (broadcastable to the output) are added to each step before
+        it feeds the next lag.
+        """
+        out = self.exog_contribution(exog)
+        if shocks is not None:
+            out += shocks
+        return self.propagate(out)
+
+    def propagate(self, out):
+        """Run the autoregressive recursion in place over (..., H, T) innovations"""
+        p = self.ar_order
+        for h in range(out.shape[-2]):
+            for i in range(p):
+                if h - i - 1 >= 0:
+                    out[..., h, :] += self.ar[:, i] * out[..., h - i - 1, :]
+                else:
+                    out[..., h, :] += self.ar[:, i] * self.y_hist[p + h - i - 1]
+        return out
+
+    def forecast_levels(self, exog, shocks=None):
+        """Forecasts converted from logs to levels with ``np.exp``"""
+        return np.exp(self.forecast(exog, shocks=shocks))
+
+    def impulse_responses(self, horizon=MULTIPLIER_HORIZON):
+        """Dynamic multipliers (H, T, K): response of each target h - 1 steps
+        after a one-off unit change in each regressor.
+
+        Derived from the lag polynomials, m_h = beta_h + sum_i ar_i * m_{h-i};
+        computed once per engine and extended only when a longer horizon is asked.
+        """
+        have = len(self._impulse)
+        if horizon > have:
+            m = np.zeros((horizon, len(self.targets), len(self.exog_names)))
+            m[:have] = self._impulse
+            for h in range(have, horizon):
+                if h <= self.exog_order:
+                    m[h] = self.beta[:, :, h]
+                for i in range(min(self.ar_order, h)):
+                    m[h] += self.ar[:, i, None] * m[h - i - 1]
+            self._impulse = m
+        return self._impulse[:horizon]
+
+    def cumulative_multipliers(self, horizon=MULTIPLIER_HORIZON):
+        """Response (H, T, K) to a permanent unit change in each regressor"""
+        return np.cumsum(self.impulse_responses(horizon), axis=0)
+
+    def long_run_multipliers(self):
+        """Long-run effect (T, K) of a permanent unit change: sum(beta) / (1 - sum(ar)).
+
+        NaN for a target whose own lags sum to one or more (no stable long run).
+        """
+        persistence = 1.0 - self.ar.sum(axis=1)
+        stable = persistence > 0
+        return np.where(stable[:, None], self.beta.sum(axis=2) / np.where(stable, persistence, 1.0)[:, None], np.nan)
+
+    def exog_response(self, delta_exog):
+        """Change in log forecasts (..., H, T) from a change in the regressor paths (..., H, K).
+
+        The models are linear, so this is the convolution of ``delta_exog`` with
+        the dynamic multipliers - a table lookup instead of a new forecast.
+        """
+        delta_exog = np.asarray(delta_exog, dtype=np.float64)
+        horizon = delta_exog.shape[-2]
+        m = self.impulse_responses(horizon)
+        out = np.zeros(delta_exog.shape[:-1] + (len(self.targets),))
+        for s in range(horizon):
+            out[..., s:, :] += np.einsum("...k,htk->...ht", delta_exog[..., s, :], m[:horizon - s])
+        return out
+
+
+def compile_params(params_by_target, history, exog_names, resid=None, sigma2=None):
+    """Build a ForecastEngine from ``{target: {param_name: value}}``.
+
+    ``history`` is a DataFrame holding every target and exogenous column; its
+    trailing rows seed the lag recursion.
+    """
+    targets = list(params_by_target.keys())
+    exog_names = list(exog_names)
+    exog_pos = {name: k for k, name in enumerate(exog_names)}
+
+    terms = {}
+    p = q = 0
+    for t in targets:
+        parsed = []
+        for param, value in params_by_target[t].items():
+            name, lag = parse_param_name(param)
+            if name == t:
+                if lag < 1:
+                    raise ValueError(f"Invalid autoregressive lag '{param}' for {t}")
+                p = max(p, lag)
+            elif name in exog_pos:
+                q = max(q, lag)
+            elif name != "const":
+                raise ValueError(f"Parameter '{param}' of {t} references unknown regressor '{name}'")
+            parsed.append((name, lag, float(value)))
+        terms[t] = parsed
+
+    const = np.zeros(len(targets))
+    ar = np.zeros((len(targets), p))
+    beta = np.zeros((len(targets), len(exog_names), q + 1))
+    for i, t in enumerate(targets):
+        for name, lag, value in terms[t]:
+            if name == "const":
+                const[i] = value
+            elif name == t:
+                ar[i, lag - 1] = value
+            else:
+                beta[i, exog_pos[name], lag] = value
+
+    y_hist = history[targets].to_numpy(dtype=np.float64)[len(history) - p:] if p else np.empty((0, len(targets)))
+    x_hist = history[exog_names].to_numpy(dtype=np.float64)[len(history) - q:] if q else np.empty((0, len(exog_names)))
+    return ForecastEngine(targets, exog_names, const, ar, beta, y_hist, x_hist, resid=resid, sigma2=sigma2)
+
+
+def stack_residuals(resids):
+    """Residual matrix (n, T) aligned on the most recent observations"""
+    n = min(len(r) for r in resids)
+    return np.column_stack([np.asarray(r, dtype=np.float64)[len(r) - n:] for r in resids])
+
+
+def results_training_frame(results_dict):
+    """Training data of fitted statsmodels ARDL results as one DataFrame.
+
+    Exogenous columns come from the first model (they share one design);
+    each target's endogenous series is added as its own column.
+    """
+    targets = list(results_dict.keys())
+    history = pd.DataFrame(results_dict[targets[0]].model.data.orig_exog).copy()
+    for t in targets:
+        history[t] = np.asarray(results_dict[t].model.data.orig_endog, dtype=np.float64)
+    return history
+
+
+def compile_results(results_dict, exog_names):
+    """Compile fitted statsmodels ARDL results into a ForecastEngine.
+
+    The lag state is taken from each model's own training data, so forecasts
+    match ``res.forecast`` exactly.
+    """
+    params = {}
+    resids = []
+    sigma2 = []
+    for t, res in results_dict.items():
+        params[t] = dict(res.params.items())
+        resids.append(np.asarray(res.resid, dtype=np.float64))
+        sigma2.append(float(res.sigma2))
+    history = results_training_frame(results_dict)
+    return compile_params(params, history, exog_names, resid=stack_residuals(resids), sigma2=sigma2)
@@ -0,0 +1,170 @@
+"""File exports for the dashboard and the batch runner.
+
+Exports are built on demand: the dashboard hands download buttons a
+callable, and finished files are cached by the content hash of the tables
+that went into them. CSV is written in row chunks and Parquet one row group
+at a time into a spooled temporary file, which moves to disk once it grows
+past ``SPOOL_BYTES``, so building a large export never holds a second copy
+of the table in memory. The finished file is still returned as one bytes
+object, because Streamlit serves downloads from memory. Bundles collect
+history, forecasts, intervals and model metadata into a multi-sheet Excel
+workbook or a zip of CSVs.
+
+Excel needs openpyxl and Parquet needs pyarrow; both are imported only
+when such a file is requested.
+"""
+import json
+import tempfile
+import zipfile
+
+import pandas as pd
+
+from ardl_cache import frame_hash, value_hash
+
+CHUNK_ROWS = 50_000
+SPOOL_BYTES = 8 * 1024 ** 2
+MIME_TYPES = {
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "parquet": "application/vnd.apache.parquet",
+    "zip": "application/zip",
+}
+
+
+def iter_csv(frame, index=True, chunk_rows=CHUNK_ROWS):
+    """UTF-8 CSV of ``frame`` as byte chunks of at most ``chunk_rows`` rows"""
+    if len(frame) == 0:
+        yield frame.to_csv(index=index).encode()
+        return
+    for start in range(0, len(frame), chunk_rows):
+        chunk = frame.iloc[start:start + chunk_rows]
+        yield chunk.to_csv(index=index, header=start == 0).encode()
+
+
+def write_csv(frame, fileobj, index=True, chunk_rows=CHUNK_ROWS):
+    """Stream ``frame`` as CSV into a binary file object"""
+    for chunk in iter_csv(frame, index=index, chunk_rows=chunk_rows):
+        fileobj.write(chunk)
+
+
+def write_parquet(frame, where, index=True, chunk_rows=CHUNK_ROWS):
+    """Write ``frame`` to a Parquet path or file object one row group at a time"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.Schema.from_pandas(frame.iloc[:0], preserve_index=index)
+    with pq.ParquetWriter(where, schema) as writer:
+        for start in range(0, len(frame), chunk_rows):
+            chunk = frame.iloc[start:start + chunk_rows]
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=index))
+
+
+def write_excel(sheets, fileobj):
+    """Multi-sheet workbook from ``{sheet name: DataFrame}``"""
+    with pd.ExcelWriter(fileobj, engine="openpyxl") as writer:
+        for name, frame in sheets.items():
+            frame.to_excel(writer, sheet_name=name[:31])
+
+
+def write_zip(files, fileobj, chunk_rows=CHUNK_ROWS):
+    """Zip archive from ``{file name: DataFrame, dict or bytes}``.
+
+    DataFrames are streamed in as CSV chunk by chunk, dicts are written as
+    JSON and bytes as-is.
+    """
+    with zipfile.ZipFile(fileobj, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, content in files.items():
+            if isinstance(content, pd.DataFrame):
+                with zf.open(name, "w") as entry:
+                    write_csv(content, entry, chunk_rows=chunk_rows)
+            elif isinstance(content, dict):
+                zf.writestr(name, json.dumps(content, indent=2, default=str))
+            else:
+                zf.writestr(name, content)
+
+
+def export_bytes(kind, content):
+    """File contents of ``kind`` ('csv', 'parquet', 'xlsx' or 'zip').
+
+    ``content`` is a DataFrame for csv/parquet, ``{sheet: DataFrame}`` for
+    xlsx and ``{file name: content}`` for zip. The file is written to a
+    spooled temporary file and read back once, so only the returned bytes
+    stay in memory; openpyxl still builds a whole workbook before saving it.
+    """
+    writers = {"csv": write_csv, "parquet": write_parquet, "xlsx": write_excel, "zip": write_zip}
+    if kind not in writers:
+        raise ValueError(f"Unknown export format '{kind}' (expected one of {', '.join(MIME_TYPES)})")
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES) as f:
+        writers[kind](content, f)
+        f.seek(0)
+        return f.read()
+
+
+def content_key(kind, content):
+    """Cache key of an export: its format and the hash of every table in it"""
+    if isinstance(content, pd.DataFrame):
+        return kind, frame_hash(content)
+    parts = []
+    for name, part in content.items():
+        parts.append((name, frame_hash(part) if isinstance(part, pd.DataFrame) else value_hash(part)))
+    return kind, value_hash(parts)
+
+
+def cached_export(cache, kind, content):
+    """``export_bytes`` memoized in an ``LRUCache`` by content hash"""
+    return cache.get_or_compute(content_key(kind, content), lambda: export_bytes(kind, content))
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# EXPORT BUNDLES
+# ═══════════════════════════════════════════════════════════════════════════
+def interval_table(bands):
+    """Long frame of prediction intervals: one row per series and year"""
+    frames = []
+    for name, band in bands.items():
+        frame = band.rename(columns=lambda c: f"p{c}" if not isinstance(c, str) else c)
+        frame.insert(0, "series", name)
+        frames.append(frame)
+    table = pd.concat(frames)
+    table.index = table.index.astype(str)
+    table.index.name = "year"
+    return table
+
+
+def model_table(model_header):
+    """One row of fit statistics and lag orders per model"""
+    rows = {}
+    for target, stats in model_header["models"].items():
+        rows[target] = {k: (json.dumps(v) if isinstance(v, (dict, list)) else v) for k, v in stats.items()}
+    return pd.DataFrame.from_dict(rows, orient="index")
+
+
+def bundle_tables(df_hist, df_fore, bands, scenarios, model_header, scenario_forecasts=None):
+    """``{sheet name: DataFrame}`` of everything a full export contains.
+
+    History is in logs as stored; forecasts, intervals and scenario
+    forecasts are revenue levels in PKR billion.
+    """
+    forecast = df_fore / 1000
+    forecast.index = forecast.index.astype(str)
+    forecast["total"] = forecast.sum(axis=1)
+    tables = {
+        "history": df_hist,
+        "forecast": forecast,
+        "intervals": interval_table({k: v / 1000 for k, v in bands.items()}),
+        "assumptions": pd.DataFrame([
+            {"variable": k, "type": v["type"], "value": json.dumps(v["value"], default=float)}
+            for k, v in scenarios.items()
+        ]),
+        "models": model_table(model_header),
+    }
+    if scenario_forecasts is not None:
+        tables["scenario_forecasts"] = scenario_forecasts
+    return tables
+
+
+def bundle_files(tables, metadata):
+    """Zip layout of a bundle: one CSV per table plus metadata.json"""
+    files = {f"{name}.csv": frame for name, frame in tables.items()}
+    files["metadata.json"] = metadata
+    return files
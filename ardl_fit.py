@@ -0,0 +1,187 @@
+"""Direct NumPy estimation of ARDL models.
+
+Rebuilds the lagged design matrix for each target's selected order and
+solves it by least squares, reproducing statsmodels' ARDL estimates (same
+hold-back, parameter order and information criteria) without the
+statsmodels fit machinery. Used to re-estimate the models on uploaded
+datasets inside the dashboard.
+"""
+import ast
+
+import numpy as np
+
+from ardl_engine import compile_params, parse_param_name, stack_residuals
+
+
+def parse_order(selected_order):
+    """Exogenous lag order ``{var: [lags]}`` from the metadata string or dict"""
+    order = ast.literal_eval(selected_order) if isinstance(selected_order, str) else dict(selected_order)
+    return {var: sorted(int(l) for l in np.atleast_1d(lags)) for var, lags in order.items()}
+
+
+def ar_lags_from_params(target, params):
+    """Autoregressive lags present in a fitted parameter dict"""
+    lags = []
+    for name in params:
+        var, lag = parse_param_name(name)
+        if var == target:
+            lags.append(lag)
+    return sorted(lags)
+
+
+def model_spec(target, meta):
+    """(ar_lags, exog_order) of a target as recorded in the metadata"""
+    entry = meta[target]
+    return ar_lags_from_params(target, entry["params"]), parse_order(entry["selected_order"])
+
+
+def param_names(target, ar_lags, exog_order):
+    """Parameter labels in statsmodels order: const, own lags, then regressors"""
+    names = ["const"] + [f"{target}.L{l}" for l in ar_lags]
+    for var, lags in exog_order.items():
+        names += [f"{var}.L{l}" for l in lags]
+    return names
+
+
+def max_lag(ar_lags, exog_order):
+    return max([0] + list(ar_lags) + [l for lags in exog_order.values() for l in lags])
+
+
+def design_matrix(df, target, ar_lags, exog_order, hold_back=None):
+    """Lagged regressor matrix X, response y and parameter names.
+
+    The first ``hold_back`` rows (default: the largest lag) only supply lags,
+    matching statsmodels' ARDL sample.
+    """
+    hold_back = max_lag(ar_lags, exog_order) if hold_back is None else hold_back
+    n = len(df) - hold_back
+    if n <= 0:
+        raise ValueError(f"Not enough observations to estimate {target} (need more than {hold_back})")
+    y_full = df[target].to_numpy(dtype=np.float64)
+    cols = [np.ones(n)]
+    cols += [y_full[hold_back - l:len(df) - l] for l in ar_lags]
+    for var, lags in exog_order.items():
+        x_full = df[var].to_numpy(dtype=np.float64)
+        cols += [x_full[hold_back - l:len(df) - l] for l in lags]
+    X = np.column_stack(cols)
+    y = y_full[hold_back:]
+    if not (np.isfinite(X).all() and np.isfinite(y).all()):
+        raise ValueError(f"Missing or non-finite values in the estimation sample for {target}")
+    return X, y, param_names(target, ar_lags, exog_order)
+
+
+def reported_nobs(n_rows, ar_lags, exog_order):
+    """Observation count statsmodels ARDL reports for a fit on ``n_rows`` rows.
+
+    statsmodels only holds back the own lags when counting, so a regressor
+    lag longer than the longest own lag adds rows to ``nobs`` (and to the
+    likelihood built on it) that the least-squares fit never used.
+    """
+    return n_rows + max_lag(ar_lags, exog_order) - max([0] + list(ar_lags))
+
+
+def fit_statistics(ssr, yty, nobs, n_params):
+    """Likelihood, information criteria and R-squared as reported by statsmodels ARDL
+
+    ``nobs`` is the reported count (see ``reported_nobs``).
+    """
+    sigma2 = ssr / nobs
+    llf = -0.5 * nobs * (np.log(2 * np.pi) + np.log(sigma2) + 1)
+    # statsmodels ARDL treats the constant as a deterministic term, so its
+    # R-squared is computed against the uncentered total sum of squares
+    rsquared = 1.0 - ssr / yty
+    return {
+        "nobs": nobs,
+        "sigma2": float(sigma2),
+        "llf": float(llf),
+        "aic": float(-2 * llf + 2 * (n_params + 1)),
+        "bic": float(-2 * llf + np.log(nobs) * (n_params + 1)),
+        "rsquared": float(rsquared),
+        "rsquared_adj": float(1.0 - (1.0 - rsquared) * (nobs - 1) / (nobs - n_params)),
+    }
+
+
+def fit_ols(X, y):
+    """Least-squares coefficients and residuals via LAPACK ``lstsq``"""
+    beta, _, rank, _ = np.linalg.lstsq(X, y, rcond=None)
+    if rank < X.shape[1]:
+        raise ValueError("Design matrix is rank deficient")
+    return beta, y - X @ beta
+
+
+def fit_target(df, target, ar_lags, exog_order):
+    """Estimate one ARDL model; returns (params dict, residuals, statistics)"""
+    X, y, names = design_matrix(df, target, ar_lags, exog_order)
+    beta, resid = fit_ols(X, y)
+    nobs = reported_nobs(len(y), ar_lags, exog_order)
+    stats = fit_statistics(float(resid @ resid), float(y @ y), nobs, len(names))
+    return dict(zip(names, beta.tolist())), resid, stats
+
+
+def sufficient_statistics(X, y):
+    """X'X, X'y, y'y and n: everything OLS needs to be re-solved later"""
+    return {"xtx": X.T @ X, "xty": X.T @ y, "yty": float(y @ y), "nobs": len(y)}
+
+
+def update_statistics(suff, x_row, y_value):
+    """Sufficient statistics with one more observation (a rank-one update of X'X)"""
+    return {
+        "xtx": suff["xtx"] + np.outer(x_row, x_row),
+        "xty": suff["xty"] + x_row * y_value,
+        "yty": suff["yty"] + y_value * y_value,
+        "nobs": suff["nobs"] + 1,
+    }
+
+
+def solve_statistics(suff):
+    """OLS coefficients and residual sum of squares from sufficient statistics"""
+    # Equilibrate X'X before factoring; lagged levels make it badly scaled
+    scale = 1.0 / np.sqrt(np.diag(suff["xtx"]))
+    try:
+        factor = np.linalg.cholesky(suff["xtx"] * np.outer(scale, scale))
+    except np.linalg.LinAlgError:
+        raise ValueError("Design matrix is rank deficient")
+    beta = scale * np.linalg.solve(factor.T, np.linalg.solve(factor, scale * suff["xty"]))
+    # SSR = y'y - b'X'y; clipped as rounding can push a near-perfect fit below zero
+    return beta, max(suff["yty"] - float(beta @ suff["xty"]), 0.0)
+
+
+def batched_solver(xtx):
+    """Solve function for a stack of normal equations X'X (B, k, k).
+
+    Each system is equilibrated and inverted with a pseudo-inverse, so a
+    regressor that is constant within one system (e.g. a break dummy before
+    its break) gets a zero coefficient instead of failing. The returned
+    function maps right-hand sides (B, k) to solutions (B, k); callers apply
+    it to X'y and then to X'r of the residuals for iterative refinement.
+    """
+    diag = np.einsum("bkk->bk", xtx)
+    scale = np.where(diag > 0, 1.0 / np.sqrt(np.where(diag > 0, diag, 1.0)), 1.0)
+    inverse = np.linalg.pinv(xtx * scale[:, :, None] * scale[:, None, :], rcond=1e-15)
+
+    def solve(rhs):
+        return scale * np.einsum("bkj,bj->bk", inverse, scale * rhs)
+
+    return solve
+
+
+def refit_models(df, meta, targets, exog_names):
+    """Re-estimate every target on ``df`` with its metadata lag order.
+
+    Returns (engine, header) in the same shape as a loaded artifact, with the
+    lag state taken from the end of ``df``.
+    """
+    params = {}
+    resids = []
+    models = {}
+    for t in targets:
+        ar_lags, exog_order = model_spec(t, meta)
+        p, resid, stats = fit_target(df, t, ar_lags, exog_order)
+        params[t] = p
+        resids.append(resid)
+        models[t] = dict(selected_order=str(exog_order), params=p, **stats)
+    sigma2 = [models[t]["sigma2"] for t in targets]
+    engine = compile_params(params, df, exog_names, resid=stack_residuals(resids), sigma2=sigma2)
+    engine.impulse_responses()
+    header = {"targets": list(targets), "exog_names": list(exog_names), "models": models}
+    return engine, header
@@ -0,0 +1,145 @@
+"""Dataset ingestion for Excel, CSV, Parquet and Arrow IPC/Feather files.
+
+Every format is converted once into the canonical frame the dashboard
+expects: a sorted annual ``PeriodIndex`` (falling back to the native
+period frequency for sub-annual data), float64 numeric columns and string
+text columns. Uploads are identified by a content hash so the same bytes
+are only parsed once, whatever the file is called.
+"""
+import hashlib
+import io
+import os
+
+import numpy as np
+import pandas as pd
+
+FORMATS = {
+    ".xlsx": "excel",
+    ".xls": "excel",
+    ".csv": "csv",
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".feather": "arrow",
+    ".arrow": "arrow",
+    ".ipc": "arrow",
+}
+UPLOAD_TYPES = [ext.lstrip(".") for ext in FORMATS]
+
+
+def content_hash(data):
+    """Content hash of raw file bytes used to deduplicate uploads"""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def detect_format(name):
+    ext = os.path.splitext(name)[1].lower()
+    if ext not in FORMATS:
+        raise ValueError(f"Unsupported file type '{ext}' (expected one of {', '.join(UPLOAD_TYPES)})")
+    return FORMATS[ext]
+
+
+def _read_arrow(buffer):
+    import pyarrow.ipc as ipc
+
+    try:
+        table = ipc.open_file(buffer).read_all()
+    except Exception:
+        buffer.seek(0)
+        table = ipc.open_stream(buffer).read_all()
+    return table.to_pandas()
+
+
+def read_table(data, name):
+    """Parse raw bytes according to the file extension of ``name``"""
+    fmt = detect_format(name)
+    buffer = io.BytesIO(data)
+    if fmt == "excel":
+        return pd.read_excel(buffer, index_col=0)
+    if fmt == "csv":
+        return pd.read_csv(buffer, index_col=0)
+    df = pd.read_parquet(buffer) if fmt == "parquet" else _read_arrow(buffer)
+    if _is_default_index(df.index) and len(df.columns):
+        # Files written without an index carry the period as the first column
+        df = df.set_index(df.columns[0])
+    return df
+
+
+def _is_default_index(index):
+    return isinstance(index, pd.RangeIndex) and index.name is None and index.start == 0 and index.step == 1
+
+
+# Offset classes inferred from timestamps and the period frequency they label
+PERIOD_ALIASES = (
+    ((pd.offsets.YearBegin, pd.offsets.YearEnd, pd.offsets.BYearBegin, pd.offsets.BYearEnd), "Y"),
+    ((pd.offsets.QuarterBegin, pd.offsets.QuarterEnd, pd.offsets.BQuarterBegin, pd.offsets.BQuarterEnd), "Q"),
+    ((pd.offsets.MonthBegin, pd.offsets.MonthEnd, pd.offsets.BusinessMonthBegin, pd.offsets.BusinessMonthEnd), "M"),
+    ((pd.offsets.Week,), "W"),
+    ((pd.offsets.Day, pd.offsets.BusinessDay), "D"),
+    ((pd.offsets.Hour,), "h"),
+    ((pd.offsets.Minute,), "min"),
+    ((pd.offsets.Second,), "s"),
+)
+
+
+def _period_alias(stamps):
+    """Period frequency for timestamps, e.g. "QS-OCT" -> "Q"; monthly when it cannot be inferred"""
+    inferred = pd.infer_freq(stamps)
+    if inferred is None:
+        return "M"
+    offset = pd.tseries.frequencies.to_offset(inferred)
+    for offsets, alias in PERIOD_ALIASES:
+        if isinstance(offset, offsets):
+            return alias
+    return "M"
+
+
+def _to_period_index(index):
+    """Annual PeriodIndex where possible, else the index's own period frequency"""
+    if isinstance(index, pd.PeriodIndex):
+        return index
+    try:
+        annual = pd.PeriodIndex(index, freq="Y")
+        if not annual.has_duplicates or index.has_duplicates:
+            return annual
+    except Exception:
+        pass
+    try:
+        stamps = pd.DatetimeIndex(pd.to_datetime(index, format="mixed"))
+        return stamps.to_period(_period_alias(stamps))
+    except Exception:
+        return index
+
+
+def canonicalize(df):
+    """Canonical typed frame: period index, float64 numerics, string text columns"""
+    df = df.copy()
+    df.index = _to_period_index(df.index)
+    for col in df.columns:
+        if pd.api.types.is_bool_dtype(df[col]) or pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = df[col].astype(np.float64)
+        else:
+            df[col] = df[col].astype("string")
+    if not df.index.is_monotonic_increasing:
+        df = df.sort_index()
+    return df
+
+
+def load_dataset(data, name):
+    """Parse and canonicalize an uploaded file; returns (df, error) like the Excel loader"""
+    try:
+        df = canonicalize(read_table(data, name))
+    except Exception as e:
+        return None, str(e)
+    if len(df.select_dtypes(include=[np.number]).columns) == 0:
+        return None, "File must contain numeric data columns"
+    return df, None
+
+
+def load_dataset_file(path):
+    """Read a dataset from disk through the same canonical path as uploads"""
+    with open(path, "rb") as f:
+        data = f.read()
+    df, error = load_dataset(data, os.path.basename(path))
+    if error:
+        raise ValueError(f"Could not load {path}: {error}")
+    return df
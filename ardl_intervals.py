@@ -0,0 +1,93 @@
+"""Closed-form prediction intervals for the compiled ARDL engine.
+
+With regressor paths given, an h-step log forecast error is a moving
+average of the future shocks, e_h = sum_j psi_j u_{h-j}, whose psi weights
+come from each target's own-lag polynomial. Its variance (and the
+covariance between targets, from the residual cross-covariance) therefore
+has a closed form. Log forecasts are normal, so revenue levels are
+lognormal: the reported point forecast is the lognormal mean
+exp(mu + var / 2), and total revenue is approximated by a single lognormal
+with the same mean and variance (Fenton-Wilkinson).
+"""
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+from ardl_simulation import DEFAULT_PERCENTILES, shock_covariance
+
+
+def psi_weights(engine, horizon):
+    """Moving-average weights (H, T) of each target's shocks; psi_0 = 1"""
+    psi = np.zeros((horizon, len(engine.targets)))
+    psi[0] = 1.0
+    for h in range(1, horizon):
+        for i in range(min(engine.ar_order, h)):
+            psi[h] += engine.ar[:, i] * psi[h - i - 1]
+    return psi
+
+
+def forecast_error_covariance(engine, horizon):
+    """Covariance (H, T, T) of the 1..H-step log forecast errors across targets"""
+    psi = psi_weights(engine, horizon)
+    return np.cumsum(psi[:, :, None] * psi[:, None, :], axis=0) * shock_covariance(engine)
+
+
+def lognormal_moments(mu, cov):
+    """Mean (..., H, T) of exp(log forecast) and covariance (..., H, T, T) of the levels"""
+    var = np.einsum("htt->ht", cov)
+    mean = np.exp(mu + var / 2)
+    return mean, mean[..., :, None] * mean[..., None, :] * np.expm1(cov)
+
+
+def z_scores(percentiles=DEFAULT_PERCENTILES):
+    """Standard normal quantiles of ``percentiles``"""
+    return np.array([NormalDist().inv_cdf(p / 100) for p in percentiles])
+
+
+def sum_quantiles(mean, var, percentiles=DEFAULT_PERCENTILES):
+    """Quantiles (..., P) of a sum of lognormals from its mean and variance (...).
+
+    Fenton-Wilkinson: the sum is approximated by the single lognormal with
+    the same mean and variance.
+    """
+    s2 = np.log1p(var / mean ** 2)
+    m = np.log(mean) - s2 / 2
+    return np.exp(m[..., None] + np.sqrt(s2)[..., None] * z_scores(percentiles))
+
+
+def sum_band(mean, var, index=None, percentiles=DEFAULT_PERCENTILES):
+    """Band of a sum of lognormals from its mean and variance (H,)"""
+    band = pd.DataFrame(sum_quantiles(mean, var, percentiles), index=index, columns=list(percentiles))
+    band["mean"] = mean
+    return band
+
+
+def analytic_bands(engine, exog, index=None, percentiles=DEFAULT_PERCENTILES):
+    """Percentile bands and lognormal means per target and for total revenue.
+
+    Returns ``{name: DataFrame}`` shaped like the Monte Carlo bands (one row
+    per forecast year, one column per percentile) plus a ``"mean"`` column.
+    """
+    exog = np.asarray(exog, dtype=np.float64)
+    mu = engine.forecast(exog)
+    cov = forecast_error_covariance(engine, exog.shape[0])
+    sd = np.sqrt(np.einsum("htt->ht", cov))
+    mean, level_cov = lognormal_moments(mu, cov)
+    z = z_scores(percentiles)
+
+    bands = {}
+    for i, t in enumerate(engine.targets):
+        q = np.exp(mu[:, i, None] + sd[:, i, None] * z)
+        bands[t] = pd.DataFrame(q, index=index, columns=list(percentiles))
+        bands[t]["mean"] = mean[:, i]
+
+    bands["total"] = sum_band(mean.sum(axis=1), level_cov.sum(axis=(1, 2)), index=index, percentiles=percentiles)
+    return bands
+
+
+def mean_forecast(engine, exog):
+    """Bias-corrected level forecasts (..., H, T): exp(mu + var / 2)"""
+    exog = np.asarray(exog, dtype=np.float64)
+    var = np.einsum("htt->ht", forecast_error_covariance(engine, exog.shape[-2]))
+    return np.exp(engine.forecast(exog) + var / 2)
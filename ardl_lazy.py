@@ -0,0 +1,109 @@
+"""Deferred imports and cold-start measurement for the dashboard.
+
+Heavy modules (plotly, statsmodels, scipy) are wrapped in proxies that
+import on first attribute access, so a rerun only pays for the modules the
+visible view actually uses.
+
+Measure cold-start import cost in fresh interpreters with::
+
+    python ardl_lazy.py [--out startup_timings.jsonl]
+"""
+import argparse
+import importlib
+import json
+import platform
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+# Recorded when the dashboard process first imports this module
+PROCESS_T0 = time.perf_counter()
+STARTUP_MARKS = {}
+_marks_lock = threading.Lock()
+
+HEAVY_MODULES = (
+    "plotly.graph_objects",
+    "plotly.express",
+    "plotly.subplots",
+    "statsmodels.api",
+    "scipy.stats",
+)
+STARTUP_PROBES = HEAVY_MODULES + ("pandas", "streamlit", "ardl_artifacts")
+
+
+class LazyModule:
+    """Module proxy that imports ``name`` the first time an attribute is read"""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "deferred"
+        return f"<LazyModule {self._name} ({state})>"
+
+
+def lazy_import(name):
+    """Return the module if already imported, otherwise a deferred proxy"""
+    if name in sys.modules:
+        return sys.modules[name]
+    return LazyModule(name)
+
+
+def loaded_heavy_modules():
+    """Heavy modules that have been imported in this process so far"""
+    return [name for name in HEAVY_MODULES if name in sys.modules]
+
+
+def mark_startup(stage):
+    """Record seconds since process start the first time ``stage`` is reached"""
+    with _marks_lock:
+        if stage not in STARTUP_MARKS:
+            STARTUP_MARKS[stage] = time.perf_counter() - PROCESS_T0
+    return STARTUP_MARKS[stage]
+
+
+def probe_import_time(module):
+    """Seconds to import ``module`` in a fresh interpreter"""
+    code = (
+        "import time; t = time.perf_counter(); "
+        f"import {module}; print(time.perf_counter() - t)"
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def measure_cold_start(modules=STARTUP_PROBES, repeat=3):
+    """Best-of-``repeat`` cold import time per module plus container identity"""
+    timings = {m: min(probe_import_time(m) for _ in range(repeat)) for m in modules}
+    return {
+        "host": socket.gethostname(),
+        "python": platform.python_version(),
+        "timestamp": time.time(),
+        "import_seconds": timings,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure dashboard cold-start import cost")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--out", help="append the JSON record to this file (one record per line)")
+    args = parser.parse_args()
+
+    record = measure_cold_start(repeat=args.repeat)
+    line = json.dumps(record)
+    if args.out:
+        with open(args.out, "a") as f:
+            f.write(line + "\n")
+    print(json.dumps(record, indent=2))
+
+
+if __name__ == "__main__":
+    main()
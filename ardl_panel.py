@@ -0,0 +1,373 @@
+"""Panel forecasting: one ARDL model set per entity (province, collectorate, ...).
+
+A panel dataset is the canonical frame with an extra entity column
+(``entity``, ``region``, ``province`` or ``collectorate``) and one row per
+entity and period, consecutive within each entity. Entities may start in
+different periods but must all end in the same one. Every entity gets its
+own estimates with the lag orders recorded in the metadata.
+
+Nothing loops over entities on the hot paths. Per target, the lagged
+design of all entities is built in one vectorized pass into a zero-padded
+(E, n, k) stack, and all entities are solved together. Padding rows are
+zero, so they leave every entity's least-squares solution untouched.
+``PanelEngine`` then runs the lag recursion for all entities x targets in
+one array pass. Forecasts roll up to national totals by summing levels::
+
+    python ardl_panel.py --data provinces.csv --horizon 3 --out panel_forecast.csv
+"""
+import argparse
+import json
+
+import numpy as np
+import pandas as pd
+
+from ardl_engine import ForecastEngine, parse_param_name, stack_residuals
+from ardl_fit import batched_solver, fit_statistics, max_lag, model_spec, param_names, reported_nobs
+from ardl_ingest import load_dataset_file
+from ardl_intervals import sum_band
+from ardl_scenarios import build_exog_paths, default_scenarios, future_period_index
+from ardl_simulation import DEFAULT_PERCENTILES
+
+ENTITY_COLUMNS = ("entity", "region", "province", "collectorate")
+ROLLUP = "National roll-up"
+
+
+def entity_column(df):
+    """Name of the entity key column of a panel dataset, or None"""
+    for col in ENTITY_COLUMNS:
+        if col in df.columns:
+            return col
+    return None
+
+
+def panel_layout(panel, entity_col):
+    """Sort a panel by entity and period.
+
+    Returns (sorted frame, entity names, entity code per row, position of
+    each row within its entity, rows per entity). Raises ValueError when an
+    entity skips or repeats a period, as its lags would pair up the wrong
+    rows, or ends before the others, as every forecast starts from the same
+    period and is summed under the same years.
+    """
+    codes, entities = pd.factorize(panel[entity_col], sort=True)
+    periods = panel.index.asi8 if hasattr(panel.index, "asi8") else np.arange(len(panel))
+    order = np.lexsort((periods, codes))
+    codes = codes[order]
+    counts = np.bincount(codes, minlength=len(entities))
+    if isinstance(panel.index, pd.PeriodIndex):
+        # Period ordinals step by one between consecutive rows of an entity
+        broken = (codes[1:] == codes[:-1]) & (np.diff(periods[order]) != 1)
+        if broken.any():
+            bad = np.unique(codes[1:][broken])
+            raise ValueError(f"Missing or repeated periods for "
+                             f"{', '.join(str(e) for e in entities[bad][:5])}")
+        last = panel.index[order][np.cumsum(counts) - 1]
+        early = np.flatnonzero(last < last.max())
+        if len(early):
+            raise ValueError(f"Every entity must run to {last.max()}, but these end earlier: "
+                             f"{', '.join(f'{entities[e]} ({last[e]})' for e in early[:5])}")
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    pos = np.arange(len(order)) - starts[codes]
+    return panel.iloc[order], [str(e) for e in entities], codes, pos, counts
+
+
+def entity_history(panel, entity, entity_col=None):
+    """One entity's rows as an ordinary single-series dataset"""
+    entity_col = entity_col or entity_column(panel)
+    rows = panel[panel[entity_col] == entity].drop(columns=entity_col)
+    return rows.sort_index()
+
+
+def rollup_history(panel, targets, entity_col=None):
+    """National history: targets as log summed levels, regressors averaged.
+
+    Only periods observed for every entity are kept, so the roll-up does
+    not jump when entities enter or leave the panel.
+    """
+    entity_col = entity_col or entity_column(panel)
+    n_entities = panel[entity_col].nunique()
+    numeric = panel.drop(columns=entity_col).select_dtypes(include=[np.number])
+    grouped = numeric.groupby(level=0, sort=True)
+    complete = grouped.size() == n_entities
+    national = grouped.mean()[complete]
+    national[list(targets)] = np.log(np.exp(numeric[list(targets)]).groupby(level=0, sort=True).sum()[complete])
+    return national
+
+
+def _stacked_design(values, codes, pos, counts, target, ar_lags, exog_order, columns):
+    """Zero-padded design X (E, n, k) and response Y (E, n) of every entity"""
+    hold_back = max_lag(ar_lags, exog_order)
+    rows = np.nonzero(pos >= hold_back)[0]
+    n_entities = len(counts)
+    n = max(int(counts.max()) - hold_back, 0)
+    col = {name: i for i, name in enumerate(columns)}
+    y_full = values[:, col[target]]
+    cols = [np.ones(len(rows))]
+    cols += [y_full[rows - l] for l in ar_lags]
+    for var, lags in exog_order.items():
+        cols += [values[rows - l, col[var]] for l in lags]
+    X = np.zeros((n_entities, n, len(cols)))
+    Y = np.zeros((n_entities, n))
+    X[codes[rows], pos[rows] - hold_back] = np.column_stack(cols)
+    Y[codes[rows], pos[rows] - hold_back] = y_full[rows]
+    return X, Y, counts - hold_back
+
+
+def fit_panel(panel, meta, targets, exog_names, entity_col=None, refine=2):
+    """Estimate every target for every entity; returns (PanelEngine, header).
+
+    The header keeps, per target, the parameter names, the coefficient
+    matrix (E, k), the zero-padded residuals (E, n) and per-entity fit
+    statistics as arrays.
+    """
+    entity_col = entity_col or entity_column(panel)
+    panel, entities, codes, pos, counts = panel_layout(panel, entity_col)
+    columns = list(targets) + [v for v in exog_names if v not in targets]
+    values = panel[columns].to_numpy(dtype=np.float64)
+
+    models = {}
+    for t in targets:
+        ar_lags, exog_order = model_spec(t, meta)
+        X, Y, nobs = _stacked_design(values, codes, pos, counts, t, ar_lags, exog_order, columns)
+        names = param_names(t, ar_lags, exog_order)
+        short = nobs <= len(names)
+        if short.any():
+            raise ValueError(f"Not enough observations to estimate {t} for "
+                             f"{', '.join(np.asarray(entities)[short][:5])}")
+        if not (np.isfinite(X).all() and np.isfinite(Y).all()):
+            bad = ~(np.isfinite(X).all(axis=(1, 2)) & np.isfinite(Y).all(axis=1))
+            raise ValueError(f"Missing or non-finite values in the estimation sample for {t} in "
+                             f"{', '.join(np.asarray(entities)[bad][:5])}")
+        solve = batched_solver(np.einsum("enk,enj->ekj", X, X))
+        coef = solve(np.einsum("enk,en->ek", X, Y))
+        for _ in range(refine):
+            coef = coef + solve(np.einsum("enk,en->ek", X, Y - np.einsum("enk,ek->en", X, coef)))
+        resid = Y - np.einsum("enk,ek->en", X, coef)
+        ssr = np.einsum("en,en->e", resid, resid)
+        yty = np.einsum("en,en->e", Y, Y)
+        models[t] = {
+            "selected_order": str(exog_order),
+            "names": names,
+            "coef": coef,
+            "resid": resid,
+            "nobs": nobs,
+            "reported_nobs": reported_nobs(nobs, ar_lags, exog_order),
+            "ssr": ssr,
+            "yty": yty,
+        }
+
+    engine = compile_panel(entities, targets, exog_names, models, values, counts, columns)
+    header = {"entity_column": entity_col, "entities": entities, "targets": list(targets),
+              "exog_names": list(exog_names), "models": models}
+    return engine, header
+
+
+def compile_panel(entities, targets, exog_names, models, values, counts, columns):
+    """PanelEngine from the stacked coefficients of ``fit_panel``"""
+    exog_pos = {name: k for k, name in enumerate(exog_names)}
+    parsed = {}
+    p = q = 0
+    for t in targets:
+        terms = []
+        for j, param in enumerate(models[t]["names"]):
+            name, lag = parse_param_name(param)
+            if name == "const":
+                terms.append((j, "const", None))
+            elif name == t:
+                p = max(p, lag)
+                terms.append((j, "ar", lag))
+            else:
+                q = max(q, lag)
+                terms.append((j, name, lag))
+        parsed[t] = terms
+
+    n_entities, n_targets = len(entities), len(targets)
+    const = np.zeros((n_entities, n_targets))
+    ar = np.zeros((n_entities, n_targets, p))
+    beta = np.zeros((n_entities, n_targets, len(exog_names), q + 1))
+    for i, t in enumerate(targets):
+        coef = models[t]["coef"]
+        for j, kind, lag in parsed[t]:
+            if kind == "const":
+                const[:, i] = coef[:, j]
+            elif kind == "ar":
+                ar[:, i, lag - 1] = coef[:, j]
+            else:
+                beta[:, i, exog_pos[kind], lag] = coef[:, j]
+
+    # Lag state: the last p target rows and last q regressor rows of each entity
+    ends = np.cumsum(counts)
+    col = {name: c for c, name in enumerate(columns)}
+    target_cols = [col[t] for t in targets]
+    exog_cols = [col[v] for v in exog_names]
+    y_hist = values[(ends[:, None] - p + np.arange(p))][:, :, target_cols]
+    x_hist = values[(ends[:, None] - q + np.arange(q))][:, :, exog_cols]
+    last_exog = values[ends - 1][:, exog_cols]
+    sigma2 = np.column_stack([models[t]["ssr"] / models[t]["reported_nobs"] for t in targets])
+    return PanelEngine(entities, targets, exog_names, const, ar, beta, y_hist, x_hist, last_exog, sigma2)
+
+
+class PanelEngine:
+    """Compiled ARDL models for many entities sharing targets and regressors.
+
+    Same layout as ``ForecastEngine`` with a leading entity axis:
+        const     (E, T)
+        ar        (E, T, p)
+        beta      (E, T, K, q + 1)
+        y_hist    (E, p, T)
+        x_hist    (E, q, K)
+        last_exog (E, K)    last observed regressor row per entity
+        sigma2    (E, T)    residual variance per entity and target
+    """
+
+    def __init__(self, entities, targets, exog_names, const, ar, beta, y_hist, x_hist, last_exog, sigma2):
+        self.entities = list(entities)
+        self.targets = list(targets)
+        self.exog_names = list(exog_names)
+        self.const = np.ascontiguousarray(const, dtype=np.float64)
+        self.ar = np.ascontiguousarray(ar, dtype=np.float64)
+        self.beta = np.ascontiguousarray(beta, dtype=np.float64)
+        self.y_hist = np.ascontiguousarray(y_hist, dtype=np.float64)
+        self.x_hist = np.ascontiguousarray(x_hist, dtype=np.float64)
+        self.last_exog = np.ascontiguousarray(last_exog, dtype=np.float64)
+        self.sigma2 = np.ascontiguousarray(sigma2, dtype=np.float64)
+
+    @property
+    def ar_order(self):
+        return self.ar.shape[2]
+
+    @property
+    def exog_order(self):
+        return self.beta.shape[3] - 1
+
+    def exog_contribution(self, exog):
+        """const + sum_j beta_j * x_{t-j} for regressor paths (..., E, H, K); returns (..., E, H, T)"""
+        exog = np.asarray(exog, dtype=np.float64)
+        horizon = exog.shape[-2]
+        q = self.exog_order
+        if q:
+            hist = np.broadcast_to(self.x_hist, exog.shape[:-2] + (q, exog.shape[-1]))
+            exog = np.concatenate([hist, exog], axis=-2)
+        out = np.broadcast_to(self.const[:, None, :], exog.shape[:-2] + (horizon, len(self.targets))).copy()
+        for lag in range(q + 1):
+            window = exog[..., q - lag:q - lag + horizon, :]
+            out += window @ self.beta[:, :, :, lag].transpose(0, 2, 1)
+        return out
+
+    def propagate(self, out):
+        """Autoregressive recursion in place over (..., E, H, T)"""
+        p = self.ar_order
+        for h in range(out.shape[-2]):
+            for i in range(p):
+                prev = out[..., h - i - 1, :] if h - i - 1 >= 0 else self.y_hist[:, p + h - i - 1]
+                out[..., h, :] += self.ar[:, :, i] * prev
+        return out
+
+    def forecast(self, exog):
+        """Log forecasts (..., E, H, T) of every entity and target"""
+        return self.propagate(self.exog_contribution(exog))
+
+    def forecast_variance(self, horizon):
+        """Variance (E, H, T) of the 1..H-step log forecast errors"""
+        psi = np.zeros((len(self.entities), horizon, len(self.targets)))
+        psi[:, 0] = 1.0
+        for h in range(1, horizon):
+            for i in range(min(self.ar_order, h)):
+                psi[:, h] += self.ar[:, :, i] * psi[:, h - i - 1]
+        return self.sigma2[:, None, :] * np.cumsum(psi ** 2, axis=1)
+
+    def mean_forecast(self, exog):
+        """Lognormal mean level forecasts (..., E, H, T)"""
+        exog = np.asarray(exog, dtype=np.float64)
+        return np.exp(self.forecast(exog) + self.forecast_variance(exog.shape[-2]) / 2)
+
+
+def panel_exog_paths(engine, scenarios, horizon):
+    """Regressor paths (E, H, K) of one scenario applied to every entity.
+
+    The scenario path is built once from a zero base; entities then differ
+    only by their own last value, which is added where a path builds on it
+    (growth specs and variables carried forward).
+    """
+    base = build_exog_paths(pd.Series(0.0, index=engine.exog_names), scenarios, engine.exog_names, horizon)[0]
+    anchored = np.array([v not in scenarios or scenarios[v]["type"] == "growth" for v in engine.exog_names])
+    return base[None] + np.where(anchored, engine.last_exog, 0.0)[:, None, :]
+
+
+def rollup_bands(engine, exog, index=None, percentiles=DEFAULT_PERCENTILES):
+    """National bands per target and for the total, summing entity forecasts.
+
+    Entity and target forecast errors are treated as independent; each sum
+    is matched to one lognormal (see ``sum_band``).
+    """
+    exog = np.asarray(exog, dtype=np.float64)
+    var = engine.forecast_variance(exog.shape[-2])
+    mean = np.exp(engine.forecast(exog) + var / 2)
+    level_var = mean ** 2 * np.expm1(var)
+    bands = {t: sum_band(mean[:, :, i].sum(axis=0), level_var[:, :, i].sum(axis=0), index=index,
+                         percentiles=percentiles)
+             for i, t in enumerate(engine.targets)}
+    bands["total"] = sum_band(mean.sum(axis=(0, 2)), level_var.sum(axis=(0, 2)), index=index,
+                              percentiles=percentiles)
+    return bands
+
+
+def entity_model(engine, header, entity):
+    """(ForecastEngine, header) of one entity, shaped like ``refit_models`` output"""
+    e = header["entities"].index(entity)
+    models = {}
+    resids = []
+    for t in header["targets"]:
+        m = header["models"][t]
+        nobs = int(m["nobs"][e])
+        params = dict(zip(m["names"], m["coef"][e].tolist()))
+        stats = fit_statistics(float(m["ssr"][e]), float(m["yty"][e]), int(m["reported_nobs"][e]), len(m["names"]))
+        models[t] = dict(selected_order=m["selected_order"], params=params, **stats)
+        resids.append(m["resid"][e, :nobs])
+    single = ForecastEngine(engine.targets, engine.exog_names, engine.const[e], engine.ar[e], engine.beta[e],
+                            engine.y_hist[e], engine.x_hist[e], resid=stack_residuals(resids),
+                            sigma2=engine.sigma2[e])
+    single.impulse_responses()
+    return single, {"targets": list(header["targets"]), "exog_names": list(header["exog_names"]), "models": models}
+
+
+def panel_forecast_frame(engine, levels, future_index):
+    """Long frame of level forecasts (E, H, T): one row per entity and year, plus the roll-up"""
+    n_entities, horizon, n_targets = levels.shape
+    frame = pd.DataFrame(levels.reshape(n_entities * horizon, n_targets), columns=engine.targets)
+    frame.insert(0, "year", np.tile(np.asarray(future_index.year), n_entities))
+    frame.insert(0, "entity", np.repeat(np.asarray(engine.entities, dtype=object), horizon))
+    national = pd.DataFrame(levels.sum(axis=0), columns=engine.targets)
+    national.insert(0, "year", np.asarray(future_index.year))
+    national.insert(0, "entity", ROLLUP)
+    frame = pd.concat([frame, national], ignore_index=True)
+    frame["total"] = frame[engine.targets].sum(axis=1)
+    return frame
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit and forecast ARDL models for every entity of a panel")
+    parser.add_argument("--data", required=True, help="panel dataset with an entity column")
+    parser.add_argument("--meta", default="ardl_tax_models_meta.json")
+    parser.add_argument("--horizon", type=int, default=3)
+    parser.add_argument("--out", default=None, help="write the forecasts to this CSV")
+    args = parser.parse_args()
+
+    with open(args.meta, "r") as f:
+        meta = json.load(f)
+    panel = load_dataset_file(args.data)
+    if entity_column(panel) is None:
+        raise SystemExit(f"{args.data} has no entity column (expected one of {', '.join(ENTITY_COLUMNS)})")
+    targets = [t for t in ("income_tax", "gst", "fed") if t in meta]
+    engine, _ = fit_panel(panel, meta, targets, meta["x_vars_used"])
+    scenarios = default_scenarios(panel.columns)
+    future_index = future_period_index(panel, args.horizon)
+    levels = engine.mean_forecast(panel_exog_paths(engine, scenarios, args.horizon))
+    frame = panel_forecast_frame(engine, levels, future_index)
+    print(frame[frame["entity"] == ROLLUP].to_string(index=False, float_format=lambda v: f"{v:,.1f}"))
+    if args.out:
+        frame.to_csv(args.out, index=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,475 @@
+"""ARDL lag-order selection pipeline that regenerates the model artifacts.
+
+For every target the search enumerates the own-lag order (1..maxlag) and,
+for each regressor in ``x_vars_used``, either excludes it or includes lags
+0..k for k up to ``maxorder``. All candidates share one maximal-lag design
+matrix on a common estimation sample, so its Gram matrix X'X and X'y are
+computed once. Candidates are visited depth-first, one regressor per level;
+each level extends the parent's Cholesky factor by a single block, and
+because a regressor's lag options are nested column prefixes the SSR of
+every option falls out of that one extension. Subtrees are spread over a
+process pool.
+
+The selected models are then refit on their own samples and written as the
+statsmodels pickle, the metadata JSON and the .npz artifact. The defaults
+(``--maxlag 1 --maxorder 1 --ic aic``) regenerate the shipped models; a
+wider search looks like::
+
+    python ardl_pipeline.py select --maxlag 4 --maxorder 3 --ic bic --out-prefix wide
+
+When new fiscal years are appended to the data, ``update`` folds them into
+the sufficient statistics (X'X, X'y, y'y, n) kept in the artifact, one
+rank-one update per row, and refreshes params, fit statistics and
+diagnostics in the artifact and metadata without a refit or lag search::
+
+    python ardl_pipeline.py update --data ardl_prepared_data.csv
+
+The statsmodels pickle is left as is, so its ``summary()`` keeps describing
+the last full fit.
+"""
+import argparse
+import json
+import os
+import pickle
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy.linalg.lapack import dpotrf, dtrtrs
+
+from ardl_artifacts import artifact_from_results, load_artifact, save_artifact, training_statistics
+from ardl_engine import compile_params, stack_residuals
+from ardl_fit import (design_matrix, fit_statistics, fit_target, max_lag, model_spec, reported_nobs,
+                      solve_statistics, update_statistics)
+from ardl_ingest import load_dataset_file
+
+DEFAULT_TARGETS = ["income_tax", "gst", "fed"]
+DEFAULT_ASSUMPTIONS_META = {
+    "Real_GDP_Growth": 0.03,
+    "Consumption_Growth": 0.04,
+    "Imports_Growth": 0.05,
+    "Inflation_Rate": 0.12,
+    "Unemployment_Rate": 6.5
+}
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# SHARED DESIGN
+# ═══════════════════════════════════════════════════════════════════════════
+def maximal_design(df, target, x_vars, maxlag, maxorder):
+    """Gram statistics of the maximal-lag design on the common sample.
+
+    Column layout: const, target.L1..L{maxlag}, then for each regressor
+    x.L0..L{maxorder}. Returns (G, g, yy, nobs).
+    """
+    hold_back = max(maxlag, maxorder)
+    n = len(df) - hold_back
+    y_full = df[target].to_numpy(dtype=np.float64)
+    cols = [np.ones(n)] + [y_full[hold_back - l:len(df) - l] for l in range(1, maxlag + 1)]
+    for var in x_vars:
+        x_full = df[var].to_numpy(dtype=np.float64)
+        cols += [x_full[hold_back - l:len(df) - l] for l in range(maxorder + 1)]
+    Z = np.column_stack(cols)
+    y = y_full[hold_back:]
+    return Z.T @ Z, Z.T @ y, float(y @ y), n
+
+
+def _extend(G, g, L, z, cols, start, stop):
+    """Extend the Cholesky factor ``L`` of ``cols`` by columns ``start:stop``.
+
+    Returns (L21, L22, z2) for the longest prefix of the new columns that
+    keeps the Gram matrix numerically positive definite (possibly empty), so
+    ``SSR = y'y - |z|^2 - cumsum(z2^2)`` for each prefix.
+    """
+    if cols:
+        L21, _ = dtrtrs(L, G[cols, start:stop], lower=1)
+        L21 = L21.T
+        rhs = g[start:stop] - L21 @ z
+        S = G[start:stop, start:stop] - L21 @ L21.T
+    else:
+        L21 = np.empty((stop - start, 0))
+        rhs = g[start:stop]
+        S = G[start:stop, start:stop]
+    L22, info = dpotrf(S, lower=1, clean=1)
+    m = stop - start if info == 0 else info - 1
+    # Treat a pivot that is tiny relative to its column as collinearity
+    tiny = np.flatnonzero(L22.diagonal()[:m] ** 2 <= 1e-10 * S.diagonal()[:m])
+    m = int(tiny[0]) if len(tiny) else m
+    if m == 0:
+        return L21[:0], L22[:0, :0], rhs[:0]
+    z2, _ = dtrtrs(L22[:m, :m], rhs[:m], lower=1)
+    return L21[:m], L22[:m, :m], z2
+
+
+def _criterion(ssr, nobs, n_params, ic):
+    llf = -0.5 * nobs * (np.log(2 * np.pi) + np.log(ssr / nobs) + 1)
+    penalty = 2.0 if ic == "aic" else np.log(nobs)
+    return -2 * llf + penalty * (n_params + 1)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# DEPTH-FIRST SEARCH
+# ═══════════════════════════════════════════════════════════════════════════
+def _search_subtree(args):
+    """Best candidate for one own-lag order; runs in a worker process"""
+    G, g, yy, nobs, n_vars, maxlag, maxorder, ar_order, ic, max_params = args
+    width = maxorder + 1
+    var_start = [1 + maxlag + j * width for j in range(n_vars)]
+    root_cols = list(range(ar_order + 1))
+    _, L, z = _extend(G, g, None, None, [], 0, len(root_cols))
+    if len(z) < len(root_cols) or len(root_cols) > max_params:
+        return None
+    # Depth-first order means a child only ever overwrites rows past its
+    # parent's, so every node's factor lives in the leading block of one buffer
+    L_buf = np.zeros((len(G), len(G)))
+    z_buf = np.zeros(len(G))
+    n = len(root_cols)
+    L_buf[:n, :n] = L
+    z_buf[:n] = z
+    best = {"ic": np.inf, "orders": None, "evaluated": 0}
+
+    def visit(depth, cols, orders):
+        n = len(cols)
+        z = z_buf[:n]
+        room = min(max_params, nobs - 1) - n
+        start = var_start[depth]
+        if room > 0:
+            L21, L22, z2 = _extend(G, g, L_buf[:n, :n], z, cols, start, start + min(width, room))
+        else:
+            z2 = np.empty(0)
+        # Option -1 excludes the regressor; option k keeps lags 0..k (a column prefix)
+        ssr = yy - z @ z - np.concatenate([[0.0], np.cumsum(z2 ** 2)])
+        if depth + 1 == n_vars:
+            ok = ssr > 0
+            n_params = n + np.arange(len(ssr))
+            values = np.where(ok, _criterion(np.where(ok, ssr, 1.0), nobs, n_params, ic), np.inf)
+            best["evaluated"] += int(ok.sum())
+            k = int(np.argmin(values))
+            if values[k] < best["ic"]:
+                best.update(ic=float(values[k]), orders=orders + (k - 1,))
+            return
+        visit(depth + 1, cols, orders + (-1,))
+        for k in range(len(z2)):
+            if ssr[k + 1] <= 0:
+                break
+            # Rewritten per option: the previous option's subtree reuses these rows
+            m = k + 1
+            L_buf[n:n + m, :n] = L21[:m]
+            L_buf[n:n + m, n:n + m] = L22[:m, :m]
+            z_buf[n:n + m] = z2[:m]
+            visit(depth + 1, cols + list(range(start, start + m)), orders + (k,))
+
+    visit(0, root_cols, ())
+    return {"ar_order": ar_order, **best}
+
+
+def select_order(df, target, x_vars, maxlag=4, maxorder=3, ic="bic", workers=None, max_params=None):
+    """Search every lag combination for ``target``.
+
+    ``max_params`` caps the number of coefficients (default: half the
+    estimation sample) so the criterion is not driven by saturated fits.
+
+    Returns (ar_lags, exog_order, n_candidates) where ``exog_order`` maps each
+    included regressor to its list of lags, as stored in ``selected_order``.
+    """
+    G, g, yy, nobs = maximal_design(df, target, x_vars, maxlag, maxorder)
+    max_params = nobs // 2 if max_params is None else max_params
+    tasks = [(G, g, yy, nobs, len(x_vars), maxlag, maxorder, p, ic, max_params) for p in range(1, maxlag + 1)]
+    if workers == 1:
+        results = [_search_subtree(t) for t in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_search_subtree, tasks))
+    results = [r for r in results if r is not None and r["orders"] is not None]
+    if not results:
+        raise ValueError(f"No estimable lag combination for {target}")
+    best = min(results, key=lambda r: r["ic"])
+    exog_order = {v: list(range(k + 1)) for v, k in zip(x_vars, best["orders"]) if k >= 0}
+    return list(range(1, best["ar_order"] + 1)), exog_order, sum(r["evaluated"] for r in results)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# ARTIFACT OUTPUT
+# ═══════════════════════════════════════════════════════════════════════════
+def stationarity_report(df, columns):
+    """ADF p-values in levels and first differences, as in the metadata"""
+    from statsmodels.tsa.stattools import adfuller
+
+    report = []
+    with warnings.catch_warnings():
+        # Constant or dummy series trigger rank/future warnings inside adfuller
+        warnings.simplefilter("ignore")
+        for col in columns:
+            level_p = float(adfuller(df[col].to_numpy(dtype=np.float64))[1])
+            diff_p = float(adfuller(np.diff(df[col].to_numpy(dtype=np.float64)))[1])
+            report.append({
+                "series": col,
+                "ADF level p": level_p,
+                "I(0) at 5%?": level_p < 0.05,
+                "ADF diff p": diff_p,
+                "I(1) at 5%?": diff_p < 0.05,
+                "Flag I(2) risk": not diff_p < 0.05,
+            })
+    return report
+
+
+def residual_diagnostics(resid, n_params):
+    """Jarque-Bera and CUSUM (OLS residual) statistics for the metadata"""
+    from statsmodels.stats.diagnostic import breaks_cusumolsresid
+    from statsmodels.stats.stattools import jarque_bera
+
+    jb_stat, jb_pvalue = jarque_bera(resid)[:2]
+    cusum_stat, cusum_pvalue = breaks_cusumolsresid(np.asarray(resid), ddof=n_params)[:2]
+    return {
+        "bg_lm_stat": None,
+        "bg_lm_pvalue": None,
+        "white_stat": None,
+        "white_pvalue": None,
+        "jb_stat": float(jb_stat),
+        "jb_pvalue": float(jb_pvalue),
+        "cusum_stat": float(cusum_stat),
+        "cusum_pvalue": float(cusum_pvalue),
+    }
+
+
+def fit_statsmodels(df, target, x_vars, ar_lags, exog_order):
+    """Fit the selected specification with statsmodels for the pickle"""
+    from statsmodels.tsa.ardl import ARDL
+
+    with warnings.catch_warnings():
+        # Regressors left out of the order are kept in exog, as in the original pickle
+        warnings.simplefilter("ignore")
+        model = ARDL(df[target], lags=ar_lags, exog=df[x_vars], order=exog_order, trend="c")
+        return model, model.fit()
+
+
+def build_meta(df, targets, x_vars, fits, base_meta=None):
+    """Metadata JSON in the schema the dashboard reads"""
+    base_meta = base_meta or {}
+    meta = {
+        "stationarity_report": stationarity_report(df, targets + x_vars),
+        "assumptions": base_meta.get("assumptions", DEFAULT_ASSUMPTIONS_META),
+        "x_vars_used": list(x_vars),
+        "log_transformed_cols": base_meta.get("log_transformed_cols", []),
+        "data_rows_used": len(df),
+        "index_start": str(df.index[0]),
+        "index_end": str(df.index[-1]),
+    }
+    for t in targets:
+        exog_order, params, resid, stats = fits[t]
+        meta[t] = {
+            "selected_order": str(exog_order),
+            "nobs": stats["nobs"],
+            "aic": stats["aic"],
+            "bic": stats["bic"],
+            "params": params,
+            "bounds_test": None,
+            "ecm_summary": None,
+            "diagnostics": residual_diagnostics(resid, len(params)),
+        }
+    return meta
+
+
+def run_selection(df, targets, x_vars, maxlag=4, maxorder=3, ic="bic", workers=None, max_params=None,
+                  base_meta=None, log=print):
+    """Select, refit and describe every target; returns (meta, models, results)"""
+    fits = {}
+    models = {}
+    results = {}
+    for t in targets:
+        start = time.perf_counter()
+        ar_lags, exog_order, n_candidates = select_order(df, t, x_vars, maxlag, maxorder, ic, workers, max_params)
+        params, resid, stats = fit_target(df, t, ar_lags, exog_order)
+        fits[t] = (exog_order, params, resid, stats)
+        models[t], results[t] = fit_statsmodels(df, t, x_vars, ar_lags, exog_order)
+        log(f"{t}: {n_candidates} candidates in {time.perf_counter() - start:.2f}s -> "
+            f"AR{ar_lags} {exog_order} ({ic}={stats[ic]:.2f})")
+    return build_meta(df, targets, x_vars, fits, base_meta), models, results
+
+
+def replace_outputs(writers):
+    """Run ``{path: write(tmp_path)}`` into temporary files, then move them all into place.
+
+    Nothing is replaced unless every writer succeeds, so a failed run
+    leaves the previous outputs as a consistent set.
+    """
+    tmp_paths = {path: f"{path}.tmp" for path in writers}
+    try:
+        for path, write in writers.items():
+            write(tmp_paths[path])
+    except BaseException:
+        for tmp in tmp_paths.values():
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        raise
+    for path, tmp in tmp_paths.items():
+        os.replace(tmp, path)
+
+
+def _write_pickle(obj):
+    def write(path):
+        with open(path, "wb") as f:
+            pickle.dump(obj, f)
+    return write
+
+
+def _write_json(obj):
+    def write(path):
+        with open(path, "w") as f:
+            json.dump(obj, f, indent=2)
+    return write
+
+
+def write_outputs(meta, models, results, prefix):
+    """Write <prefix>.pkl, <prefix>_meta.json and <prefix>.npz together"""
+    engine, header, training = artifact_from_results(results, meta["x_vars_used"], meta)
+    replace_outputs({
+        f"{prefix}.npz": lambda path: save_artifact(path, engine, header, training),
+        f"{prefix}.pkl": _write_pickle({"models": models, "results": results}),
+        f"{prefix}_meta.json": _write_json(meta),
+    })
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# INCREMENTAL UPDATE
+# ═══════════════════════════════════════════════════════════════════════════
+def new_observations(df, training):
+    """Number of rows ``df`` adds after the artifact's training sample.
+
+    The overlapping history must be unchanged, as the stored sufficient
+    statistics cannot take back an observation that has been revised.
+    """
+    n_old = len(training)
+    if len(df) <= n_old:
+        raise ValueError(f"No new observations: data has {len(df)} rows, the models were fit on {n_old}")
+    missing = [c for c in training.columns if c not in df.columns]
+    if missing:
+        raise ValueError(f"Data is missing model columns: {', '.join(missing)}")
+    overlap = df[list(training.columns)].iloc[:n_old]
+    if [str(i) for i in overlap.index] != [str(i) for i in training.index]:
+        raise ValueError("Data does not extend the training sample's periods; run 'select' for a full refit")
+    if not np.allclose(overlap.to_numpy(dtype=np.float64), training.to_numpy(dtype=np.float64),
+                       rtol=1e-10, atol=0.0, equal_nan=True):
+        raise ValueError("Historical values differ from the training sample; run 'select' for a full refit")
+    return len(df) - n_old
+
+
+def update_models(df, engine, header, training, meta):
+    """Fold the rows of ``df`` past the training sample into every model.
+
+    Returns the updated (engine, header, training, meta).
+    """
+    n_new = new_observations(df, training)
+    sufficient = header.get("sufficient") or training_statistics(training, header["models"])
+    models = {}
+    params = {}
+    resids = []
+    meta = dict(meta)
+    for t in header["targets"]:
+        ar_lags, exog_order = model_spec(t, header["models"])
+        # The estimate only needs the design rows of the new observations
+        hold_back = max_lag(ar_lags, exog_order)
+        X_new, y_new, names = design_matrix(df.iloc[-(n_new + hold_back):], t, ar_lags, exog_order, hold_back)
+        suff = sufficient[t]
+        for x_row, y_value in zip(X_new, y_new):
+            suff = update_statistics(suff, x_row, float(y_value))
+        beta, _ = solve_statistics(suff)
+        sufficient[t] = suff
+        params[t] = dict(zip(names, beta.tolist()))
+        # Residuals over the whole sample are one matrix-vector product for
+        # the diagnostics and fit statistics; they do not feed the estimate
+        X, y, _ = design_matrix(df, t, ar_lags, exog_order)
+        resid = y - X @ beta
+        nobs = reported_nobs(suff["nobs"], ar_lags, exog_order)
+        stats = fit_statistics(float(resid @ resid), suff["yty"], nobs, len(names))
+        resids.append(resid)
+        models[t] = dict(selected_order=header["models"][t]["selected_order"], params=params[t], **stats)
+        meta[t] = dict(
+            meta.get(t, {}),
+            nobs=stats["nobs"],
+            aic=stats["aic"],
+            bic=stats["bic"],
+            params=params[t],
+            diagnostics=residual_diagnostics(resid, len(names)),
+        )
+    sigma2 = [models[t]["sigma2"] for t in header["targets"]]
+    engine = compile_params(params, df, engine.exog_names, resid=stack_residuals(resids), sigma2=sigma2)
+    header = dict(header, models=models, sufficient=sufficient,
+                  incremental_rows=header.get("incremental_rows", 0) + n_new)
+    meta.update(data_rows_used=len(df), index_end=str(df.index[-1]))
+    return engine, header, df[list(training.columns)], meta
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ARDL model pipeline")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    select = sub.add_parser("select", help="search lag orders and regenerate the model artifacts")
+    select.add_argument("--data", default="ardl_prepared_data.csv")
+    select.add_argument("--meta", default="ardl_tax_models_meta.json",
+                        help="existing metadata to take targets/regressors/assumptions from")
+    select.add_argument("--targets", nargs="+")
+    select.add_argument("--x-vars", nargs="+")
+    # The defaults reproduce the shipped models
+    select.add_argument("--maxlag", type=int, default=1)
+    select.add_argument("--maxorder", type=int, default=1)
+    select.add_argument("--ic", choices=["aic", "bic"], default="aic")
+    select.add_argument("--max-params", type=int, default=None,
+                        help="largest number of coefficients per model (default: half the sample)")
+    select.add_argument("--workers", type=int, default=None)
+    select.add_argument("--out-prefix", default="ardl_tax_models")
+
+    update = sub.add_parser("update", help="fold newly appended rows into the fitted models")
+    update.add_argument("--data", default="ardl_prepared_data.csv")
+    update.add_argument("--artifact", default="ardl_tax_models.npz")
+    update.add_argument("--meta", default="ardl_tax_models_meta.json")
+    update.add_argument("--out-prefix", default=None,
+                        help="write <prefix>.npz/_meta.json instead of updating in place")
+    args = parser.parse_args()
+
+    if args.command == "update":
+        run_update(args)
+        return
+
+    base_meta = {}
+    if args.meta and os.path.exists(args.meta):
+        with open(args.meta, "r") as f:
+            base_meta = json.load(f)
+    df = load_dataset_file(args.data)
+    targets = args.targets or [t for t in DEFAULT_TARGETS if t in df.columns]
+    x_vars = args.x_vars or base_meta.get("x_vars_used")
+    if not x_vars:
+        parser.error("--x-vars is required when no existing metadata is available")
+
+    start = time.perf_counter()
+    meta, models, results = run_selection(
+        df, targets, x_vars, args.maxlag, args.maxorder, args.ic, args.workers, args.max_params, base_meta
+    )
+    write_outputs(meta, models, results, args.out_prefix)
+    print(f"Wrote {args.out_prefix}.pkl/.npz/_meta.json in {time.perf_counter() - start:.2f}s")
+
+
+def run_update(args):
+    start = time.perf_counter()
+    engine, header, training = load_artifact(args.artifact)
+    with open(args.meta, "r") as f:
+        meta = json.load(f)
+    df = load_dataset_file(args.data)
+    n_old = len(training)
+    engine, header, training, meta = update_models(df, engine, header, training, meta)
+    artifact_out = f"{args.out_prefix}.npz" if args.out_prefix else args.artifact
+    meta_out = f"{args.out_prefix}_meta.json" if args.out_prefix else args.meta
+    replace_outputs({
+        artifact_out: lambda path: save_artifact(path, engine, header, training),
+        meta_out: _write_json(meta),
+    })
+    for t in header["targets"]:
+        m = header["models"][t]
+        print(f"{t}: nobs {m['nobs']}, aic {m['aic']:.2f}, bic {m['bic']:.2f}")
+    print(f"Added {len(training) - n_old} observation(s) -> {artifact_out}, {meta_out} "
+          f"in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""Stage timing for dashboard reruns and the forecast service.
+
+A rerun is split into named stages: ingestion, model load, scenario build,
+forecast, aggregates, one stage per chart and table, and exports.
+``Profiler.stage`` times a block. Every stage keeps a rolling window of
+its recent durations, and the debug panel and the exports read
+percentiles from it. Timings stay in memory. They can be exported as
+JSON, or as Prometheus text exposition format together with the
+cold-start marks from ``ardl_lazy``::
+
+    profiler = Profiler()
+    profiler.begin_run()
+    with profiler.stage("forecast"):
+        ...
+    profiler.end_run()
+    print(profiler.to_prometheus())
+"""
+import functools
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+STAGE_WINDOW = 512
+QUANTILES = (50, 95, 99)
+RUN_STAGE = "rerun"
+
+
+class TimingWindow:
+    """Call count, error count, total time and a rolling window of recent durations"""
+
+    def __init__(self, size=STAGE_WINDOW):
+        self.samples = deque(maxlen=size)
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+
+    def record(self, seconds, ok=True):
+        self.samples.append(seconds)
+        self.count += 1
+        self.errors += not ok
+        self.total += seconds
+
+    def summary(self):
+        """Counts plus mean, percentiles and max of the window in milliseconds"""
+        summary = {"count": self.count, "errors": self.errors}
+        if self.samples:
+            ms = np.asarray(self.samples) * 1000
+            summary["mean_ms"] = float(ms.mean())
+            for q, value in zip(QUANTILES, np.percentile(ms, QUANTILES)):
+                summary[f"p{q}_ms"] = float(value)
+            summary["max_ms"] = float(ms.max())
+        return summary
+
+
+class Profiler:
+    """Thread-safe stage timings shared by every session of the process.
+
+    Each thread (one per Streamlit script run) also collects the stages of
+    its current run, so the debug panel can show this rerun's breakdown
+    next to the rolling percentiles.
+    """
+
+    def __init__(self, window=STAGE_WINDOW):
+        self.window = window
+        self.stages = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def record(self, name, seconds, ok=True):
+        with self._lock:
+            stage = self.stages.get(name)
+            if stage is None:
+                stage = self.stages[name] = TimingWindow(self.window)
+            stage.record(seconds, ok)
+        run = getattr(self._local, "run", None)
+        if run is not None:
+            run[name] = run.get(name, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, name):
+        """Time the enclosed block as stage ``name``; failed blocks count as errors"""
+        start = time.perf_counter()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self.record(name, time.perf_counter() - start, ok)
+
+    def timed(self, name=None):
+        """Decorator timing every call of a function as one stage"""
+        def decorate(func):
+            stage_name = name or func.__name__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.stage(stage_name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def begin_run(self):
+        """Start collecting this thread's stages as one run"""
+        self._local.run = {}
+        self._local.run_start = time.perf_counter()
+
+    def end_run(self, name=RUN_STAGE):
+        """Record the whole run as stage ``name``; returns its ``{stage: seconds}``"""
+        run = self.current_run()
+        start = getattr(self._local, "run_start", None)
+        if start is not None:
+            run[name] = time.perf_counter() - start
+            self.record(name, run[name])
+        self._local.run = None
+        self._local.run_start = None
+        return run
+
+    def current_run(self):
+        """``{stage: seconds}`` of this thread's run so far"""
+        return dict(getattr(self._local, "run", None) or {})
+
+    def summary(self):
+        """``{stage: TimingWindow.summary()}`` sorted by stage name"""
+        with self._lock:
+            return {name: self.stages[name].summary() for name in sorted(self.stages)}
+
+    def reset(self):
+        with self._lock:
+            self.stages.clear()
+
+    def to_dict(self, startup=None):
+        return {"timestamp": time.time(), "stages": self.summary(), "startup_seconds": dict(startup or {})}
+
+    def to_json(self, startup=None):
+        """Stage summaries and startup marks as a JSON document"""
+        return json.dumps(self.to_dict(startup), indent=2)
+
+    def to_prometheus(self, startup=None, prefix="ardl"):
+        """Stage timings as Prometheus summaries, startup marks as gauges"""
+        with self._lock:
+            stages = {name: (list(w.samples), w.count, w.errors, w.total) for name, w in sorted(self.stages.items())}
+        lines = [
+            f"# HELP {prefix}_stage_seconds Duration of each dashboard stage over its recent window",
+            f"# TYPE {prefix}_stage_seconds summary",
+        ]
+        for name, (samples, count, _, total) in stages.items():
+            label = _label(name)
+            if samples:
+                for q, value in zip(QUANTILES, np.percentile(samples, QUANTILES)):
+                    lines.append(f'{prefix}_stage_seconds{{stage="{label}",quantile="{q / 100:g}"}} {value:.6g}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{label}"}} {total:.6g}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{label}"}} {count}')
+        lines += [
+            f"# HELP {prefix}_stage_errors_total Stage runs that raised",
+            f"# TYPE {prefix}_stage_errors_total counter",
+        ]
+        lines += [f'{prefix}_stage_errors_total{{stage="{_label(name)}"}} {errors}'
+                  for name, (_, _, errors, _) in stages.items()]
+        if startup:
+            lines += [
+                f"# HELP {prefix}_startup_seconds Seconds from process start to each startup mark",
+                f"# TYPE {prefix}_startup_seconds gauge",
+            ]
+            lines += [f'{prefix}_startup_seconds{{mark="{_label(mark)}"}} {seconds:.6g}'
+                      for mark, seconds in startup.items()]
+        return "\n".join(lines) + "\n"
+
+
+def _label(value):
+    """Prometheus label value with backslashes, quotes and newlines escaped"""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -0,0 +1,196 @@
+"""Headless scenario evaluation on top of the vectorized forecast engine.
+
+A scenario is the sidebar ``scenarios`` dict: ``{var: {"type": ..., "value": ...}}``
+with ``growth`` (annual growth applied to a log series), ``level`` (rate held
+constant, entered as a fraction) and ``fixed`` (raw value) specs.
+"""
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from ardl_intervals import mean_forecast
+
+# Rates entered as fractions in the sidebar but stored in percent in the data
+PERCENT_VARS = ("inflation", "unemployment", "gdp_growth")
+
+# Assumption variables offered in the sidebar, with their default values and labels
+BASE_VARS = ["gdp_real", "imports_real", "consumption_real", "govexp", "gdp_growth", "inflation", "unemployment", "dummy_2014"]
+
+DEFAULT_ASSUMPTIONS = {
+    "gdp_real": 0.03,
+    "gdp_growth": 0.03,
+    "imports_real": 0.05,
+    "govexp": 0.05,
+    "inflation": 0.12,
+    "unemployment": 0.065
+}
+
+VAR_LABELS = {
+    "gdp_real": "Real GDP Growth Rate",
+    "gdp_growth": "GDP Growth Rate",
+    "imports_real": "Import Growth Rate",
+    "govexp": "Government Expenditure",
+    "inflation": "Inflation Rate",
+    "unemployment": "Unemployment Rate",
+    "consumption_real": "Consumption Growth"
+}
+
+
+def scenario_type(var):
+    """Spec type the dashboard uses for an assumption variable"""
+    if "dummy" in var:
+        return "fixed"
+    if "growth" in var or "inflation" in var or "unemployment" in var:
+        return "level"
+    return "growth"
+
+
+def default_scenarios(columns, values=None):
+    """Scenario dict for the assumption variables present in ``columns``.
+
+    ``values`` overrides the default value of any variable, either as a plain
+    number/path or as a full ``{"type": ..., "value": ...}`` spec.
+    """
+    values = values or {}
+    scenarios = {}
+    for v in BASE_VARS:
+        if v not in columns:
+            continue
+        kind = scenario_type(v)
+        default = 1 if kind == "fixed" else DEFAULT_ASSUMPTIONS.get(v, 0.0)
+        scenarios[v] = {"type": kind, "value": default}
+        override = values.get(v)
+        if isinstance(override, dict):
+            scenarios[v] = {"type": override.get("type", kind), "value": override["value"]}
+        elif override is not None:
+            scenarios[v]["value"] = override
+    return scenarios
+
+
+def future_period_index(df_hist, horizon):
+    """Annual PeriodIndex for the ``horizon`` years after the last observation"""
+    max_idx = df_hist.index.max()
+    try:
+        last_year = max_idx.year if hasattr(max_idx, "year") else int(max_idx)
+    except (TypeError, ValueError):
+        last_year = 2024
+    return pd.PeriodIndex([last_year + i for i in range(1, horizon + 1)], freq="Y")
+
+
+def scenario_grid(axes):
+    """Cartesian product of ``{var: values}`` as a DataFrame, one row per scenario"""
+    names = list(axes.keys())
+    rows = list(itertools.product(*(np.atleast_1d(axes[n]) for n in names)))
+    return pd.DataFrame(rows, columns=names, dtype=np.float64)
+
+
+def _grid_values(column):
+    """Grid column as (S, 1) per-scenario constants or (S, H) per-year paths"""
+    arr = np.asarray(column, dtype=np.float64)
+    return arr[:, None] if arr.ndim == 1 else arr
+
+
+def _spec_values(value):
+    """Spec value as a (1, 1) constant or a (1, H) per-year path"""
+    arr = np.asarray(value, dtype=np.float64)
+    return arr.reshape(1, -1)
+
+
+def build_exog_paths(last_row, scenarios, exog_names, horizon, grid=None):
+    """Future exogenous paths as one contiguous float64 array of shape (S, H, K).
+
+    ``scenarios`` supplies the spec type and value of each variable; a value
+    may be a constant or a length-H sequence giving one value per year.
+    ``grid`` (a DataFrame or ``{var: array}``) overrides values per scenario
+    with either an (S,) column of constants or an (S, H) array of paths.
+    Growth variables accumulate ``log1p(rate)`` with ``cumsum``; level and
+    fixed variables are broadcast. Variables without a spec are carried
+    forward from ``last_row``.
+    """
+    n_scen = 1
+    if grid is not None and len(grid):
+        n_scen = len(next(iter(grid.values())) if isinstance(grid, dict) else grid)
+    paths = np.empty((n_scen, horizon, len(exog_names)), dtype=np.float64)
+    for k, v in enumerate(exog_names):
+        last = float(last_row[v])
+        spec = scenarios.get(v)
+        if spec is None:
+            paths[:, :, k] = last
+            continue
+        if grid is not None and v in grid:
+            value = _grid_values(grid[v])
+        else:
+            value = _spec_values(spec["value"])
+        if value.shape[1] not in (1, horizon):
+            raise ValueError(f"Path for '{v}' has {value.shape[1]} years, expected {horizon}")
+        value = np.broadcast_to(value, (n_scen, horizon))
+        if spec["type"] == "growth":
+            np.cumsum(np.log1p(value), axis=1, out=paths[:, :, k])
+            paths[:, :, k] += last
+        elif spec["type"] == "level" and v in PERCENT_VARS:
+            paths[:, :, k] = value * 100.0
+        else:
+            paths[:, :, k] = value
+    return paths
+
+
+def forecast_frame(engine, df_hist, scenarios, horizon):
+    """Lognormal mean forecasts for one scenario as a DataFrame indexed by future year"""
+    exog = build_exog_paths(df_hist.iloc[-1], scenarios, engine.exog_names, horizon)[0]
+    return pd.DataFrame(
+        mean_forecast(engine, exog),
+        index=future_period_index(df_hist, horizon),
+        columns=engine.targets,
+    )
+
+
+def evaluate_grid(engine, last_row, scenarios, horizon, grid=None, levels=True):
+    """Forecast every scenario in one vectorized call.
+
+    Returns an array of shape (scenario, target, year). The year axis holds
+    every horizon from 1 to ``horizon``, so sweeping horizons needs no extra
+    work: an h-year forecast is the first h columns of the longest one.
+    Levels are lognormal means, as in the dashboard; ``levels=False`` gives
+    the log forecasts.
+    """
+    exog = build_exog_paths(last_row, scenarios, engine.exog_names, horizon, grid=grid)
+    preds = mean_forecast(engine, exog) if levels else engine.forecast(exog)
+    return np.ascontiguousarray(preds.transpose(0, 2, 1))
+
+
+def marginal_response(engine, last_row, scenarios, var, delta, horizon):
+    """Change in log forecasts (H, T) when assumption ``var`` moves by ``delta``.
+
+    ``delta`` is in the sidebar's units. The shift in the regressor paths is
+    mapped through the engine's dynamic multipliers, so no new forecast is
+    run; forecasts scale by ``exp`` of the result.
+    """
+    shifted = dict(scenarios)
+    shifted[var] = dict(scenarios[var], value=np.asarray(scenarios[var]["value"], dtype=np.float64) + delta)
+    names = engine.exog_names
+    delta_exog = (build_exog_paths(last_row, shifted, names, horizon)
+                  - build_exog_paths(last_row, scenarios, names, horizon))[0]
+    return engine.exog_response(delta_exog)
+
+
+def sensitivity_grid(scenarios, variables, delta=0.01):
+    """One-at-a-time sweep around ``scenarios`` for ``evaluate_grid``.
+
+    Returns (names, grid): the active scenario first, then every variable in
+    ``variables`` moved down and up by ``delta`` with the others unchanged.
+    """
+    names = ["active"]
+    shifts = [None]
+    for v in variables:
+        names += [f"{v} -{delta:g}", f"{v} +{delta:g}"]
+        shifts += [(v, -delta), (v, delta)]
+    grid = {}
+    for v in variables:
+        base = np.asarray(scenarios[v]["value"], dtype=np.float64)
+        column = np.repeat(base[None, ...], len(shifts), axis=0)
+        for row, shift in enumerate(shifts):
+            if shift is not None and shift[0] == v:
+                column[row] += shift[1]
+        grid[v] = column
+    return names, grid
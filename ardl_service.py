@@ -0,0 +1,396 @@
+"""Local HTTP forecast service.
+
+Loads the model artifact and the dataset once at startup and serves the
+dashboard's forecast path over HTTP, using only ``asyncio`` from the
+standard library::
+
+    GET  /health    model and queue status
+    GET  /metrics   request counts, latency percentiles and batch sizes
+    POST /forecast  scenario JSON -> forecasts, intervals and totals
+
+    python ardl_service.py --port 8765
+
+A forecast request is ``{"scenarios": {...}, "horizon": 3, "name": ...}``.
+``scenarios`` is shaped like the sidebar dict. Each variable may be a plain
+value (with the sidebar's spec type), a per-year list or a full
+``{"type": ..., "value": ...}`` spec. Unset variables keep the dashboard
+defaults. Levels are lognormal means in PKR billion, as on the dashboard.
+
+Concurrent requests are micro-batched. Requests that arrive within
+``max_wait`` seconds of each other, up to ``max_batch`` of them, share one
+forecast call and one interval computation.
+
+``ServiceClient`` calls the request handler in process, without sockets,
+for tests and notebooks::
+
+    async with ForecastService.from_files() as service:
+        status, body = await ServiceClient(service).post("/forecast", {"horizon": 5})
+"""
+import argparse
+import asyncio
+import json
+import time
+from collections import deque
+from http import HTTPStatus
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from ardl_aggregates import cagr
+from ardl_batch import load_inputs
+from ardl_intervals import forecast_error_covariance, lognormal_moments, sum_quantiles, z_scores
+from ardl_profiling import TimingWindow
+from ardl_scenarios import build_exog_paths, default_scenarios, future_period_index
+from ardl_simulation import DEFAULT_PERCENTILES
+
+MAX_HORIZON = 10
+DEFAULT_MAX_BATCH = 256
+DEFAULT_MAX_WAIT = 0.005
+LATENCY_WINDOW = 1024
+MAX_BODY_BYTES = 1 << 20
+SPEC_TYPES = ("growth", "level", "fixed")
+ROUTES = {"/health": "GET", "/metrics": "GET", "/forecast": "POST"}
+
+
+class ServiceError(Exception):
+    """Request error reported to the client with an HTTP status"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def encode_json(payload):
+    """Strict JSON body; NaN and infinities raise ValueError instead of producing invalid JSON"""
+    return json.dumps(payload, allow_nan=False).encode()
+
+
+class ForecastService:
+    """Forecast engine, dataset and request queue behind the HTTP routes"""
+
+    def __init__(self, engine, df_hist, max_batch=DEFAULT_MAX_BATCH, max_wait=DEFAULT_MAX_WAIT,
+                 percentiles=DEFAULT_PERCENTILES):
+        self.engine = engine
+        self.df_hist = df_hist
+        # plain floats: Series lookups dominate per-request path building
+        self.last_row = {v: float(df_hist[v].iloc[-1]) for v in engine.exog_names}
+        self.years = [int(y) for y in future_period_index(df_hist, MAX_HORIZON).year]
+        self.current_total = float(np.exp(df_hist[engine.targets].iloc[-1]).sum() / 1000)
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.percentiles = list(percentiles)
+        # forecast error covariance depends only on the horizon: the h-step table is a prefix
+        self.cov = forecast_error_covariance(engine, MAX_HORIZON)
+        self.z = z_scores(percentiles)
+        self.latency = {path: TimingWindow(LATENCY_WINDOW) for path in ROUTES}
+        self.batch_sizes = deque(maxlen=LATENCY_WINDOW)
+        self.batches = 0
+        self.started = time.time()
+        self.queue = None
+        self._worker = None
+
+    @classmethod
+    def from_files(cls, artifact_path="ardl_tax_models.npz", data_path="ardl_prepared_data.csv", **kwargs):
+        engine, df_hist = load_inputs(artifact_path, data_path)
+        return cls(engine, df_hist, **kwargs)
+
+    async def start(self):
+        """Start the batching worker on the running event loop"""
+        self.queue = asyncio.Queue()
+        self._worker = asyncio.create_task(self._batch_loop())
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # FORECASTS
+    # ═══════════════════════════════════════════════════════════════════════
+    def parse_request(self, payload):
+        """(name, exog (H, K), horizon) of a forecast request; ServiceError(400) if invalid"""
+        if not isinstance(payload, dict):
+            raise ServiceError(400, "Request body must be a JSON object")
+        horizon = payload.get("horizon", 3)
+        if not isinstance(horizon, int) or isinstance(horizon, bool) or not 1 <= horizon <= MAX_HORIZON:
+            raise ServiceError(400, f"'horizon' must be an integer from 1 to {MAX_HORIZON}")
+        values = payload.get("scenarios") or {}
+        if not isinstance(values, dict):
+            raise ServiceError(400, "'scenarios' must be an object of assumption variables")
+        for v, spec in values.items():
+            if not isinstance(spec, dict):
+                continue
+            if "value" not in spec:
+                raise ServiceError(400, f"Scenario spec for '{v}' needs a 'value'")
+            if spec.get("type", SPEC_TYPES[0]) not in SPEC_TYPES:
+                raise ServiceError(400, f"Unknown spec type '{spec['type']}' for '{v}' "
+                                        f"(expected one of {', '.join(SPEC_TYPES)})")
+        scenarios = default_scenarios(self.df_hist.columns, values)
+        unknown = sorted(set(values) - set(scenarios))
+        if unknown:
+            raise ServiceError(400, f"Unknown assumption variables: {', '.join(unknown)} "
+                                    f"(expected any of {', '.join(scenarios)})")
+        try:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                exog = build_exog_paths(self.last_row, scenarios, self.engine.exog_names, horizon)[0]
+        except (TypeError, ValueError) as e:
+            raise ServiceError(400, str(e))
+        finite = np.isfinite(exog).all(axis=0)
+        if not finite.all():
+            bad = [v for v, ok in zip(self.engine.exog_names, finite) if not ok]
+            raise ServiceError(400, f"Scenario values must be finite numbers (growth rates above -1) for "
+                                    f"{', '.join(bad)}")
+        return str(payload.get("name", "scenario")), exog, horizon
+
+    async def forecast(self, payload):
+        """Queue one request for the next batch and wait for its result"""
+        name, exog, horizon = self.parse_request(payload)
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((exog, future))
+        result = await future
+        return self.response(name, horizon, *result)
+
+    async def _batch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            self.batches += 1
+            self.batch_sizes.append(len(batch))
+            try:
+                results = self.evaluate([exog for exog, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    def evaluate(self, exogs):
+        """Lognormal means and interval quantiles of every request in one pass.
+
+        Paths shorter than the longest one are padded with their last row;
+        a forecast never depends on later years, so the padding is sliced
+        off again in ``response``. Returns one (mean (H, T), target
+        quantiles (H, T, P), total quantiles (H, P)) tuple per request.
+        """
+        horizon = max(len(x) for x in exogs)
+        exog = np.stack([np.pad(x, ((0, horizon - len(x)), (0, 0)), mode="edge") for x in exogs])
+        cov = self.cov[:horizon]
+        mu = self.engine.forecast(exog)
+        mean, level_cov = lognormal_moments(mu, cov)
+        sd = np.sqrt(np.einsum("htt->ht", cov))
+        target_q = np.exp(mu[..., None] + sd[..., None] * self.z)
+        total_q = sum_quantiles(mean.sum(axis=-1), level_cov.sum(axis=(-2, -1)), self.percentiles)
+        return [(mean[s] / 1000, target_q[s] / 1000, total_q[s] / 1000) for s in range(len(exogs))]
+
+    def response(self, name, horizon, mean, target_q, total_q):
+        """JSON body of one forecast: per-year levels, intervals and headline totals"""
+        mean, target_q, total_q = mean[:horizon], target_q[:horizon], total_q[:horizon]
+        total = mean.sum(axis=1)
+        labels = [f"p{p:g}" for p in self.percentiles]
+        intervals = {t: dict(zip(labels, target_q[:, i].T.tolist())) for i, t in enumerate(self.engine.targets)}
+        intervals["total"] = dict(zip(labels, total_q.T.tolist()))
+        forecast = {t: mean[:, i].tolist() for i, t in enumerate(self.engine.targets)}
+        forecast["total"] = total.tolist()
+        return {
+            "name": name,
+            "horizon": horizon,
+            "units": "PKR billion",
+            "years": self.years[:horizon],
+            "forecast": forecast,
+            "intervals": intervals,
+            "totals": {
+                "current": self.current_total,
+                "final_year": float(total[-1]),
+                "cumulative": float(total.sum()),
+                "cagr_pct": float(cagr(self.current_total, total[-1], horizon)),
+            },
+        }
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # ROUTES
+    # ═══════════════════════════════════════════════════════════════════════
+    def health(self):
+        return {
+            "status": "ok" if self._worker is not None and not self._worker.done() else "stopped",
+            "targets": self.engine.targets,
+            "exog": self.engine.exog_names,
+            "observations": len(self.df_hist),
+            "last_period": str(self.df_hist.index.max()),
+            "queue_depth": self.queue.qsize() if self.queue is not None else 0,
+            "uptime_s": time.time() - self.started,
+        }
+
+    def metrics(self):
+        sizes = np.asarray(self.batch_sizes)
+        return {
+            "uptime_s": time.time() - self.started,
+            "routes": {path: window.summary() for path, window in self.latency.items()},
+            "batches": {
+                "count": self.batches,
+                "mean_size": float(sizes.mean()) if len(sizes) else 0.0,
+                "max_size": int(sizes.max()) if len(sizes) else 0,
+            },
+            "queue_depth": self.queue.qsize() if self.queue is not None else 0,
+        }
+
+    async def handle(self, method, path, body=b""):
+        """(status, JSON response body) of one request"""
+        start = time.perf_counter()
+        status = 200
+        try:
+            if path not in ROUTES:
+                raise ServiceError(404, f"No route {path} (routes: {', '.join(ROUTES)})")
+            if method != ROUTES[path]:
+                raise ServiceError(405, f"{path} accepts {ROUTES[path]} only")
+            if path == "/health":
+                payload = self.health()
+            elif path == "/metrics":
+                payload = self.metrics()
+            else:
+                try:
+                    request = json.loads(body or b"{}")
+                except ValueError as e:
+                    raise ServiceError(400, f"Invalid JSON: {e}")
+                payload = await self.forecast(request)
+        except ServiceError as e:
+            status, payload = e.status, {"error": str(e)}
+        except Exception as e:
+            status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+        try:
+            data = encode_json(payload)
+        except ValueError as e:
+            status, data = 500, encode_json({"error": f"Response is not valid JSON: {e}"})
+        if path in self.latency:
+            self.latency[path].record(time.perf_counter() - start, ok=status < 400)
+        return status, data
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # HTTP
+    # ═══════════════════════════════════════════════════════════════════════
+    async def _read_request(self, reader):
+        """(method, path, body, keep_alive) of the next request, or None at end of stream"""
+        line = await reader.readline()
+        if not line.strip():
+            return None
+        parts = line.decode("latin-1").split()
+        if len(parts) != 3:
+            raise ServiceError(400, "Malformed request line")
+        method, target, version = parts
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            key, _, value = line.decode("latin-1").partition(":")
+            headers[key.strip().lower()] = value.strip()
+        length = int(headers.get("content-length", 0) or 0)
+        if length > MAX_BODY_BYTES:
+            raise ServiceError(413, f"Request body over {MAX_BODY_BYTES} bytes")
+        body = await reader.readexactly(length) if length else b""
+        keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+        return method, urlsplit(target).path, body, keep_alive
+
+    async def _serve_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except ServiceError as e:
+                    self._write_response(writer, e.status, encode_json({"error": str(e)}), keep_alive=False)
+                    break
+                if request is None:
+                    break
+                method, path, body, keep_alive = request
+                status, data = await self.handle(method, path, body)
+                self._write_response(writer, status, data, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _write_response(writer, status, data, keep_alive):
+        head = (f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(data)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode() + data)
+
+    async def serve(self, host="127.0.0.1", port=8765):
+        """Start the batching worker and listen; returns the asyncio server"""
+        if self._worker is None:
+            await self.start()
+        return await asyncio.start_server(self._serve_connection, host, port)
+
+
+class ServiceClient:
+    """In-process client that calls the service's request handler directly"""
+
+    def __init__(self, service):
+        self.service = service
+
+    async def request(self, method, path, payload=None):
+        """(status, decoded JSON body) as an HTTP client would see them"""
+        body = json.dumps(payload).encode() if payload is not None else b""
+        status, data = await self.service.handle(method, path, body)
+        return status, json.loads(data)
+
+    async def get(self, path):
+        return await self.request("GET", path)
+
+    async def post(self, path, payload):
+        return await self.request("POST", path, payload)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve ARDL revenue forecasts over a local HTTP API")
+    parser.add_argument("--artifact", default="ardl_tax_models.npz")
+    parser.add_argument("--data", default="ardl_prepared_data.csv")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH)
+    parser.add_argument("--max-wait-ms", type=float, default=DEFAULT_MAX_WAIT * 1000)
+    args = parser.parse_args()
+
+    async def run():
+        service = ForecastService.from_files(args.artifact, args.data, max_batch=args.max_batch,
+                                             max_wait=args.max_wait_ms / 1000)
+        server = await service.serve(args.host, args.port)
+        print(f"Serving {', '.join(service.engine.targets)} forecasts on http://{args.host}:{args.port}")
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+import json
+import os
+import sys
+import warnings
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from ardl_ingest import load_dataset_file  # noqa: E402
+
+TARGETS = ["income_tax", "gst", "fed"]
+
+
+@pytest.fixture(scope="session")
+def meta():
+    with open(os.path.join(ROOT, "ardl_tax_models_meta.json"), "r") as f:
+        return json.load(f)
+
+
+@pytest.fixture(scope="session")
+def df():
+    return load_dataset_file(os.path.join(ROOT, "ardl_prepared_data.csv"))
+
+
+@pytest.fixture(scope="session")
+def exog_names(meta):
+    return list(meta["x_vars_used"])
+
+
+def fit_statsmodels(df, target, exog_names, ar_lags, exog_order):
+    """statsmodels ARDL result of one specification"""
+    from statsmodels.tsa.ardl import ARDL
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return ARDL(df[target], lags=ar_lags, exog=df[exog_names], order=exog_order, trend="c").fit()
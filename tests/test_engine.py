@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from ardl_artifacts import artifact_from_results, load_artifact, save_artifact
+from ardl_engine import compile_results
+from ardl_fit import model_spec
+from conftest import TARGETS, fit_statsmodels
+from test_pipeline import LONG_EXOG
+
+HORIZON = 5
+
+
+def fitted_results(df, exog_names, specs):
+    return {t: fit_statsmodels(df.iloc[:-HORIZON], t, exog_names, *specs[t]) for t in TARGETS}
+
+
+@pytest.mark.parametrize("spec_set", ["shipped", "long_exog"])
+def test_forecast_matches_statsmodels(df, meta, exog_names, tmp_path, spec_set):
+    specs = {t: model_spec(t, meta) for t in TARGETS} if spec_set == "shipped" else LONG_EXOG
+    results = fitted_results(df, exog_names, specs)
+    future = df[exog_names].iloc[-HORIZON:]
+    expected = np.column_stack([np.asarray(results[t].forecast(HORIZON, exog=future)) for t in TARGETS])
+
+    engine = compile_results(results, exog_names)
+    np.testing.assert_allclose(engine.forecast(future.to_numpy()), expected, rtol=1e-10)
+
+    path = tmp_path / "models.npz"
+    save_artifact(path, *artifact_from_results(results, exog_names))
+    loaded, _, _ = load_artifact(path)
+    np.testing.assert_allclose(loaded.forecast(future.to_numpy()), expected, rtol=1e-10)
+    np.testing.assert_allclose(loaded.forecast_levels(future.to_numpy()), np.exp(expected), rtol=1e-10)
+
+
+def test_forecast_vectorizes_over_scenarios(df, meta, exog_names):
+    results = fitted_results(df, exog_names, {t: model_spec(t, meta) for t in TARGETS})
+    engine = compile_results(results, exog_names)
+    base = df[exog_names].iloc[-HORIZON:].to_numpy()
+    paths = np.stack([base, base + 0.01, base - 0.02])
+    stacked = engine.forecast(paths)
+    for s, path in enumerate(paths):
+        np.testing.assert_allclose(stacked[s], engine.forecast(path), rtol=1e-12)
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from ardl_fit import fit_target, model_spec, refit_models, reported_nobs
+from conftest import TARGETS, fit_statsmodels
+
+STATS = ("nobs", "sigma2", "llf", "aic", "bic", "rsquared")
+# (ar_lags, exog lags of gdp_real); the second and third regress further back than their own lags
+SPECS = [([1], [0]), ([1], [0, 1, 2]), ([1, 2], [0, 1, 2, 3]), ([1, 2, 3], [0, 1])]
+
+
+def assert_matches_statsmodels(params, stats, res):
+    for name, value in res.params.items():
+        assert params[name] == pytest.approx(value, rel=1e-7, abs=1e-9), name
+    for key in STATS:
+        assert stats[key] == pytest.approx(float(getattr(res, key)), rel=1e-8), key
+
+
+@pytest.mark.parametrize("ar_lags, lags", SPECS)
+def test_fit_target_matches_statsmodels(df, exog_names, ar_lags, lags):
+    exog_order = {v: (lags if v == "gdp_real" else [0]) for v in exog_names}
+    params, resid, stats = fit_target(df, "fed", ar_lags, exog_order)
+    res = fit_statsmodels(df, "fed", exog_names, ar_lags, exog_order)
+    assert_matches_statsmodels(params, stats, res)
+    np.testing.assert_allclose(resid, res.resid.to_numpy(), rtol=1e-7, atol=1e-9)
+
+
+def test_reported_nobs_counts_own_lag_hold_back_only():
+    assert reported_nobs(30, [1, 2, 3], {"x": [0, 1]}) == 30
+    assert reported_nobs(31, [1], {"x": [0, 1, 2]}) == 32
+
+
+def test_refit_models_matches_statsmodels(df, meta, exog_names):
+    engine, header = refit_models(df, meta, TARGETS, exog_names)
+    for t in TARGETS:
+        ar_lags, exog_order = model_spec(t, meta)
+        res = fit_statsmodels(df, t, exog_names, ar_lags, exog_order)
+        assert_matches_statsmodels(header["models"][t]["params"], header["models"][t], res)
+        assert header["models"][t]["aic"] == pytest.approx(meta[t]["aic"], rel=1e-8)
+    np.testing.assert_allclose(engine.sigma2, [header["models"][t]["sigma2"] for t in TARGETS])
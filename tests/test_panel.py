@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ardl_fit import refit_models
+from ardl_intervals import mean_forecast
+from ardl_panel import entity_history, entity_model, fit_panel, panel_exog_paths, rollup_history
+from ardl_scenarios import build_exog_paths, default_scenarios
+from conftest import TARGETS
+
+
+def make_panel(df, n_entities=3, drop_first=None, drop_last=None, seed=1):
+    """Copies of ``df`` with their own revenue scale; ``drop_*`` maps entity -> rows removed"""
+    rng = np.random.default_rng(seed)
+    frames = []
+    for e in range(n_entities):
+        frame = df.copy()
+        if e:
+            frame[TARGETS] += np.log(rng.uniform(0.05, 0.3)) + rng.normal(0, 0.03, (len(frame), len(TARGETS)))
+        frame = frame.iloc[(drop_first or {}).get(e, 0):len(frame) - (drop_last or {}).get(e, 0)]
+        frame.insert(0, "province", f"P{e}")
+        frames.append(frame)
+    # Shuffled rows: the layout must not depend on the input order
+    return pd.concat(frames).sample(frac=1, random_state=0)
+
+
+@pytest.mark.parametrize("drop_first", [None, {1: 5, 2: 2}])
+def test_fit_panel_matches_single_entity_refits(df, meta, exog_names, drop_first):
+    panel = make_panel(df, drop_first=drop_first)
+    engine, header = fit_panel(panel, meta, TARGETS, exog_names)
+    scenarios = default_scenarios(df.columns)
+    entity_exog = panel_exog_paths(engine, scenarios, 5)
+    for e, entity in enumerate(header["entities"]):
+        history = entity_history(panel, entity)
+        ref_engine, ref_header = refit_models(history, meta, TARGETS, exog_names)
+        single, single_header = entity_model(engine, header, entity)
+        for t in TARGETS:
+            ref = ref_header["models"][t]
+            got = single_header["models"][t]
+            np.testing.assert_allclose(list(got["params"].values()), list(ref["params"].values()), rtol=1e-8)
+            for key in ("nobs", "aic", "bic", "sigma2"):
+                assert got[key] == pytest.approx(ref[key], rel=1e-8), (entity, t, key)
+        exog = build_exog_paths(history.iloc[-1], scenarios, exog_names, 5)[0]
+        np.testing.assert_allclose(entity_exog[e], exog)
+        np.testing.assert_allclose(engine.mean_forecast(entity_exog)[e], mean_forecast(ref_engine, exog), rtol=1e-8)
+
+
+def test_rollup_history_keeps_periods_every_entity_has(df):
+    panel = make_panel(df, drop_first={1: 5, 2: 2})
+    national = rollup_history(panel, TARGETS)
+    assert list(national.index) == list(df.index[5:])
+    levels = np.exp(panel[TARGETS]).groupby(level=0).sum().loc[national.index]
+    np.testing.assert_allclose(np.exp(national[TARGETS]), levels)
+    np.testing.assert_allclose(national["inflation"], panel["inflation"].groupby(level=0).mean().loc[national.index])
+
+
+def test_fit_panel_rejects_entities_ending_early(df, meta, exog_names):
+    panel = make_panel(df, drop_last={2: 3})
+    with pytest.raises(ValueError, match=r"run to 2024, but these end earlier: P2 \(2021\)$"):
+        fit_panel(panel, meta, TARGETS, exog_names)
+
+
+def test_fit_panel_rejects_missing_and_repeated_periods(df, meta, exog_names):
+    panel = make_panel(df)
+    gap = panel[~((panel["province"] == "P1") & (panel.index == df.index[10]))]
+    repeated = pd.concat([panel, panel[panel["province"] == "P2"].iloc[:1]])
+    for bad, name in ((gap, "P1"), (repeated, "P2")):
+        with pytest.raises(ValueError, match=f"Missing or repeated periods for {name}$"):
+            fit_panel(bad, meta, TARGETS, exog_names)
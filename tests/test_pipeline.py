@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from ardl_artifacts import artifact_from_results, load_artifact, save_artifact
+from ardl_fit import fit_target, model_spec
+from ardl_pipeline import update_models
+from conftest import TARGETS, fit_statsmodels
+
+# gst regresses gdp_real two years back on a single own lag
+LONG_EXOG = {"income_tax": ([1], {"inflation": [0, 1], "govexp": [0]}),
+             "gst": ([1], {"gdp_real": [0, 1, 2], "govexp": [0]}),
+             "fed": ([1, 2], {"imports_real": [0, 1]})}
+
+
+def shipped_specs(meta):
+    return {t: model_spec(t, meta) for t in TARGETS}
+
+
+def fitted_artifact(df, exog_names, specs, tmp_path):
+    """Artifact round-tripped through disk, and metadata, of ``specs`` fitted by statsmodels on ``df``"""
+    results = {t: fit_statsmodels(df, t, exog_names, *specs[t]) for t in TARGETS}
+    meta = {t: {"selected_order": str(specs[t][1]), "params": dict(results[t].params)} for t in TARGETS}
+    path = tmp_path / "models.npz"
+    save_artifact(path, *artifact_from_results(results, exog_names, meta))
+    return load_artifact(path), meta, results
+
+
+def test_artifact_with_exog_lags_longer_than_ar(df, exog_names, tmp_path):
+    (engine, header, training), _, results = fitted_artifact(df, exog_names, LONG_EXOG, tmp_path)
+    for t in TARGETS:
+        assert header["models"][t]["nobs"] == int(results[t].nobs)
+        assert header["sufficient"][t]["nobs"] == len(results[t].resid)
+    assert results["gst"].nobs == len(results["gst"].resid) + 1
+
+
+@pytest.mark.parametrize("spec_set", ["shipped", "long_exog"])
+@pytest.mark.parametrize("n_new", [1, 3])
+def test_update_models_matches_full_refit(df, meta, exog_names, tmp_path, spec_set, n_new):
+    specs = shipped_specs(meta) if spec_set == "shipped" else LONG_EXOG
+    (engine, header, training), old_meta, _ = fitted_artifact(df.iloc[:-n_new], exog_names, specs, tmp_path)
+    engine, header, training, new_meta = update_models(df, engine, header, training, old_meta)
+    assert len(training) == len(df)
+    assert header["incremental_rows"] == n_new
+    for t in TARGETS:
+        params, _, stats = fit_target(df, t, *specs[t])
+        updated = header["models"][t]
+        np.testing.assert_allclose(list(updated["params"].values()), list(params.values()), rtol=1e-5)
+        for key in ("nobs", "aic", "bic", "sigma2"):
+            assert updated[key] == pytest.approx(stats[key], rel=1e-6), (t, key)
+        assert new_meta[t]["nobs"] == stats["nobs"]
+        assert header["sufficient"][t]["nobs"] == len(df) - max(max(specs[t][0]),
+                                                                max(max(l) for l in specs[t][1].values()))
+
+
+def test_update_models_rejects_revised_history(df, meta, exog_names, tmp_path):
+    (engine, header, training), old_meta, _ = fitted_artifact(df.iloc[:-1], exog_names, shipped_specs(meta),
+                                                              tmp_path)
+    revised = df.copy()
+    revised.iloc[5, revised.columns.get_loc("gst")] += 0.1
+    with pytest.raises(ValueError, match="differ from the training sample"):
+        update_models(revised, engine, header, training, old_meta)
+
+
+def test_write_outputs_keeps_previous_files_when_a_step_fails(df, meta, exog_names, tmp_path, monkeypatch):
+    import ardl_pipeline
+
+    specs = shipped_specs(meta)
+    results = {t: fit_statsmodels(df, t, exog_names, *specs[t]) for t in TARGETS}
+    out_meta = dict(meta, **{t: dict(meta[t]) for t in TARGETS})
+    prefix = str(tmp_path / "models")
+    for suffix in (".pkl", "_meta.json", ".npz"):
+        (tmp_path / f"models{suffix}").write_bytes(b"previous")
+
+    def fail(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(ardl_pipeline, "save_artifact", fail)
+    with pytest.raises(OSError):
+        ardl_pipeline.write_outputs(out_meta, {}, results, prefix)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["models.npz", "models.pkl", "models_meta.json"]
+    assert all(p.read_bytes() == b"previous" for p in tmp_path.iterdir())
+
+    monkeypatch.undo()
+    ardl_pipeline.write_outputs(out_meta, {}, results, prefix)
+    engine, header, _ = load_artifact(f"{prefix}.npz")
+    assert header["targets"] == TARGETS
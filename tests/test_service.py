@@ -0,0 +1,116 @@
+import asyncio
+import json
+import os
+
+import numpy as np
+import pytest
+
+from ardl_intervals import analytic_bands
+from ardl_batch import run_batch
+from ardl_scenarios import build_exog_paths, default_scenarios, evaluate_grid
+from ardl_service import ForecastService, ServiceClient
+from conftest import ROOT
+
+
+def strict_json(data):
+    def reject(constant):
+        raise ValueError(f"non-standard JSON constant {constant}")
+    return json.loads(data, parse_constant=reject)
+
+
+def call(requests):
+    """Responses of ``[(method, path, payload or raw bytes)]`` from a running service"""
+    async def run():
+        service = ForecastService.from_files(os.path.join(ROOT, "ardl_tax_models.npz"),
+                                             os.path.join(ROOT, "ardl_prepared_data.csv"))
+        async with service:
+            client = ServiceClient(service)
+            out = []
+            for method, path, payload in requests:
+                if isinstance(payload, bytes):
+                    status, data = await service.handle(method, path, payload)
+                    out.append((status, strict_json(data)))
+                else:
+                    out.append(await client.request(method, path, payload))
+            return service, out
+    return asyncio.run(run())
+
+
+def test_forecast_matches_analytic_bands():
+    scenario = {"gdp_real": 0.03, "inflation": [0.1, 0.11, 0.12, 0.13, 0.14]}
+    service, [(status, body)] = call([("POST", "/forecast", {"horizon": 5, "scenarios": scenario})])
+    assert status == 200
+    exog = build_exog_paths(service.last_row, default_scenarios(service.df_hist.columns, scenario),
+                            service.engine.exog_names, 5)[0]
+    bands = analytic_bands(service.engine, exog)
+    for t in service.engine.targets + ["total"]:
+        np.testing.assert_allclose(body["forecast"][t], bands[t]["mean"].to_numpy() / 1000, rtol=1e-10)
+        for p in service.percentiles:
+            np.testing.assert_allclose(body["intervals"][t][f"p{p:g}"], bands[t][p].to_numpy() / 1000, rtol=1e-8)
+    assert body["years"] == [2025, 2026, 2027, 2028, 2029]
+    assert body["totals"]["final_year"] == pytest.approx(body["forecast"]["total"][-1])
+
+
+def test_concurrent_requests_are_batched_consistently():
+    async def run():
+        service = ForecastService.from_files(os.path.join(ROOT, "ardl_tax_models.npz"),
+                                             os.path.join(ROOT, "ardl_prepared_data.csv"))
+        async with service:
+            client = ServiceClient(service)
+            requests = [{"horizon": 1 + i % 10, "scenarios": {"gdp_real": 0.01 + i * 1e-3}} for i in range(50)]
+            batched = await asyncio.gather(*(client.post("/forecast", r) for r in requests))
+            single = [await client.post("/forecast", r) for r in requests[:5]]
+            return service, batched, single
+    service, batched, single = asyncio.run(run())
+    assert all(status == 200 for status, _ in batched)
+    assert service.batches < 50 + 5
+    for (_, a), (_, b) in zip(batched, single):
+        np.testing.assert_allclose(a["forecast"]["total"], b["forecast"]["total"], rtol=1e-12)
+
+
+@pytest.mark.parametrize("payload, message", [
+    ({"scenarios": {"gdp_real": {"type": "growth"}}}, "needs a 'value'"),
+    ({"scenarios": {"gdp_real": {"type": "bogus", "value": 0.02}}}, "Unknown spec type"),
+    ({"scenarios": {"gdp_real": {"type": "growth", "value": None}}}, "must be finite"),
+    ({"scenarios": {"gdp_real": None}}, None),
+    ({"scenarios": {"inflation": [0.1, None, 0.1]}}, "must be finite"),
+    ({"scenarios": {"gdp_real": -1.0}}, "must be finite"),
+    ({"scenarios": {"gdp_real": "fast"}}, "could not convert"),
+    ({"scenarios": {"nope": 1}}, "Unknown assumption variables: nope"),
+    ({"horizon": 0}, "'horizon' must be an integer"),
+    ({"horizon": 3, "scenarios": {"inflation": [0.1, 0.1]}}, "expected 3"),
+    (b'{"scenarios": {"gdp_real": NaN}}', "must be finite"),
+    (b'{"scenarios": {"gdp_real": Infinity}}', "must be finite"),
+    (b"{bad", "Invalid JSON"),
+])
+def test_invalid_forecast_requests_are_400(payload, message):
+    _, [(status, body)] = call([("POST", "/forecast", payload)])
+    if message is None:
+        # A null override keeps the default assumption
+        assert status == 200
+        return
+    assert status == 400, body
+    assert message in body["error"]
+
+
+def test_routes_and_methods():
+    _, [(health_status, health), (missing, _), (wrong_method, _), (metrics_status, metrics)] = call([
+        ("GET", "/health", None), ("GET", "/nope", None), ("GET", "/forecast", None), ("GET", "/metrics", None)])
+    assert health_status == 200 and health["status"] == "ok"
+    assert (missing, wrong_method, metrics_status) == (404, 405, 200)
+    assert (metrics["routes"]["/forecast"]["count"], metrics["routes"]["/forecast"]["errors"]) == (1, 1)
+    assert metrics["routes"]["/health"]["count"] == 1
+
+
+def test_batch_and_grid_report_the_service_means():
+    scenarios = [{"gdp_real": 0.03}, {"gdp_real": 0.05, "inflation": [0.1, 0.11, 0.12, 0.13, 0.14]}]
+    service, responses = call([("POST", "/forecast", {"horizon": 5, "scenarios": s}) for s in scenarios])
+    forecasts, targets, _ = run_batch(os.path.join(ROOT, "ardl_tax_models.npz"),
+                                      os.path.join(ROOT, "ardl_prepared_data.csv"), scenarios, 5, workers=1)
+    for preds, (status, body) in zip(forecasts, responses):
+        assert status == 200
+        for i, t in enumerate(targets):
+            np.testing.assert_allclose(preds[i] / 1000, body["forecast"][t], rtol=1e-10)
+    specs = default_scenarios(service.df_hist.columns, scenarios[0])
+    grid = evaluate_grid(service.engine, service.last_row, specs, 5)
+    np.testing.assert_allclose(grid[0], forecasts[0], rtol=1e-12)